@@ -1,12 +1,14 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask_httpauth import HTTPBasicAuth
 from dotenv import load_dotenv
-from pyngrok import ngrok
 import logging
 import os
-import subprocess
 import requests
 import re
+import io
 import json
+import sys
+import threading
 
 from signalwire_swaig.core import SWAIG, SWAIGArgument
 
@@ -16,8 +18,22 @@ from reservation_system import (
     update_reservation_response,
     cancel_reservation_response,
     move_reservation_response,
-    reservations
+    join_waitlist_response,
+    check_waitlist_response,
+    leave_waitlist_response,
+    import_reservations,
+    iter_reservations,
+    list_reservations,
+    reservations,
+    waitlist
 )
+from reservation_export import iter_csv, iter_html_table, iter_jsonl, reservation_to_dict
+from reservation_import import iter_rows
+# The SWAIG helpers shared by every app live in ../swaig_common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from swaig_common.idempotency import idempotent_swaig
+from swaig_common.recorder import record_swaig_traffic
+from swaig_common.tunnel import close_tunnels, start_tunnel
 import random
 
 logging.getLogger('werkzeug').setLevel(logging.WARNING)
@@ -38,6 +54,21 @@ swaig = SWAIG(
     app,
     auth=(os.getenv('HTTP_USERNAME'), os.getenv('HTTP_PASSWORD'))
 )
+# Retried bookings and changes answer from the first attempt instead of applying twice
+idempotent_swaig(app, [
+    "create_reservation", "update_reservation", "cancel_reservation",
+    "move_reservation", "join_waitlist", "leave_waitlist"
+])
+
+# Same credentials as SWAIG, for the reservation listing and export API
+api_auth = HTTPBasicAuth()
+
+@api_auth.verify_password
+def verify_api_password(username, password):
+    return username == os.getenv('HTTP_USERNAME') and password == os.getenv('HTTP_PASSWORD')
+
+DASHBOARD_PAGE_SIZE = int(os.getenv('DASHBOARD_PAGE_SIZE', 50))
+MAX_PAGE_SIZE = 500
 
 @swaig.endpoint(
     description="Create a new reservation for a customer",
@@ -100,41 +131,134 @@ def move_reservation(phone_number, new_date, new_time, meta_data_token=None, met
         "new_time": new_time
     })
 
+@swaig.endpoint(
+    description="Add a caller to the waitlist for a fully booked date and time. They are booked automatically if a table frees up.",
+    name=SWAIGArgument(type="string", description="The name of the person waiting", required=True),
+    party_size=SWAIGArgument(type="integer", description="Number of people in the party", required=True),
+    date=SWAIGArgument(type="string", description="Requested date in YYYY-MM-DD format", required=True),
+    time=SWAIGArgument(type="string", description="Requested time in HH:MM format (24-hour)", required=True),
+    phone_number=SWAIGArgument(type="string", description="Contact phone number in E.164 format (e.g., +19185551234)", required=True)
+)
+def join_waitlist(name, party_size, date, time, phone_number, meta_data_token=None, meta_data=None):
+    return join_waitlist_response({
+        "name": name,
+        "party_size": party_size,
+        "date": date,
+        "time": time,
+        "phone_number": phone_number
+    })
+
+@swaig.endpoint(
+    description="Check a caller's place on the waitlist",
+    phone_number=SWAIGArgument(type="string", description="Phone number used to join the waitlist in E.164 format", required=True)
+)
+def check_waitlist(phone_number, meta_data_token=None, meta_data=None):
+    return check_waitlist_response({"phone_number": phone_number})
+
+@swaig.endpoint(
+    description="Remove a caller from the waitlist",
+    phone_number=SWAIGArgument(type="string", description="Phone number used to join the waitlist in E.164 format", required=True)
+)
+def leave_waitlist(phone_number, meta_data_token=None, meta_data=None):
+    return leave_waitlist_response({"phone_number": phone_number})
+
+def notify_waitlist_promotions():
+    """Drain promotion events; POST each one to WAITLIST_WEBHOOK_URL when it is set"""
+    webhook_url = os.getenv("WAITLIST_WEBHOOK_URL")
+    while True:
+        event = waitlist.events.get()
+        logging.info(f"Waitlist promotion: {event['name']} for {event['party_size']} on {event['date']} at {event['time']}")
+        if not webhook_url:
+            continue
+        try:
+            requests.post(webhook_url, json=event, timeout=5).raise_for_status()
+        except Exception as e:
+            logging.error(f"Failed to deliver waitlist promotion for {event['phone_number']}: {e}")
+
+_started = False
+
+def create_app():
+    """
+    Return the configured Flask app and start its background threads. Safe to
+    call more than once; use 'app:create_app()' as the WSGI entry point.
+    """
+    global _started
+    if not _started:
+        _started = True
+        record_swaig_traffic(app)
+        threading.Thread(target=notify_waitlist_promotions, name="waitlist-notifier", daemon=True).start()
+    return app
+
 def scramble_phone_number(phone):
     if not phone or len(phone) < 6:
         return phone
     return phone[:-6] + ''.join(random.choices('0123456789', k=6))
 
-def get_reservations_table_html():
+def get_reservations_table_html(cursor=None, limit=DASHBOARD_PAGE_SIZE):
     if not reservations:
         return "<p>No reservations yet.</p>"
-    
-    table_html = """
-    <table border="1">
-        <tr>
-            <th>Name</th>
-            <th>Phone</th>
-            <th>Date</th>
-            <th>Time</th>
-            <th>Party Size</th>
-        </tr>
-    """
-    
-    for phone, details in reservations.items():
-        scrambled = scramble_phone_number(phone)
-        table_html += f"""
-        <tr>
-            <td>{details['name']}</td>
-            <td>{scrambled}</td>
-            <td>{details['date']}</td>
-            <td>{details['time']}</td>
-            <td>{details['party_size']}</td>
-        </tr>
-        """
-    
-    table_html += "</table>"
+
+    rows, next_cursor = list_reservations(cursor=cursor, limit=limit)
+    table_html = "".join(iter_html_table(rows, format_phone=scramble_phone_number))
+    if cursor:
+        table_html += '<p><a href="/">First page</a></p>'
+    if next_cursor:
+        table_html += f'<p><a href="/?cursor={next_cursor}">Next page</a></p>'
     return table_html
 
+def get_listing_filters():
+    return {
+        "start_date": request.args.get('start_date'),
+        "end_date": request.args.get('end_date'),
+        "name": request.args.get('name')
+    }
+
+@app.route('/api/reservations', methods=['GET'])
+@api_auth.login_required
+def api_list_reservations():
+    try:
+        limit = max(1, min(int(request.args.get('limit', DASHBOARD_PAGE_SIZE)), MAX_PAGE_SIZE))
+        rows, next_cursor = list_reservations(cursor=request.args.get('cursor'), limit=limit, **get_listing_filters())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({
+        "reservations": [reservation_to_dict(reservation) for reservation in rows],
+        "next_cursor": next_cursor
+    })
+
+@app.route('/api/reservations/export', methods=['GET'])
+@api_auth.login_required
+def api_export_reservations():
+    export_format = request.args.get('format', 'csv')
+    try:
+        rows = iter_reservations(**get_listing_filters())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if export_format == 'csv':
+        return Response(stream_with_context(iter_csv(rows)), mimetype='text/csv',
+                        headers={"Content-Disposition": "attachment; filename=reservations.csv"})
+    if export_format == 'jsonl':
+        return Response(stream_with_context(iter_jsonl(rows)), mimetype='application/x-ndjson',
+                        headers={"Content-Disposition": "attachment; filename=reservations.jsonl"})
+    if export_format == 'html':
+        return Response(stream_with_context(iter_html_table(rows)), mimetype='text/html')
+    return jsonify({"error": f"Unsupported export format: {export_format}"}), 400
+
+@app.route('/api/reservations/import', methods=['POST'])
+@api_auth.login_required
+def api_import_reservations():
+    stream = io.TextIOWrapper(io.BufferedReader(request.stream), encoding='utf-8', newline='')
+    try:
+        rows = iter_rows(stream, request.content_type)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 415
+    imported, error_count, errors = import_reservations(rows)
+    if error_count:
+        logging.info(f"Bulk import rejected: {error_count} invalid rows")
+        return jsonify({"imported": 0, "error_count": error_count, "errors": errors}), 422
+    logging.info(f"Bulk import committed {imported} reservations")
+    return jsonify({"imported": imported, "error_count": 0, "errors": []})
+
 # Route for the reservation page
 @app.route('/swaig', methods=['GET'])
 @app.route('/', methods=['GET'])
@@ -143,7 +267,10 @@ def serve_reservation_html():
         with open('static/reservation.html', 'r') as file:
             html_content = file.read()
         
-        reservations_table = get_reservations_table_html()
+        try:
+            reservations_table = get_reservations_table_html(cursor=request.args.get('cursor'))
+        except ValueError:
+            reservations_table = get_reservations_table_html()
         
         # Replace placeholders with actual data
         html_content = html_content.replace("{{reservations_table}}", reservations_table)
@@ -167,34 +294,16 @@ def serve_reservation_html():
         return jsonify({"error": "Failed to serve HTML"}), 500
 
 if __name__ == "__main__":
-    ngrok_process = None  # Initialize ngrok_process to None
+    # Flask's development server; see gunicorn.conf.py for production serving
+    port = int(os.getenv("PORT", 5000))
+    container_ip = os.getenv("CONTAINER_IP", "0.0.0.0")
+    print(f"Local SWAIG URL: http://{container_ip}:{port}/swaig")
+    # With DEBUG the reloader runs this block in a parent and a child process; only the child serves
+    if not os.getenv("DEBUG") or os.getenv("WERKZEUG_RUN_MAIN"):
+        start_tunnel(port)
     try:
-        # Attempt to configure ngrok with the provided auth token
-        ngrok_auth_token = os.getenv("NGROK_AUTH_TOKEN")
-        if ngrok_auth_token:
-            ngrok.set_auth_token(ngrok_auth_token)
-            logging.debug("Ngrok auth token configured successfully.")
-
-        # Start ngrok tunnel
-        port = int(os.getenv("PORT", 5000))
-        public_url = ngrok.connect(port).public_url
-        logging.info(f"Ngrok tunnel available at: {public_url}")
-        os.environ["PUBLIC_URL"] = public_url
-
-        # Print Local and Public URLs
-        container_ip = os.getenv("CONTAINER_IP", "0.0.0.0")
-        local_url = f"http://{container_ip}:{port}/swaig"
-        print(f"Local SWAIG URL: {local_url}")
-        print(f"Public SWAIG URL: {public_url}/swaig")
-
-    except Exception as e:
-        logging.error(f"Failed to start ngrok: {e}")
+        create_app().run(host="0.0.0.0", port=port, debug=os.getenv("DEBUG"))
+    except KeyboardInterrupt:
+        logging.info("Shutting down Flask app.")
     finally:
-        try:
-            app.run(host="0.0.0.0", port=port, debug=os.getenv("DEBUG"))
-        except KeyboardInterrupt:
-            logging.info("Shutting down Flask app.")
-        finally:
-            if ngrok_process:
-                ngrok_process.terminate()
-                logging.info("Ngrok process terminated.")
+        close_tunnels()
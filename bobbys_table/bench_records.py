@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Compare the memory footprint and per-call CPU of Reservation records
+against the plain dicts reservation_system used to store.
+
+    python3 bench_records.py [--count 100000]
+"""
+import argparse
+import gc
+import time
+import tracemalloc
+from datetime import datetime
+
+from reservation_system import Reservation, normalize_phone_number, parse_date_time
+
+def sample_rows(count):
+    for i in range(count):
+        yield (f"Guest {i}", str(1 + i % 12), f"2025-{1 + i % 12:02d}-{1 + i % 28:02d}",
+               f"{11 + i % 11:02d}:{(i % 4) * 15:02d}", f"+1918{i:07d}")
+
+def build_dicts(rows):
+    store = {}
+    for name, party_size, date, time_str, phone in rows:
+        datetime.strptime(f"{date} {time_str}", "%Y-%m-%d %H:%M")
+        store[phone] = {"name": name, "party_size": int(party_size), "date": date, "time": time_str}
+    return store
+
+def build_records(rows):
+    store = {}
+    for i, (name, party_size, date, time_str, phone) in enumerate(rows):
+        phone = normalize_phone_number(phone)
+        store[phone] = Reservation(i, name, int(party_size), parse_date_time(date, time_str), phone)
+    return store
+
+def sort_dicts(store):
+    return sorted(store.values(), key=lambda r: datetime.strptime(f"{r['date']} {r['time']}", "%Y-%m-%d %H:%M"))
+
+def sort_records(store):
+    return sorted(store.values(), key=lambda r: r.when)
+
+def measure(build, count):
+    # Rows are generated inside the traced region, the way request payloads
+    # arrive, so strings a store keeps alive are charged to that store
+    gc.collect()
+    tracemalloc.start()
+    store = build(sample_rows(count))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return store, size
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100000)
+    count = parser.parse_args().count
+    rows = list(sample_rows(count))
+
+    dicts, dict_bytes = measure(build_dicts, count)
+    records, record_bytes = measure(build_records, count)
+    results = [
+        ("memory per booking (bytes)", dict_bytes / count, record_bytes / count),
+        ("create per booking (us)", timed(build_dicts, rows) / count * 1e6, timed(build_records, rows) / count * 1e6),
+        ("sort whole book by time (ms)", timed(sort_dicts, dicts) * 1e3, timed(sort_records, records) * 1e3),
+    ]
+
+    print(f"{count} bookings")
+    print(f"{'':32}{'dict':>12}{'Reservation':>14}")
+    for label, old, new in results:
+        print(f"{label:32}{old:12.1f}{new:14.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Time every public reservation_system operation and the dashboard render on
+synthetic books, check the results against brute force, and save or compare
+a JSON baseline.
+
+    python3 bench_reservation_system.py                              # 1k, 10k, 100k, 1M
+    python3 bench_reservation_system.py --sizes 1000,10000 --save baseline.json
+    python3 bench_reservation_system.py --compare baseline.json --tolerance 1.5
+
+With --compare the exit status is 1 when any operation's median is more
+than --tolerance times slower than the baseline.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import reservation_system
+from reservation_export import iter_csv
+from reservation_system import (
+    create_reservation_response,
+    get_reservation_response,
+    update_reservation_response,
+    cancel_reservation_response,
+    move_reservation_response,
+    join_waitlist_response,
+    check_waitlist_response,
+    leave_waitlist_response,
+    import_reservations,
+    iter_reservations,
+    list_reservations,
+    reservations
+)
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000]
+FIRST_DAY = date(2025, 1, 1)
+# One booking every 15 minutes from 11:00 to 21:45; at most six seatings overlap,
+# so every synthetic booking gets a table
+SLOTS = [f"{hour:02d}:{minute:02d}" for hour in range(11, 22) for minute in (0, 15, 30, 45)]
+PARTY_SIZES = [2, 4, 3, 6, 2, 5, 4, 8, 1, 2, 4]
+NAMES = ["Jane Smith", "John Doe", "Ann Lee", "Carlos Diaz", "Mei Chen", "Sam Patel", "Ola Berg"]
+
+def synthetic_row(i):
+    day, slot = divmod(i, len(SLOTS))
+    return {
+        "name": f"{NAMES[i % len(NAMES)]} {i}",
+        "party_size": str(PARTY_SIZES[i % len(PARTY_SIZES)]),
+        "date": (FIRST_DAY + timedelta(days=day)).isoformat(),
+        "time": SLOTS[slot],
+        "phone_number": f"+1{2000000000 + i}"
+    }
+
+def synthetic_rows(count):
+    return (synthetic_row(i) for i in range(count))
+
+def build_book(count):
+    """Replace the store with a synthetic book of `count` bookings; returns the import time in seconds"""
+    reservation_system.clear_reservations()
+    gc.collect()
+    start = time.perf_counter()
+    imported, error_count, errors = import_reservations(synthetic_rows(count))
+    elapsed = time.perf_counter() - start
+    assert (imported, error_count) == (count, 0), errors[:3]
+    return elapsed
+
+def check_parity(count, samples=200):
+    """Check indexed reads and allocations against brute force over the whole store"""
+    rng = random.Random(count)
+    assert len(reservations) == count
+
+    expected = sorted(reservations.values(), key=lambda r: (r.when, r.id))
+    assert list(iter_reservations()) == expected
+
+    cursor, paged = None, []
+    for _ in range(3):
+        rows, cursor = list_reservations(cursor=cursor, limit=25)
+        paged.extend(rows)
+    assert paged == expected[:75]
+
+    day = synthetic_row(rng.randrange(count))["date"]
+    assert list(iter_reservations(start_date=day, end_date=day)) == [r for r in expected if r.date == day]
+
+    name = rng.choice(NAMES).lower()
+    rows, _ = list_reservations(name=name, limit=50)
+    assert rows == [r for r in expected if name in r.name.lower()][:50]
+
+    for i in rng.sample(range(count), min(samples, count)):
+        row = synthetic_row(i)
+        reservation = reservations[row["phone_number"]]
+        assert (reservation.name, str(reservation.party_size), reservation.date, reservation.time) == \
+            (row["name"], row["party_size"], row["date"], row["time"])
+        assert get_reservation_response(row) == f"Reservation found: {reservation.describe()}"
+        start, _, tables = reservation_system.allocator.allocation(reservation.phone_number)
+        assert start == reservation.when and tuple(t.name for t in tables) == reservation.tables
+        assert sum(t.capacity for t in tables) >= reservation.party_size
+
+    for table in reservation_system.allocator.tables:
+        for (_, end, _), (start, _, _) in zip(table.seatings, table.seatings[1:]):
+            assert end <= start, f"{table.name} is double booked at {start}"
+
+def percentile(values, q):
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+def timed(samples, operation, expect=None):
+    """Run operation(i) for i in range(samples); returns sorted durations in microseconds"""
+    durations = []
+    for i in range(samples):
+        start = time.perf_counter()
+        result = operation(i)
+        durations.append((time.perf_counter() - start) * 1e6)
+        if expect is not None:
+            assert result.startswith(expect), result
+    durations.sort()
+    return durations
+
+def run_size(count, samples, dashboard):
+    """Build a book of `count` bookings, check parity and time each operation"""
+    import_seconds = build_book(count)
+    check_parity(count)
+
+    rng = random.Random(count)
+    existing = [synthetic_row(rng.randrange(count)) for _ in range(samples)]
+    busy = existing[0]
+    spare_day = date.fromisoformat(synthetic_row(count - 1)["date"]) + timedelta(days=2)
+    middle = reservation_system.encode_cursor(reservations[synthetic_row(count // 2)["phone_number"]])
+    new_phones = [f"+1{3000000000 + i}" for i in range(samples)]
+    results = {"import (per booking)": [import_seconds / count * 1e6]}
+
+    def new_booking(i):
+        # Empty days after the book, one booking per slot
+        day, slot = divmod(i, len(SLOTS))
+        return {"name": "Bench Guest", "party_size": 2, "date": (spare_day + timedelta(days=day)).isoformat(),
+                "time": SLOTS[slot], "phone_number": new_phones[i]}
+
+    results["create_reservation"] = timed(samples, lambda i: create_reservation_response(new_booking(i)),
+                                          "Reservation successfully created")
+    results["cancel_reservation"] = timed(samples, lambda i: cancel_reservation_response(new_booking(i)),
+                                          "Reservation canceled")
+    results["create_reservation (no table, with suggestions)"] = timed(samples, lambda i: create_reservation_response(
+        {**busy, "party_size": 24, "phone_number": new_phones[i]}), "No table is available")
+    results["get_reservation"] = timed(samples, lambda i: get_reservation_response(existing[i]), "Reservation found")
+    results["get_reservation (missing)"] = timed(samples, lambda i: get_reservation_response(
+        {"phone_number": new_phones[i]}), "No reservation found")
+    results["update_reservation (name)"] = timed(samples, lambda i: update_reservation_response(
+        {"phone_number": existing[i]["phone_number"], "name": existing[i]["name"]}), "Reservation updated")
+
+    def move_and_back(i):
+        row = existing[i]
+        moved = move_reservation_response({"phone_number": row["phone_number"], "new_date": spare_day.isoformat(),
+                                           "new_time": row["time"]})
+        move_reservation_response({"phone_number": row["phone_number"], "new_date": row["date"],
+                                   "new_time": row["time"]})
+        return moved
+
+    results["move_reservation (there and back)"] = timed(samples, move_and_back, "Reservation moved")
+
+    waiting = {**busy, "party_size": 24}
+    results["join_waitlist"] = timed(samples, lambda i: join_waitlist_response(
+        {**waiting, "phone_number": new_phones[i]}), "Added to the waitlist")
+    results["check_waitlist"] = timed(samples, lambda i: check_waitlist_response(
+        {"phone_number": new_phones[i]}), "On the waitlist")
+    results["leave_waitlist"] = timed(samples, lambda i: leave_waitlist_response(
+        {"phone_number": new_phones[i]}), "Removed from the waitlist")
+
+    results["list_reservations (first page)"] = timed(samples, lambda i: list_reservations(limit=50))
+    results["list_reservations (cursor mid-book)"] = timed(samples, lambda i: list_reservations(cursor=middle, limit=50))
+    results["list_reservations (one day)"] = timed(samples, lambda i: list_reservations(
+        start_date=existing[i]["date"], end_date=existing[i]["date"], limit=50))
+    # A full name matches one booking, so this filter scans the whole book
+    results["list_reservations (name filter)"] = timed(min(samples, 20), lambda i: list_reservations(
+        name=existing[i]["name"], limit=50))
+    if dashboard:
+        results["dashboard render (first page)"] = timed(samples, lambda i: dashboard())
+        results["dashboard render (cursor mid-book)"] = timed(samples, lambda i: dashboard(cursor=middle))
+    results["export csv (whole book, per booking)"] = [v / count for v in timed(1, lambda i: sum(1 for _ in iter_csv(iter_reservations())))]
+
+    check_parity(count)
+    return {operation: {"median_us": round(percentile(durations, 0.5), 2),
+                        "p95_us": round(percentile(durations, 0.95), 2),
+                        "samples": len(durations)}
+            for operation, durations in results.items()}
+
+def load_dashboard():
+    """The dashboard table renderer from app.py, or None when the app's dependencies are missing"""
+    try:
+        from app import get_reservations_table_html
+    except ImportError as e:
+        print(f"Skipping dashboard render: {e}", file=sys.stderr)
+        return None
+    return get_reservations_table_html
+
+def print_results(count, results, baseline=None, tolerance=1.5):
+    """Print one size's timings; returns the operations slower than the baseline allows"""
+    regressions = []
+    print(f"\n{count} bookings")
+    header = f"{'operation':<48}{'median us':>12}{'p95 us':>12}"
+    print(header + (f"{'baseline':>12}{'ratio':>8}" if baseline else ""))
+    for operation, result in results.items():
+        line = f"{operation:<48}{result['median_us']:>12.2f}{result['p95_us']:>12.2f}"
+        previous = (baseline or {}).get(operation)
+        if previous:
+            ratio = result["median_us"] / max(previous["median_us"], 0.01)
+            line += f"{previous['median_us']:>12.2f}{ratio:>7.2f}x"
+            if ratio > tolerance:
+                line += "  REGRESSION"
+                regressions.append((count, operation, ratio))
+        print(line)
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="Comma separated book sizes (default %(default)s)")
+    parser.add_argument("--samples", type=int, default=200, help="Timed calls per operation (default 200)")
+    parser.add_argument("--save", metavar="FILE", help="Write the results to FILE as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Compare the results against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=1.5,
+                        help="Slowdown ratio of the median that counts as a regression (default 1.5)")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    dashboard = load_dashboard()
+    results, regressions = {}, []
+    for count in (int(size) for size in args.sizes.split(",")):
+        results[str(count)] = run_size(count, args.samples, dashboard)
+        regressions += print_results(count, results[str(count)], baseline.get(str(count)), args.tolerance)
+    reservation_system.clear_reservations()
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "samples": args.samples,
+                "results": results
+            }, f, indent=2)
+        print(f"\nSaved baseline to {args.save}")
+
+    if regressions:
+        print(f"\n{len(regressions)} operation(s) slower than {args.tolerance}x the baseline")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -52,15 +52,6 @@ source venv/bin/activate
 
 # Step 6: Install Python Dependencies
 echo "Installing Python dependencies..."
-cat <<EOF > requirements.txt
-flask
-requests
-python-dotenv
-signalwire
-signalwire_swaig
-pyngrok
-EOF
-
 pip3 install --upgrade pip
 pip3 install -r requirements.txt
 
@@ -107,15 +98,12 @@ source .env
 set +a
 
 
-#touch /home/bobby/.config/ngrok/ngrok.yml
-env $(cat .env | xargs) ngrok config add-authtoken $NGROK_AUTH_TOKEN
-env $(cat .env | xargs) ngrok http --url=$NGROK_DOMAIN 5000 &
-#ngrok http -region=$NGROK_REGION -authtoken=$NGROK_AUTH_TOKEN 5000 &
+# gunicorn.conf.py opens the ngrok tunnel itself once the server is listening, when NGROK_AUTH_TOKEN is set
 echo "Environment variables written to .env file. Update with your credentials."
 
 # Step 10: Final Instructions
 echo "Installation complete!"
 echo "Activate your virtual environment with:"
 echo "source venv/bin/activate"
-echo "Run your Flask app with:"
-echo "python3 app.py"
+echo "Run the app with:"
+echo "gunicorn -c gunicorn.conf.py 'app:create_app()'"
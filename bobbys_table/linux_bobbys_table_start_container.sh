@@ -51,7 +51,7 @@ build_image() {
   echo "============================================"
   echo "Building Docker image 'bobbys_table_image'..."
   echo "============================================"
-  if ! docker build -t "bobbys_table_image" .; then
+  if ! docker build -t "bobbys_table_image" -f Dockerfile ..; then
     echo "Docker build failed. Check your Dockerfile and try again."
     read -rp "Press Enter to continue..."
     exit 1
@@ -116,8 +116,8 @@ create_new_container() {
   fi
 
   echo
-  echo "Creating container '$containerName' from 'bobbys_table_image' with Bash..."
-  docker run -it --name "$containerName" "bobbys_table_image" bash
+  echo "Creating container '$containerName' from 'bobbys_table_image'; the image starts gunicorn on port 5000..."
+  docker run -d -p 5000:5000 --name "$containerName" "bobbys_table_image"
 }
 
 # ----------------------------------------------------------------------------
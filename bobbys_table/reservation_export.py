@@ -0,0 +1,51 @@
+import csv
+import html
+import io
+import json
+from typing import Callable, Iterable, Iterator, Optional
+
+from reservation_system import Reservation
+
+# Column order shared by the JSON, CSV and HTML renderings
+FIELDS = ("name", "phone_number", "date", "time", "party_size", "tables")
+HEADERS = ("Name", "Phone", "Date", "Time", "Party Size", "Tables")
+
+def reservation_to_dict(reservation: Reservation) -> dict:
+    return {
+        "name": reservation.name,
+        "phone_number": reservation.phone_number,
+        "date": reservation.date,
+        "time": reservation.time,
+        "party_size": reservation.party_size,
+        "tables": "+".join(reservation.tables)
+    }
+
+def iter_csv(rows: Iterable[Reservation]) -> Iterator[str]:
+    """Yield a CSV document one line at a time"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(FIELDS)
+    for reservation in rows:
+        record = reservation_to_dict(reservation)
+        writer.writerow([record[field] for field in FIELDS])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def iter_jsonl(rows: Iterable[Reservation]) -> Iterator[str]:
+    """Yield one JSON object per line, in the format accepted by the bulk import"""
+    for reservation in rows:
+        yield json.dumps(reservation_to_dict(reservation)) + "\n"
+
+def iter_html_table(rows: Iterable[Reservation],
+                    format_phone: Optional[Callable[[str], str]] = None) -> Iterator[str]:
+    """Yield an HTML reservations table one row at a time"""
+    yield '<table border="1">\n<tr>' + "".join(f"<th>{header}</th>" for header in HEADERS) + "</tr>\n"
+    for reservation in rows:
+        record = reservation_to_dict(reservation)
+        if format_phone:
+            record["phone_number"] = format_phone(reservation.phone_number)
+        cells = "".join(f"<td>{html.escape(str(record[field]))}</td>" for field in FIELDS)
+        yield f"<tr>{cells}</tr>\n"
+    yield "</table>\n"
@@ -0,0 +1,30 @@
+import csv
+import json
+from typing import IO, Iterator
+
+# Upload content types accepted by the bulk import endpoint
+CSV_TYPES = ("text/csv", "application/csv")
+JSONL_TYPES = ("application/x-ndjson", "application/jsonl", "application/x-jsonlines")
+
+def iter_csv_rows(stream: IO[str]) -> Iterator[dict]:
+    """Yield one dict per CSV data row; the header must name the reservation fields"""
+    for row in csv.DictReader(stream):
+        yield row
+
+def iter_jsonl_rows(stream: IO[str]) -> Iterator[dict]:
+    """Yield one dict per JSON line; malformed lines become {"_error": ...} so they are reported by row"""
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield {"_error": f"Invalid JSON: {str(e)}"}
+
+def iter_rows(stream: IO[str], content_type: str) -> Iterator[dict]:
+    content_type = (content_type or "").split(";")[0].strip().lower()
+    if content_type in CSV_TYPES:
+        return iter_csv_rows(stream)
+    if content_type in JSONL_TYPES:
+        return iter_jsonl_rows(stream)
+    raise ValueError(f"Unsupported content type: {content_type or 'none'}. Upload text/csv or application/x-ndjson.")
@@ -1,46 +1,207 @@
 import uuid
-from datetime import datetime
-from typing import Dict, Optional
+import itertools
+import os
+import re
+import sys
+import threading
+from functools import wraps
+from bisect import bisect_left, insort
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from seat_allocator import SeatAllocator, load_tables
+from waitlist import Waitlist
+
+DATE_FORMAT = "%Y-%m-%d"
+TIME_FORMAT = "%H:%M"
+
+class Reservation:
+    """
+    A single booking. Date and time are held as one parsed datetime; the
+    YYYY-MM-DD / HH:MM strings the AI prompt expects are rendered on access.
+    """
+    __slots__ = ("id", "name", "party_size", "when", "phone_number", "tables")
+
+    def __init__(self, id: int, name: str, party_size: int, when: datetime, phone_number: str,
+                 tables: Tuple[str, ...] = ()):
+        self.id = id
+        self.name = name
+        self.party_size = party_size
+        self.when = when
+        self.phone_number = phone_number
+        self.tables = tables
+
+    @property
+    def date(self) -> str:
+        return self.when.strftime(DATE_FORMAT)
+
+    @property
+    def time(self) -> str:
+        return self.when.strftime(TIME_FORMAT)
+
+    def describe(self) -> str:
+        return f"{self.name} for {self.party_size} people on {self.date} at {self.time}. Contact: {self.phone_number}"
 
 # Mock reservation data storage
-reservations: Dict[str, dict] = {}
+reservations: Dict[str, Reservation] = {}
 
-def validate_date_time(date_str: str, time_str: str) -> bool:
+# Physical tables; every reservation holds a seating on one or more of them
+allocator = SeatAllocator(load_tables(), seating_minutes=int(os.getenv("SEATING_MINUTES", 90)))
+
+# Parties waiting for a fully booked slot, promoted when a seating is freed
+waitlist = Waitlist()
+
+# Sorted (when, id, phone_number) keys used for range queries and keyset pagination
+_index: List[tuple] = []
+_ids = itertools.count(1)
+
+# Serializes writers so a bulk import is applied as one transaction
+_lock = threading.RLock()
+
+def _locked(func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        with _lock:
+            return func(*args, **kwargs)
+    return wrapper
+
+def _index_key(reservation: Reservation) -> tuple:
+    return (reservation.when, reservation.id, reservation.phone_number)
+
+def _index_add(reservation: Reservation) -> None:
+    insort(_index, _index_key(reservation))
+
+def _index_remove(reservation: Reservation) -> None:
+    key = _index_key(reservation)
+    pos = bisect_left(_index, key)
+    if pos < len(_index) and _index[pos] == key:
+        del _index[pos]
+
+@_locked
+def clear_reservations() -> None:
+    reservations.clear()
+    _index.clear()
+    allocator.clear()
+    waitlist.clear()
+
+def encode_cursor(reservation: Reservation) -> str:
+    """Opaque keyset cursor pointing just past the given reservation"""
+    return f"{reservation.date}T{reservation.time}~{reservation.id}"
+
+def decode_cursor(cursor: str) -> tuple:
     try:
-        datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M")
-        return True
+        when, reservation_id = cursor.split("~")
+        return (datetime.strptime(when, f"{DATE_FORMAT}T{TIME_FORMAT}"), int(reservation_id))
     except ValueError:
-        return False
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+def parse_date_time(date_str: str, time_str: str) -> Optional[datetime]:
+    try:
+        return datetime.strptime(f"{date_str} {time_str}", f"{DATE_FORMAT} {TIME_FORMAT}")
+    except (TypeError, ValueError):
+        return None
+
+def validate_date_time(date_str: str, time_str: str) -> bool:
+    return parse_date_time(date_str, time_str) is not None
+
+_PHONE_SEPARATORS = re.compile(r"[\s().-]")
+
+def normalize_phone_number(phone_number: str) -> str:
+    """Strip formatting characters and intern, so every record for a number shares one string"""
+    return sys.intern(_PHONE_SEPARATORS.sub("", str(phone_number)))
 
 def validate_phone_number(phone_number: str) -> bool:
     return phone_number.startswith("+") and len(phone_number) >= 10
 
-def create_reservation_response(data: dict) -> str:
-    try:
-        name = data["name"]
-        party_size = int(data["party_size"])
-        date = data["date"]
-        time = data["time"]
-        phone_number = data["phone_number"]
+def date_time_text(when: datetime) -> str:
+    return f"{when.strftime(DATE_FORMAT)} at {when.strftime(TIME_FORMAT)}"
 
-        if not validate_phone_number(phone_number):
-            return "Invalid phone number format. Please use E.164 format (e.g., +19185551234)."
+def no_table_response(party_size: int, when: datetime, suggest: bool = True) -> str:
+    if party_size > allocator.max_party_size:
+        return f"We can seat at most {allocator.max_party_size} people in one reservation."
+    requested = f"{party_size} people on {date_time_text(when)}"
+    if not suggest:
+        return f"No table is available for {requested}."
+    suggestions = allocator.suggest_times(party_size, when)
+    if suggestions:
+        times = ", ".join(s.strftime(TIME_FORMAT) for s in suggestions)
+        return f"No table is available for {requested}. Available times that day: {times}. The caller can also join the waitlist for the requested time."
+    return f"No table is available for {requested} or within two hours of it. The caller can join the waitlist for the requested time."
 
-        if party_size < 1:
-            return "Party size must be at least 1 person."
+def _promote_waitlist(released: Optional[tuple]) -> None:
+    """Offer a freed seating to waiting parties whose slot overlaps it"""
+    if not released or not len(waitlist):
+        return
+    start, end, tables = released
+    capacity = sum(table.capacity for table in tables)
 
-        if not validate_date_time(date, time):
-            return "Invalid date or time format. Use YYYY-MM-DD for date and HH:MM for time."
+    def booked(entry) -> bool:
+        return entry.phone_number in reservations
 
-        if phone_number in reservations:
-            return "A reservation already exists for this phone number."
+    def seat(entry) -> bool:
+        return allocator.allocate(entry.phone_number, entry.party_size, entry.when) is not None
+
+    for when in waitlist.slots_between(start - allocator.longest_seating + timedelta(minutes=1), end):
+        while True:
+            entry = waitlist.pop_best_fit(when, capacity, seat, stale=booked)
+            if entry is None:
+                break
+            _, _, seated = allocator.allocation(entry.phone_number)
+            reservation = Reservation(next(_ids), entry.name, entry.party_size, entry.when, entry.phone_number,
+                                      tuple(table.name for table in seated))
+            reservations[entry.phone_number] = reservation
+            _index_add(reservation)
+            waitlist.events.put({
+                "event": "waitlist_promoted",
+                "phone_number": entry.phone_number,
+                "name": entry.name,
+                "party_size": entry.party_size,
+                "date": reservation.date,
+                "time": reservation.time,
+                "tables": list(reservation.tables),
+                "promoted_at": datetime.now().isoformat(timespec="seconds")
+            })
+
+def _validate_new_booking(data: dict, pending: Iterable[str] = ()) -> Tuple[Optional[str], Optional[tuple]]:
+    """Return (error, None) or (None, (name, party_size, when, phone_number)) for a new booking"""
+    name = data["name"]
+    party_size = int(data["party_size"])
+    date = data["date"]
+    time = data["time"]
+    phone_number = normalize_phone_number(data["phone_number"])
+
+    if not validate_phone_number(phone_number):
+        return "Invalid phone number format. Please use E.164 format (e.g., +19185551234).", None
+
+    if party_size < 1:
+        return "Party size must be at least 1 person.", None
+
+    when = parse_date_time(date, time)
+    if when is None:
+        return "Invalid date or time format. Use YYYY-MM-DD for date and HH:MM for time.", None
+
+    if phone_number in reservations or phone_number in pending:
+        return "A reservation already exists for this phone number.", None
 
-        reservations[phone_number] = {
-            "name": name,
-            "party_size": party_size,
-            "date": date,
-            "time": time
-        }
+    return None, (name, party_size, when, phone_number)
+
+@_locked
+def create_reservation_response(data: dict) -> str:
+    try:
+        error, booking = _validate_new_booking(data)
+        if error:
+            return error
+        name, party_size, when, phone_number = booking
+
+        tables = allocator.allocate(phone_number, party_size, when)
+        if tables is None:
+            return no_table_response(party_size, when)
+
+        reservation = Reservation(next(_ids), name, party_size, when, phone_number, tables)
+        reservations[phone_number] = reservation
+        _index_add(reservation)
+        # A booking replaces any place the caller held on the waitlist
+        waitlist.leave(phone_number)
 
         return "Reservation successfully created."
 
@@ -51,14 +212,14 @@ def create_reservation_response(data: dict) -> str:
 
 def get_reservation_response(data: dict) -> str:
     try:
-        phone_number = data["phone_number"]
-        
+        phone_number = normalize_phone_number(data["phone_number"])
+
         if not validate_phone_number(phone_number):
             return "Invalid phone number format. Please use E.164 format (e.g., +19185551234)."
 
         reservation = reservations.get(phone_number)
         if reservation:
-            return f"Reservation found: {reservation['name']} for {reservation['party_size']} people on {reservation['date']} at {reservation['time']}. Contact: {phone_number}"
+            return f"Reservation found: {reservation.describe()}"
         return "No reservation found for this phone number."
 
     except KeyError:
@@ -66,10 +227,11 @@ def get_reservation_response(data: dict) -> str:
     except Exception as e:
         return f"Error retrieving reservation: {str(e)}"
 
+@_locked
 def update_reservation_response(data: dict) -> str:
     try:
-        phone_number = data["phone_number"]
-        
+        phone_number = normalize_phone_number(data["phone_number"])
+
         if not validate_phone_number(phone_number):
             return "Invalid phone number format. Please use E.164 format (e.g., +19185551234)."
 
@@ -77,39 +239,54 @@ def update_reservation_response(data: dict) -> str:
             return "No reservation found for this phone number."
 
         current_reservation = reservations[phone_number]
-        
-        if "date" in data and "time" in data:
-            if not validate_date_time(data["date"], data["time"]):
+
+        # Fields that are missing or None keep their current value
+        when = current_reservation.when
+        if data.get("date") is not None or data.get("time") is not None:
+            when = parse_date_time(data.get("date") or current_reservation.date,
+                                   data.get("time") or current_reservation.time)
+            if when is None:
                 return "Invalid date or time format. Use YYYY-MM-DD for date and HH:MM for time."
 
-        if "party_size" in data and int(data["party_size"]) < 1:
-            return "Party size must be at least 1 person."
+        party_size = current_reservation.party_size
+        if data.get("party_size") is not None:
+            party_size = int(data["party_size"])
+            if party_size < 1:
+                return "Party size must be at least 1 person."
 
-        updated_reservation = {
-            "name": data.get("name", current_reservation["name"]),
-            "party_size": int(data.get("party_size", current_reservation["party_size"])),
-            "date": data.get("date", current_reservation["date"]),
-            "time": data.get("time", current_reservation["time"])
-        }
+        released = None
+        if (party_size, when) != (current_reservation.party_size, current_reservation.when):
+            released = allocator.allocation(phone_number)
+            tables = allocator.reallocate(phone_number, party_size, when)
+            if tables is None:
+                return no_table_response(party_size, when)
+            current_reservation.tables = tables
 
-        reservations[phone_number] = updated_reservation
-        return f"Reservation updated: {updated_reservation['name']} for {updated_reservation['party_size']} people on {updated_reservation['date']} at {updated_reservation['time']}. Contact: {phone_number}"
+        _index_remove(current_reservation)
+        current_reservation.name = data.get("name") or current_reservation.name
+        current_reservation.party_size = party_size
+        current_reservation.when = when
+        _index_add(current_reservation)
+        _promote_waitlist(released)
+        return f"Reservation updated: {current_reservation.describe()}"
 
     except KeyError:
         return "Phone number is required."
     except Exception as e:
         return f"Error updating reservation: {str(e)}"
 
+@_locked
 def cancel_reservation_response(data: dict) -> str:
     try:
-        phone_number = data["phone_number"]
-        
+        phone_number = normalize_phone_number(data["phone_number"])
+
         if not validate_phone_number(phone_number):
             return "Invalid phone number format. Please use E.164 format (e.g., +19185551234)."
 
         if phone_number in reservations:
-            reservation = reservations[phone_number]
-            del reservations[phone_number]
+            reservation = reservations.pop(phone_number)
+            _index_remove(reservation)
+            _promote_waitlist(allocator.release(phone_number))
             return "Reservation canceled successfully."
         return "No reservation found for this phone number."
 
@@ -118,30 +295,218 @@ def cancel_reservation_response(data: dict) -> str:
     except Exception as e:
         return f"Error canceling reservation: {str(e)}"
 
+@_locked
 def move_reservation_response(data: dict) -> str:
     try:
-        phone_number = data["phone_number"]
+        phone_number = normalize_phone_number(data["phone_number"])
         new_date = data["new_date"]
         new_time = data["new_time"]
-        
+
         if not validate_phone_number(phone_number):
             return "Invalid phone number format. Please use E.164 format (e.g., +19185551234)."
 
-        if not validate_date_time(new_date, new_time):
+        new_when = parse_date_time(new_date, new_time)
+        if new_when is None:
             return "Invalid date or time format. Use YYYY-MM-DD for date and HH:MM for time."
 
         if phone_number in reservations:
             reservation = reservations[phone_number]
-            old_date = reservation["date"]
-            old_time = reservation["time"]
-            
-            reservation["date"] = new_date
-            reservation["time"] = new_time
-            
+            released = allocator.allocation(phone_number)
+            tables = allocator.reallocate(phone_number, reservation.party_size, new_when)
+            if tables is None:
+                return no_table_response(reservation.party_size, new_when)
+
+            _index_remove(reservation)
+            reservation.when = new_when
+            reservation.tables = tables
+            _index_add(reservation)
+            _promote_waitlist(released)
+
             return "Reservation moved successfully."
         return "No reservation found for this phone number."
 
     except KeyError as e:
         return f"Missing required field: {str(e)}"
     except Exception as e:
-        return f"Error moving reservation: {str(e)}" 
\ No newline at end of file
+        return f"Error moving reservation: {str(e)}"
+
+@_locked
+def join_waitlist_response(data: dict) -> str:
+    try:
+        error, booking = _validate_new_booking(data)
+        if error:
+            return error
+        name, party_size, when, phone_number = booking
+
+        if party_size > allocator.max_party_size:
+            return no_table_response(party_size, when)
+
+        current = waitlist.get(phone_number)
+        if current:
+            return f"This phone number is already on the waitlist for {date_time_text(current.when)}, position {waitlist.position(current)} in line."
+
+        if allocator.find_tables(party_size, when):
+            return "A table is available at that time. Please create a reservation instead."
+
+        entry = waitlist.join(name, party_size, when, phone_number)
+        return f"Added to the waitlist for {party_size} people on {date_time_text(when)}. Position {waitlist.position(entry)} in line. The caller will be booked automatically if a table frees up."
+
+    except KeyError as e:
+        return f"Missing required field: {str(e)}"
+    except Exception as e:
+        return f"Error joining waitlist: {str(e)}"
+
+def check_waitlist_response(data: dict) -> str:
+    try:
+        phone_number = normalize_phone_number(data["phone_number"])
+
+        if not validate_phone_number(phone_number):
+            return "Invalid phone number format. Please use E.164 format (e.g., +19185551234)."
+
+        entry = waitlist.get(phone_number)
+        if entry:
+            return f"On the waitlist: {entry.name} for {entry.party_size} people on {date_time_text(entry.when)}, position {waitlist.position(entry)} in line."
+        if phone_number in reservations:
+            return f"Not on the waitlist. Reservation found: {reservations[phone_number].describe()}"
+        return "This phone number is not on the waitlist."
+
+    except KeyError:
+        return "Phone number is required."
+    except Exception as e:
+        return f"Error checking waitlist: {str(e)}"
+
+@_locked
+def leave_waitlist_response(data: dict) -> str:
+    try:
+        phone_number = normalize_phone_number(data["phone_number"])
+
+        if not validate_phone_number(phone_number):
+            return "Invalid phone number format. Please use E.164 format (e.g., +19185551234)."
+
+        if waitlist.leave(phone_number):
+            return "Removed from the waitlist."
+        return "This phone number is not on the waitlist."
+
+    except KeyError:
+        return "Phone number is required."
+    except Exception as e:
+        return f"Error leaving waitlist: {str(e)}"
+
+def iter_reservations(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      name: Optional[str] = None, cursor: Optional[str] = None,
+                      chunk_size: int = 500) -> Iterator[Reservation]:
+    """
+    Return an iterator over reservations ordered by date and time.
+
+    Filters are parsed here, so bad input raises ValueError before the first
+    row is produced. The index is walked in keyset chunks rather than by
+    position, so a long running export stays consistent while reservations
+    are added or removed.
+    """
+    if cursor:
+        when, reservation_id = decode_cursor(cursor)
+        position = (when, reservation_id + 1)
+    elif start_date:
+        position = (datetime.strptime(start_date, DATE_FORMAT),)
+    else:
+        position = (datetime.min,)
+    end = datetime.strptime(end_date, DATE_FORMAT) + timedelta(days=1) if end_date else None
+    return _walk_index(position, end, name.lower() if name else None, chunk_size)
+
+def _walk_index(position: tuple, end: Optional[datetime], name: Optional[str],
+                chunk_size: int) -> Iterator[Reservation]:
+    while True:
+        start = bisect_left(_index, position)
+        chunk = _index[start:start + chunk_size]
+        if not chunk:
+            return
+        for when, reservation_id, phone_number in chunk:
+            if end and when >= end:
+                return
+            reservation = reservations.get(phone_number)
+            if reservation is None or reservation.id != reservation_id:
+                continue
+            if name and name not in str(reservation.name).lower():
+                continue
+            yield reservation
+        when, reservation_id, _ = chunk[-1]
+        position = (when, reservation_id + 1)
+
+def list_reservations(start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      name: Optional[str] = None, cursor: Optional[str] = None,
+                      limit: int = 50) -> Tuple[List[Reservation], Optional[str]]:
+    """Return one page of reservations and the cursor for the next page (None on the last page)"""
+    rows = list(itertools.islice(iter_reservations(start_date, end_date, name, cursor), limit + 1))
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1])
+
+def import_reservations(rows: Iterable[dict], max_errors: int = 1000) -> Tuple[int, int, List[dict]]:
+    """
+    Validate and seat every row, then commit them all or none.
+
+    Rows are read and validated without the write lock, so a slow upload
+    never holds up SWAIG bookings; the lock is taken only to seat the
+    validated rows and commit them. Returns (imported, error_count, errors)
+    where errors lists up to `max_errors` {"row", "error"} entries.
+    """
+    bookings: List[tuple] = []
+    pending: set = set()
+    errors: List[dict] = []
+    error_count = 0
+
+    for row_number, data in enumerate(rows, 1):
+        try:
+            error = data.get("_error")
+            if not error:
+                error, booking = _validate_new_booking(data, pending=pending)
+            if not error:
+                pending.add(booking[3])
+                bookings.append((row_number, *booking))
+        except KeyError as e:
+            error = f"Missing required field: {str(e)}"
+        except (AttributeError, TypeError, ValueError) as e:
+            error = f"Invalid row: {str(e)}"
+        if error:
+            error_count += 1
+            if len(errors) < max_errors:
+                errors.append({"row": row_number, "error": error})
+
+    if error_count:
+        return 0, error_count, errors
+    return _seat_and_commit(bookings, max_errors)
+
+@_locked
+def _seat_and_commit(bookings: List[tuple], max_errors: int) -> Tuple[int, int, List[dict]]:
+    staged: Dict[str, Reservation] = {}
+    errors: List[dict] = []
+    error_count = 0
+
+    for row_number, name, party_size, when, phone_number in bookings:
+        # Bookings made while the upload was being read are only visible now
+        if phone_number in reservations:
+            error = "A reservation already exists for this phone number."
+        else:
+            tables = allocator.allocate(phone_number, party_size, when)
+            if tables is None:
+                error = no_table_response(party_size, when, suggest=False)
+            else:
+                staged[phone_number] = Reservation(0, name, party_size, when, phone_number, tables)
+                continue
+        error_count += 1
+        if len(errors) < max_errors:
+            errors.append({"row": row_number, "error": error})
+
+    if error_count:
+        for phone_number in staged:
+            allocator.release(phone_number)
+        return 0, error_count, errors
+
+    for reservation in staged.values():
+        reservation.id = next(_ids)
+        reservations[reservation.phone_number] = reservation
+        _index.append(_index_key(reservation))
+        waitlist.leave(reservation.phone_number)
+    _index.sort()
+    return len(staged), 0, []
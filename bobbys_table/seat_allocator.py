@@ -0,0 +1,167 @@
+import json
+import os
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from itertools import combinations
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+# Bobby's dining room. Tables sharing a group can be pushed together for larger parties.
+DEFAULT_TABLES = [
+    {"name": "T1", "capacity": 2, "group": "window"},
+    {"name": "T2", "capacity": 2, "group": "window"},
+    {"name": "T3", "capacity": 2, "group": "window"},
+    {"name": "T4", "capacity": 2, "group": "window"},
+    {"name": "T5", "capacity": 4, "group": "main"},
+    {"name": "T6", "capacity": 4, "group": "main"},
+    {"name": "T7", "capacity": 4, "group": "main"},
+    {"name": "T8", "capacity": 4, "group": "main"},
+    {"name": "T9", "capacity": 4, "group": "main"},
+    {"name": "T10", "capacity": 4, "group": "main"},
+    {"name": "T11", "capacity": 6, "group": None},
+    {"name": "T12", "capacity": 6, "group": None},
+    {"name": "B1", "capacity": 8, "group": None},
+]
+
+class Table:
+    """A physical table and its booked seatings as a sorted, non-overlapping interval list"""
+    __slots__ = ("name", "capacity", "group", "starts", "seatings")
+
+    def __init__(self, name: str, capacity: int, group: Optional[str] = None):
+        self.name = name
+        self.capacity = capacity
+        self.group = group
+        self.starts: List[datetime] = []
+        self.seatings: List[Tuple[datetime, datetime, Hashable]] = []
+
+    def is_free(self, start: datetime, end: datetime) -> bool:
+        # Seatings never overlap, so only the last one starting before `end` can collide
+        i = bisect_left(self.starts, end)
+        return i == 0 or self.seatings[i - 1][1] <= start
+
+    def book(self, start: datetime, end: datetime, owner: Hashable) -> None:
+        i = bisect_left(self.starts, start)
+        self.starts.insert(i, start)
+        self.seatings.insert(i, (start, end, owner))
+
+    def release(self, start: datetime, owner: Hashable) -> None:
+        i = bisect_left(self.starts, start)
+        while i < len(self.starts) and self.starts[i] == start:
+            if self.seatings[i][2] == owner:
+                del self.starts[i]
+                del self.seatings[i]
+                return
+            i += 1
+
+class SeatAllocator:
+    """
+    Assigns parties to tables for the length of a seating.
+
+    A party gets the smallest single table that fits and is free for the
+    whole seating; failing that, the smallest free combination of tables
+    from one combinable group.
+    """
+
+    def __init__(self, tables: Sequence[dict] = DEFAULT_TABLES, seating_minutes: int = 90,
+                 large_party_size: int = 7, large_party_minutes: int = 120):
+        self.tables = sorted((Table(t["name"], int(t["capacity"]), t.get("group")) for t in tables),
+                             key=lambda t: t.capacity)
+        self.groups: Dict[str, List[Table]] = {}
+        for table in self.tables:
+            if table.group:
+                self.groups.setdefault(table.group, []).append(table)
+        self.seating_minutes = seating_minutes
+        self.large_party_size = large_party_size
+        self.large_party_minutes = large_party_minutes
+        self.max_party_size = max([t.capacity for t in self.tables] +
+                                  [sum(t.capacity for t in group) for group in self.groups.values()])
+        self._allocations: Dict[Hashable, Tuple[datetime, datetime, Tuple[Table, ...]]] = {}
+
+    @property
+    def longest_seating(self) -> timedelta:
+        return timedelta(minutes=max(self.seating_minutes, self.large_party_minutes))
+
+    def seating_duration(self, party_size: int) -> timedelta:
+        if party_size >= self.large_party_size:
+            return timedelta(minutes=self.large_party_minutes)
+        return timedelta(minutes=self.seating_minutes)
+
+    def find_tables(self, party_size: int, start: datetime) -> Optional[Tuple[Table, ...]]:
+        end = start + self.seating_duration(party_size)
+        for table in self.tables:
+            if table.capacity >= party_size and table.is_free(start, end):
+                return (table,)
+
+        best = None
+        for group in self.groups.values():
+            free = [t for t in group if t.is_free(start, end)]
+            if sum(t.capacity for t in free) < party_size:
+                continue
+            for count in range(2, len(free) + 1):
+                fits = [c for c in combinations(free, count) if sum(t.capacity for t in c) >= party_size]
+                if fits:
+                    candidate = min(fits, key=lambda c: sum(t.capacity for t in c))
+                    if best is None or (len(candidate), sum(t.capacity for t in candidate)) < \
+                            (len(best), sum(t.capacity for t in best)):
+                        best = candidate
+                    break
+        return best
+
+    def allocate(self, owner: Hashable, party_size: int, start: datetime) -> Optional[Tuple[str, ...]]:
+        """Book a seating for `owner`; returns the table names, or None when nothing fits"""
+        tables = self.find_tables(party_size, start)
+        if tables is None:
+            return None
+        self._book(owner, start, start + self.seating_duration(party_size), tables)
+        return tuple(t.name for t in tables)
+
+    def allocation(self, owner: Hashable) -> Optional[Tuple[datetime, datetime, Tuple[Table, ...]]]:
+        return self._allocations.get(owner)
+
+    def release(self, owner: Hashable) -> Optional[Tuple[datetime, datetime, Tuple[Table, ...]]]:
+        """Free the owner's seating and return it as (start, end, tables)"""
+        allocation = self._allocations.pop(owner, None)
+        if allocation:
+            start, _, tables = allocation
+            for table in tables:
+                table.release(start, owner)
+        return allocation
+
+    def reallocate(self, owner: Hashable, party_size: int, start: datetime) -> Optional[Tuple[str, ...]]:
+        """Move an existing seating; on failure the original seating is left in place"""
+        previous = self._allocations.get(owner)
+        self.release(owner)
+        tables = self.allocate(owner, party_size, start)
+        if tables is None and previous:
+            self._book(owner, *previous)
+        return tables
+
+    def suggest_times(self, party_size: int, start: datetime, window_minutes: int = 120,
+                      step_minutes: int = 15, limit: int = 3) -> List[datetime]:
+        """Closest start times on the same day that have a table free for this party"""
+        suggestions = []
+        for offset in range(step_minutes, window_minutes + 1, step_minutes):
+            for candidate in (start - timedelta(minutes=offset), start + timedelta(minutes=offset)):
+                if candidate.date() == start.date() and self.find_tables(party_size, candidate):
+                    suggestions.append(candidate)
+            if len(suggestions) >= limit:
+                break
+        return sorted(suggestions[:limit])
+
+    def clear(self) -> None:
+        for table in self.tables:
+            table.starts.clear()
+            table.seatings.clear()
+        self._allocations.clear()
+
+    def _book(self, owner: Hashable, start: datetime, end: datetime, tables: Tuple[Table, ...]) -> None:
+        for table in tables:
+            table.book(start, end, owner)
+        self._allocations[owner] = (start, end, tables)
+
+def load_tables() -> List[dict]:
+    """Dining room layout from the JSON file named by TABLES_FILE, or the built-in default"""
+    path = os.getenv("TABLES_FILE")
+    if not path:
+        return DEFAULT_TABLES
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,59 @@
+import io
+import threading
+
+import reservation_system
+from reservation_export import iter_csv, iter_jsonl
+from reservation_import import iter_rows
+from reservation_system import create_reservation_response, import_reservations, iter_reservations
+
+CSV_UPLOAD = """name,party_size,date,time,phone_number
+John Doe,4,2024-12-25,18:30,+19185550001
+Jane Smith,2,2024-12-25,19:00,+19185550002
+"""
+
+def setup_function():
+    reservation_system.clear_reservations()
+
+def test_csv_upload_is_committed():
+    imported, error_count, errors = import_reservations(iter_rows(io.StringIO(CSV_UPLOAD), "text/csv"))
+    assert (imported, error_count, errors) == (2, 0, [])
+    assert [r.name for r in iter_reservations()] == ["John Doe", "Jane Smith"]
+    assert reservation_system.reservations["+19185550001"].tables == ("T5",)
+
+def test_any_bad_row_rolls_back_the_whole_upload():
+    create_reservation_response({"name": "Existing", "party_size": 2, "date": "2024-12-24",
+                                 "time": "18:00", "phone_number": "+19185550002"})
+    upload = CSV_UPLOAD + "No Date,2,,18:00,+19185550003\n"
+    imported, error_count, errors = import_reservations(iter_rows(io.StringIO(upload), "text/csv"))
+    assert (imported, error_count) == (0, 2)
+    assert [e["row"] for e in errors] == [2, 3]
+    assert [r.name for r in iter_reservations()] == ["Existing"]
+    assert create_reservation_response({"name": "John Doe", "party_size": 4, "date": "2024-12-25",
+                                        "time": "18:30", "phone_number": "+19185550001"}) \
+        == "Reservation successfully created."
+
+def test_jsonl_round_trip():
+    import_reservations(iter_rows(io.StringIO(CSV_UPLOAD), "text/csv"))
+    exported = "".join(iter_jsonl(iter_reservations()))
+    csv_before = "".join(iter_csv(iter_reservations()))
+    reservation_system.clear_reservations()
+    imported, _, _ = import_reservations(iter_rows(io.StringIO(exported + "{oops\n"), "application/x-ndjson"))
+    assert imported == 0
+    imported, _, _ = import_reservations(iter_rows(io.StringIO(exported), "application/x-ndjson; charset=utf-8"))
+    assert imported == 2
+    assert "".join(iter_csv(iter_reservations())) == csv_before
+
+def test_bookings_are_not_blocked_while_an_upload_is_read():
+    def slow_upload():
+        yield from iter_rows(io.StringIO(CSV_UPLOAD), "text/csv")
+        booked = []
+        caller = threading.Thread(target=lambda: booked.append(create_reservation_response({
+            "name": "Caller", "party_size": 2, "date": "2024-12-25", "time": "19:00", "phone_number": "+19185550002"})))
+        caller.start()
+        caller.join(timeout=5)
+        assert booked == ["Reservation successfully created."]
+
+    imported, error_count, errors = import_reservations(slow_upload())
+    assert (imported, error_count) == (0, 1)
+    assert errors == [{"row": 2, "error": "A reservation already exists for this phone number."}]
+    assert [r.name for r in iter_reservations()] == ["Caller"]
@@ -0,0 +1,54 @@
+import reservation_system
+from reservation_system import (
+    create_reservation_response,
+    cancel_reservation_response,
+    move_reservation_response,
+    iter_reservations,
+    list_reservations
+)
+from reservation_export import iter_csv, iter_html_table
+
+def setup_function():
+    reservation_system.clear_reservations()
+    for i, (date, time, name) in enumerate([
+        ("2024-12-26", "19:00", "Jane Smith"),
+        ("2024-12-25", "18:30", "John Doe"),
+        ("2024-12-25", "18:30", "Johnny Cash"),
+        ("2024-12-27", "20:00", "Ann Lee"),
+    ]):
+        create_reservation_response({
+            "name": name,
+            "party_size": 2,
+            "date": date,
+            "time": time,
+            "phone_number": f"+1918555000{i}"
+        })
+
+def test_keyset_pagination_walks_every_reservation_in_order():
+    seen = []
+    cursor = None
+    while True:
+        rows, cursor = list_reservations(cursor=cursor, limit=1)
+        seen.extend(reservation.name for reservation in rows)
+        if cursor is None:
+            break
+    assert seen == ["John Doe", "Johnny Cash", "Jane Smith", "Ann Lee"]
+
+def test_filters():
+    rows, _ = list_reservations(start_date="2024-12-26", end_date="2024-12-26")
+    assert [reservation.name for reservation in rows] == ["Jane Smith"]
+    rows, _ = list_reservations(name="john")
+    assert [reservation.name for reservation in rows] == ["John Doe", "Johnny Cash"]
+
+def test_iteration_tracks_moves_and_cancellations():
+    move_reservation_response({"phone_number": "+19185550003", "new_date": "2024-12-24", "new_time": "12:00"})
+    cancel_reservation_response({"phone_number": "+19185550000"})
+    assert [reservation.name for reservation in iter_reservations()] == ["Ann Lee", "John Doe", "Johnny Cash"]
+
+def test_streamed_exports():
+    csv_lines = "".join(iter_csv(iter_reservations())).splitlines()
+    assert csv_lines[0] == "name,phone_number,date,time,party_size,tables"
+    assert csv_lines[1] == "John Doe,+19185550001,2024-12-25,18:30,2,T1"
+    assert len(csv_lines) == 5
+    table = "".join(iter_html_table(iter_reservations(name="ann")))
+    assert table.count("<tr>") == 2
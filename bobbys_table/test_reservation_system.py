@@ -1,44 +1,73 @@
+import reservation_system
 from reservation_system import (
-    create_reservation,
-    get_reservation,
-    update_reservation,
-    cancel_reservation,
-    move_reservation
+    create_reservation_response,
+    get_reservation_response,
+    update_reservation_response,
+    cancel_reservation_response,
+    move_reservation_response,
+    reservations
 )
 
-def test_reservation_system():
-    # Test create reservation
-    create_data = {
+PHONE = "+19185551234"
+
+def setup_function():
+    reservation_system.clear_reservations()
+
+def create(**overrides):
+    data = {
         "name": "John Doe",
         "party_size": 4,
         "date": "2024-12-25",
         "time": "18:30",
-        "phone_number": "+19185551234"
+        "phone_number": PHONE
     }
-    print(create_reservation(create_data))
+    data.update(overrides)
+    return create_reservation_response(data)
 
-    # Test get reservation
-    get_data = {"phone_number": "+19185551234"}
-    print(get_reservation(get_data))
+def test_reservation_lifecycle():
+    assert create() == "Reservation successfully created."
+    assert get_reservation_response({"phone_number": PHONE}) == \
+        "Reservation found: John Doe for 4 people on 2024-12-25 at 18:30. Contact: +19185551234"
 
-    # Test update reservation
-    update_data = {
-        "phone_number": "+19185551234",
-        "party_size": 6
-    }
-    print(update_reservation(update_data))
+    assert update_reservation_response({"phone_number": PHONE, "party_size": 6}) == \
+        "Reservation updated: John Doe for 6 people on 2024-12-25 at 18:30. Contact: +19185551234"
+    assert reservations[PHONE].tables == ("T11",)
 
-    # Test move reservation
-    move_data = {
-        "phone_number": "+19185551234",
-        "new_date": "2024-12-26",
-        "new_time": "19:00"
-    }
-    print(move_reservation(move_data))
+    assert move_reservation_response({"phone_number": PHONE, "new_date": "2024-12-26",
+                                      "new_time": "19:00"}) == "Reservation moved successfully."
+    assert reservations[PHONE].date == "2024-12-26" and reservations[PHONE].time == "19:00"
+
+    assert cancel_reservation_response({"phone_number": PHONE}) == "Reservation canceled successfully."
+    assert get_reservation_response({"phone_number": PHONE}) == "No reservation found for this phone number."
+    assert not reservation_system.allocator.allocation(PHONE)
+
+def test_phone_numbers_are_normalized():
+    assert create(phone_number="+1 (918) 555-1234") == "Reservation successfully created."
+    assert get_reservation_response({"phone_number": "+1-918-555-1234"}).startswith("Reservation found")
+    assert create() == "A reservation already exists for this phone number."
+
+def test_invalid_requests():
+    assert create(phone_number="555-1234").startswith("Invalid phone number format")
+    assert create(date="25/12/2024").startswith("Invalid date or time format")
+    assert create(party_size=0) == "Party size must be at least 1 person."
+    assert create_reservation_response({"phone_number": PHONE}).startswith("Missing required field")
+    assert get_reservation_response({}) == "Phone number is required."
+    assert update_reservation_response({"phone_number": PHONE}) == "No reservation found for this phone number."
+    assert cancel_reservation_response({"phone_number": PHONE}) == "No reservation found for this phone number."
+    assert move_reservation_response({"phone_number": PHONE, "new_date": "2024-12-26",
+                                      "new_time": "19:00"}) == "No reservation found for this phone number."
 
-    # Test cancel reservation
-    cancel_data = {"phone_number": "+19185551234"}
-    print(cancel_reservation(cancel_data))
+def test_failed_move_keeps_the_original_booking():
+    # A party of 24 needs every table in the main room pushed together
+    assert create(party_size=24) == "Reservation successfully created."
+    assert create(party_size=24, phone_number="+19185550002", time="20:30") == "Reservation successfully created."
+    response = move_reservation_response({"phone_number": "+19185550002", "new_date": "2024-12-25",
+                                          "new_time": "19:00"})
+    assert response.startswith("No table is available for 24 people on 2024-12-25 at 19:00")
+    assert reservations["+19185550002"].time == "20:30"
+    assert reservation_system.allocator.allocation("+19185550002")[0].strftime("%H:%M") == "20:30"
 
-if __name__ == "__main__":
-    test_reservation_system() 
\ No newline at end of file
+def test_synthetic_book_matches_brute_force():
+    from bench_reservation_system import build_book, check_parity
+    build_book(1000)
+    check_parity(1000)
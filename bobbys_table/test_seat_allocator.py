@@ -0,0 +1,65 @@
+import time
+from datetime import datetime, timedelta
+
+import reservation_system
+from reservation_system import create_reservation_response, move_reservation_response, cancel_reservation_response
+from seat_allocator import SeatAllocator
+
+def test_best_fit_prefers_smallest_table():
+    allocator = SeatAllocator()
+    start = datetime(2025, 1, 10, 18, 0)
+    assert allocator.allocate("a", 2, start) == ("T1",)
+    assert allocator.allocate("b", 3, start) == ("T5",)
+    assert allocator.allocate("c", 5, start) == ("T11",)
+
+def test_overlapping_seatings_use_other_tables():
+    allocator = SeatAllocator([{"name": "T1", "capacity": 4}])
+    start = datetime(2025, 1, 10, 18, 0)
+    assert allocator.allocate("a", 4, start) == ("T1",)
+    assert allocator.allocate("b", 4, start + timedelta(minutes=60)) is None
+    assert allocator.allocate("c", 4, start + timedelta(minutes=90)) == ("T1",)
+    assert allocator.suggest_times(4, start + timedelta(minutes=60)) == [start + timedelta(minutes=180)]
+
+def test_large_party_combines_tables_in_one_group():
+    allocator = SeatAllocator()
+    tables = allocator.allocate("a", 20, datetime(2025, 1, 10, 18, 0))
+    assert len(tables) == 5 and all(name in ("T5", "T6", "T7", "T8", "T9", "T10") for name in tables)
+
+def test_create_and_move_are_checked_against_tables():
+    reservation_system.clear_reservations()
+    booking = {"name": "Big Group", "party_size": 40, "date": "2025-01-10", "time": "18:00",
+               "phone_number": "+19185550001"}
+    assert create_reservation_response(booking) == "We can seat at most 24 people in one reservation."
+
+    booking["party_size"] = 24
+    assert create_reservation_response(booking) == "Reservation successfully created."
+    booking.update(phone_number="+19185550002", name="Second Group")
+    assert create_reservation_response(booking).startswith("No table is available for 24 people")
+
+    booking["time"] = "20:00"
+    assert create_reservation_response(booking) == "Reservation successfully created."
+    result = move_reservation_response({"phone_number": "+19185550002", "new_date": "2025-01-10", "new_time": "18:30"})
+    assert result.startswith("No table is available")
+    assert reservation_system.reservations["+19185550002"].time == "20:00"
+
+    cancel_reservation_response({"phone_number": "+19185550001"})
+    result = move_reservation_response({"phone_number": "+19185550002", "new_date": "2025-01-10", "new_time": "18:30"})
+    assert result == "Reservation moved successfully."
+
+def test_allocation_fits_in_a_voice_turn_for_a_full_month():
+    allocator = SeatAllocator()
+    owner = 0
+    for day in range(30):
+        for slot in range(0, 8 * 60, 15):
+            start = datetime(2025, 3, 1, 14, 0) + timedelta(days=day, minutes=slot)
+            for party_size in (2, 4, 6):
+                owner += 1
+                allocator.allocate(owner, party_size, start)
+
+    start = datetime(2025, 3, 15, 19, 0)
+    began = time.perf_counter()
+    for _ in range(100):
+        if allocator.allocate("probe", 4, start) is None:
+            allocator.suggest_times(4, start)
+        allocator.release("probe")
+    assert (time.perf_counter() - began) / 100 < 0.005
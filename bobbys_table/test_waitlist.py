@@ -0,0 +1,89 @@
+from datetime import datetime
+
+import reservation_system
+from reservation_system import (
+    cancel_reservation_response,
+    check_waitlist_response,
+    create_reservation_response,
+    join_waitlist_response,
+    leave_waitlist_response,
+    move_reservation_response,
+    waitlist
+)
+from seat_allocator import SeatAllocator
+
+def book(phone_number, party_size, time="18:00", name="Guest"):
+    return {"name": name, "party_size": party_size, "date": "2025-01-10", "time": time,
+            "phone_number": phone_number}
+
+def setup_function():
+    reservation_system.allocator = SeatAllocator([{"name": "T1", "capacity": 4}, {"name": "T2", "capacity": 2}])
+    reservation_system.clear_reservations()
+    while not waitlist.events.empty():
+        waitlist.events.get_nowait()
+
+def teardown_function():
+    reservation_system.allocator = SeatAllocator()
+
+def test_join_check_and_leave():
+    assert join_waitlist_response(book("+19185550001", 2)) == \
+        "A table is available at that time. Please create a reservation instead."
+    create_reservation_response(book("+19185550001", 4))
+    create_reservation_response(book("+19185550002", 2))
+    assert join_waitlist_response(book("+19185550003", 2)).endswith("Position 1 in line. The caller will be booked automatically if a table frees up.")
+    assert "Position 2 in line" in join_waitlist_response(book("+19185550004", 3))
+    assert "already on the waitlist" in join_waitlist_response(book("+19185550004", 3))
+    assert leave_waitlist_response({"phone_number": "+19185550003"}) == "Removed from the waitlist."
+    assert check_waitlist_response({"phone_number": "+19185550004"}).endswith("position 1 in line.")
+    assert check_waitlist_response({"phone_number": "+19185550003"}) == "This phone number is not on the waitlist."
+
+def test_cancel_promotes_largest_party_that_fits():
+    create_reservation_response(book("+19185550001", 4))
+    create_reservation_response(book("+19185550002", 2))
+    assert join_waitlist_response(book("+19185550009", 5)) == "We can seat at most 4 people in one reservation."
+    join_waitlist_response(book("+19185550003", 2, name="First Pair"))
+    join_waitlist_response(book("+19185550004", 3, name="Trio"))
+    join_waitlist_response(book("+19185550005", 2, name="Second Pair"))
+
+    cancel_reservation_response({"phone_number": "+19185550001"})
+    promoted = waitlist.events.get_nowait()
+    assert (promoted["name"], promoted["tables"], promoted["time"]) == ("Trio", ["T1"], "18:00")
+    assert reservation_system.reservations["+19185550004"].tables == ("T1",)
+    assert len(waitlist) == 2
+
+    cancel_reservation_response({"phone_number": "+19185550002"})
+    assert waitlist.events.get_nowait()["name"] == "First Pair"
+    assert waitlist.events.empty()
+    assert check_waitlist_response({"phone_number": "+19185550005"}).endswith("position 1 in line.")
+
+def test_moving_away_frees_an_overlapping_slot():
+    create_reservation_response(book("+19185550001", 4))
+    create_reservation_response(book("+19185550002", 2))
+    join_waitlist_response(book("+19185550003", 4, time="19:00"))
+    move_reservation_response({"phone_number": "+19185550001", "new_date": "2025-01-10", "new_time": "21:00"})
+    assert reservation_system.reservations["+19185550003"].when == datetime(2025, 1, 10, 19, 0)
+    assert waitlist.events.get_nowait()["phone_number"] == "+19185550003"
+
+def test_booking_elsewhere_gives_up_the_waitlist_place():
+    create_reservation_response(book("+19185550001", 4))
+    create_reservation_response(book("+19185550002", 2))
+    join_waitlist_response(book("+19185550003", 2, name="Booked Elsewhere"))
+    assert create_reservation_response(book("+19185550003", 2, time="12:00")) == "Reservation successfully created."
+    assert check_waitlist_response({"phone_number": "+19185550003"}).startswith("Not on the waitlist.")
+    assert join_waitlist_response(book("+19185550004", 2, name="Next Pair")).endswith("Position 1 in line. The caller will be booked automatically if a table frees up.")
+
+    cancel_reservation_response({"phone_number": "+19185550002"})
+    assert waitlist.events.get_nowait()["name"] == "Next Pair"
+    assert reservation_system.reservations["+19185550003"].time == "12:00"
+
+def test_a_stale_entry_does_not_block_its_party_size():
+    create_reservation_response(book("+19185550001", 4))
+    create_reservation_response(book("+19185550002", 2))
+    join_waitlist_response(book("+19185550003", 2, name="Stale"))
+    join_waitlist_response(book("+19185550004", 2, name="Waiting"))
+    # Booked without going through create_reservation_response, so still queued
+    reservation_system.reservations["+19185550003"] = reservation_system.reservations.pop("+19185550001")
+
+    cancel_reservation_response({"phone_number": "+19185550002"})
+    assert waitlist.events.get_nowait()["name"] == "Waiting"
+    assert len(waitlist) == 0
@@ -0,0 +1,133 @@
+import heapq
+import itertools
+import queue
+import time
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+class WaitlistEntry:
+    __slots__ = ("seq", "name", "party_size", "when", "phone_number", "requested_at", "active")
+
+    def __init__(self, seq: int, name: str, party_size: int, when: datetime, phone_number: str, requested_at: float):
+        self.seq = seq
+        self.name = name
+        self.party_size = party_size
+        self.when = when
+        self.phone_number = phone_number
+        self.requested_at = requested_at
+        self.active = True
+
+class _SlotQueue:
+    """Waiting parties for one slot: a heap per party size plus the sorted list of sizes waiting"""
+    __slots__ = ("sizes", "heaps", "count")
+
+    def __init__(self):
+        self.sizes: List[int] = []
+        self.heaps: Dict[int, List[Tuple[float, int, WaitlistEntry]]] = {}
+        self.count = 0
+
+    def push(self, entry: WaitlistEntry) -> None:
+        heap = self.heaps.get(entry.party_size)
+        if heap is None:
+            heap = self.heaps[entry.party_size] = []
+            insort(self.sizes, entry.party_size)
+        heapq.heappush(heap, (entry.requested_at, entry.seq, entry))
+        self.count += 1
+
+    def head(self, size: int) -> Optional[WaitlistEntry]:
+        # Entries that left are removed lazily when they reach the top of their heap
+        heap = self.heaps[size]
+        while heap and not heap[0][2].active:
+            heapq.heappop(heap)
+        if not heap:
+            del self.heaps[size]
+            del self.sizes[bisect_left(self.sizes, size)]
+            return None
+        return heap[0][2]
+
+class Waitlist:
+    """
+    Parties waiting for a fully booked slot.
+
+    When capacity frees up, the largest waiting party that fits is promoted
+    first, and parties of equal size are promoted in the order they asked.
+    Each promotion is also pushed onto `events` for notification.
+    """
+
+    def __init__(self):
+        self._slots: Dict[datetime, _SlotQueue] = {}
+        self._slot_times: List[datetime] = []
+        self._entries: Dict[str, WaitlistEntry] = {}
+        self._seq = itertools.count(1)
+        self.events: "queue.Queue[dict]" = queue.Queue()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, phone_number: str) -> Optional[WaitlistEntry]:
+        return self._entries.get(phone_number)
+
+    def join(self, name: str, party_size: int, when: datetime, phone_number: str) -> WaitlistEntry:
+        entry = WaitlistEntry(next(self._seq), name, party_size, when, phone_number, time.time())
+        slot = self._slots.get(when)
+        if slot is None:
+            slot = self._slots[when] = _SlotQueue()
+            insort(self._slot_times, when)
+        slot.push(entry)
+        self._entries[phone_number] = entry
+        return entry
+
+    def leave(self, phone_number: str) -> Optional[WaitlistEntry]:
+        entry = self._entries.pop(phone_number, None)
+        if entry:
+            entry.active = False
+            self._discount(entry.when)
+        return entry
+
+    def position(self, entry: WaitlistEntry) -> int:
+        """1-based place in line among everyone waiting for the same slot"""
+        slot = self._slots[entry.when]
+        return 1 + sum(1 for heap in slot.heaps.values() for requested_at, seq, other in heap
+                       if other.active and (requested_at, seq) < (entry.requested_at, entry.seq))
+
+    def slots_between(self, start: datetime, end: datetime) -> List[datetime]:
+        """Slots with waiting parties starting in [start, end)"""
+        return self._slot_times[bisect_left(self._slot_times, start):bisect_left(self._slot_times, end)]
+
+    def pop_best_fit(self, when: datetime, capacity: int, fits: Callable[[WaitlistEntry], bool],
+                     stale: Optional[Callable[[WaitlistEntry], bool]] = None) -> Optional[WaitlistEntry]:
+        """
+        Remove and return the best waiting party for `when` with at most
+        `capacity` people for which `fits` succeeds. Only the earliest party
+        of each size is offered to `fits`: a later party of the same size
+        would not fit either. Parties for which `stale` succeeds are taken
+        off the waitlist and the next party of that size is offered instead.
+        """
+        slot = self._slots.get(when)
+        if slot is None:
+            return None
+        for size in reversed(slot.sizes[:bisect_right(slot.sizes, capacity)]):
+            entry = slot.head(size)
+            while entry is not None and stale is not None and stale(entry):
+                self.leave(entry.phone_number)
+                entry = slot.head(size)
+            if entry is not None and fits(entry):
+                heapq.heappop(slot.heaps[size])
+                del self._entries[entry.phone_number]
+                entry.active = False
+                self._discount(when)
+                return entry
+        return None
+
+    def clear(self) -> None:
+        self._slots.clear()
+        self._slot_times.clear()
+        self._entries.clear()
+
+    def _discount(self, when: datetime) -> None:
+        slot = self._slots[when]
+        slot.count -= 1
+        if slot.count == 0:
+            del self._slots[when]
+            del self._slot_times[bisect_left(self._slot_times, when)]
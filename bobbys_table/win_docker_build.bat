@@ -22,7 +22,7 @@ echo.
 echo ============================================
 echo Building Docker image 'bobbys_table_image'...
 echo ============================================
-docker build -t "bobbys_table_image" .
+docker build -t "bobbys_table_image" -f Dockerfile ..
 if %ERRORLEVEL% NEQ 0 (
     echo.
     echo Docker build failed. Please check the Dockerfile and try again.
@@ -76,8 +76,8 @@ if %ERRORLEVEL%==0 (
 )
 
 echo.
-echo Creating and running container '%containerName%' with Bash shell...
-docker run -it --name "%containerName%" "bobbys_table_image" bash
+echo Creating container '%containerName%'; the image starts gunicorn on port 5000...
+docker run -d -p 5000:5000 --name "%containerName%" "bobbys_table_image"
 
 goto menu
 
@@ -1,30 +1,41 @@
 import os
 import logging
+import sys
+import random
 import subprocess
+import time
 import requests
 import re
 import json
 import sqlite3
 
 from flask import Flask, request, jsonify, g, render_template, redirect, url_for
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 from signalwire.rest import Client as SignalWireClient
 from signalwire_swaig.core import SWAIG, SWAIGArgument
+# The SWAIG helpers shared by every app live in ../swaig_common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from swaig_common.idempotency import idempotent_swaig
+from swaig_common.log_setup import configure_logging, sample_debug_logs
+from swaig_common.recorder import record_swaig_traffic
+from swaig_common.signatures import cache_swaig_signatures
 
 # =======================
 # Configuration and Setup
 # =======================
 
-logging.basicConfig(level=logging.DEBUG)
-logging.getLogger('werkzeug').setLevel(logging.DEBUG)
-logging.getLogger('signalwire').setLevel(logging.DEBUG)
-
+# LOG_LEVEL and LOG_FORMAT may come from .env, so load it before configuring logging
 load_dotenv()
 
+configure_logging()
+
 app = Flask(__name__)
 app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
 # SQLite database file for dental scheduling
 app.config['DATABASE'] = os.path.join(app.root_path, 'calendar.db')
+record_swaig_traffic(app)
+sample_debug_logs(app)
 
 # Define API_TOKEN for dental scheduling endpoints.
 API_TOKEN = os.getenv("API_TOKEN", "mysecrettoken")
@@ -58,10 +69,10 @@ if missing_vars:
 
 NGROK_URL = f"https://{NGROK_DOMAIN}"
 
-logging.debug(f"SIGNALWIRE_SPACE: {SPACE}")
-logging.debug(f"SIGNALWIRE_FROM_NUMBER: {FROM_NUMBER}")
-logging.debug(f"NGROK_DOMAIN: {NGROK_DOMAIN}")
-logging.debug(f"DEBUG_WEBOOK_URL: {DEBUG_WEBOOK_URL}")
+logging.debug("SIGNALWIRE_SPACE: %s", SPACE)
+logging.debug("SIGNALWIRE_FROM_NUMBER: %s", FROM_NUMBER)
+logging.debug("NGROK_DOMAIN: %s", NGROK_DOMAIN)
+logging.debug("DEBUG_WEBOOK_URL: %s", DEBUG_WEBOOK_URL)
 
 # =======================
 # Database Helper Functions
@@ -128,19 +139,61 @@ def token_required(f):
 # =======================
 
 class SignalWireMFA:
-    def __init__(self, project_id: str, token: str, space: str, from_number: str):
+    """
+    Sends and verifies MFA codes through the SignalWire REST API.
+
+    All requests share one keep-alive session, so connections to the space
+    are reused instead of opening a new TCP and TLS connection per code.
+    Requests time out, and 5xx responses and connection errors are retried
+    a bounded number of times with jittered exponential backoff.
+    """
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    def __init__(self, project_id: str, token: str, space: str, from_number: str,
+                 pool_size: int = int(os.getenv("MFA_HTTP_POOL_SIZE", 10)),
+                 connect_timeout: float = float(os.getenv("MFA_HTTP_CONNECT_TIMEOUT", 3.05)),
+                 read_timeout: float = float(os.getenv("MFA_HTTP_READ_TIMEOUT", 10)),
+                 retries: int = int(os.getenv("MFA_HTTP_RETRIES", 2)),
+                 backoff: float = float(os.getenv("MFA_HTTP_BACKOFF", 0.25)),
+                 base_url: str = os.getenv("SIGNALWIRE_MFA_BASE_URL")):
         try:
             self.client = SignalWireClient(project_id, token, signalwire_space_url=f"{space}.signalwire.com")
             self.project_id = project_id
             self.token = token
             self.space = space
             self.from_number = from_number
-            self.base_url = f"https://{space}.signalwire.com/api/relay/rest"
-            logging.debug(f"Initialized SignalWireMFA with from_number: {self.from_number}")
+            # SIGNALWIRE_MFA_BASE_URL points at a stand-in such as mfa_bot/fake_signalwire_mfa.py
+            self.base_url = (base_url or f"https://{space}.signalwire.com/api/relay/rest").rstrip("/")
+            self.timeout = (connect_timeout, read_timeout)
+            self.retries = retries
+            self.backoff = backoff
+            self.session = requests.Session()
+            self.session.auth = (project_id, token)
+            self.session.headers.update({"Content-Type": "application/json"})
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+            logging.debug("Initialized SignalWireMFA with from_number: %s", self.from_number)
         except Exception as e:
-            logging.error(f"Failed to initialize SignalWire Client: {e}")
+            logging.error("Failed to initialize SignalWire Client: %s", e)
             raise
 
+    def _post(self, url: str, payload: dict) -> requests.Response:
+        # Read timeouts are not retried: the code may already have been sent
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+                if response.status_code not in self.RETRY_STATUSES or attempt == self.retries:
+                    return response
+                reason = f"HTTP {response.status_code}"
+            except requests.ConnectionError as e:
+                if attempt == self.retries:
+                    raise
+                reason = str(e)
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            logging.warning("Retrying %s in %.2fs after %s (attempt %s of %s)", url, delay, reason, attempt + 1, self.retries)
+            time.sleep(delay)
+
     def send_mfa(self, to_number: str) -> dict:
         try:
             url = f"{self.base_url}/mfa/sms"
@@ -153,34 +206,34 @@ class SignalWireMFA:
                 "allow_alphas": False,
                 "valid_for": 3600
             }
-            headers = {"Content-Type": "application/json"}
-            logging.debug(f"Sending MFA from {self.from_number} to {to_number}")
-            response = requests.post(url, json=payload, auth=(self.project_id, self.token), headers=headers)
+            logging.debug("Sending MFA from %s to %s", self.from_number, to_number)
+            response = self._post(url, payload)
             response.raise_for_status()
             data = response.json()
-            logging.debug(f"Sent MFA code to {to_number}, Response: {data}")
+            logging.debug("Sent MFA code to %s, Response: %s", to_number, data)
             return data
         except Exception as e:
-            logging.error(f"Error sending MFA code: {e}")
+            logging.error("Error sending MFA code: %s", e)
             raise
 
     def verify_mfa(self, mfa_id: str, token: str) -> dict:
         try:
             verify_url = f"{self.base_url}/mfa/{mfa_id}/verify"
             payload = {"token": token}
-            headers = {"Content-Type": "application/json"}
-            logging.debug(f"Verifying MFA with ID {mfa_id} using token {token}")
-            response = requests.post(verify_url, json=payload, auth=(self.project_id, self.token), headers=headers)
+            logging.debug("Verifying MFA with ID %s", mfa_id)
+            response = self._post(verify_url, payload)
             response.raise_for_status()
             decoded_response = response.json()
-            logging.debug(f"Verification response: {decoded_response}")
+            logging.debug("Verification response: %s", decoded_response)
             return decoded_response
         except Exception as e:
-            logging.error(f"Error during verification: {e}")
+            logging.error("Error during verification: %s", e)
             return {"success": False, "message": "HTTP error during verification."}
 
 mfa_util = SignalWireMFA(PROJECT_ID, TOKEN, SPACE, FROM_NUMBER)
 swaig = SWAIG(app, auth=(HTTP_USERNAME, HTTP_PASSWORD))
+signature_cache = cache_swaig_signatures(app, swaig)
+idempotent_swaig(app, ["send_mfa_code"])
 
 def is_valid_uuid(uuid_to_test, version=4):
     regex = {
@@ -198,17 +251,16 @@ LAST_MFA_ID = None
 )
 def send_mfa_code(to_number: str, meta_data: dict = None, **kwargs) -> dict:
     global LAST_MFA_ID
-    logging.debug(f"Attempting to send MFA code to {to_number}")
+    logging.debug("Attempting to send MFA code to %s", to_number)
     try:
         response = mfa_util.send_mfa(to_number)
         mfa_id = response.get("id")
         if not mfa_id:
             raise ValueError("MFA ID not found in response.")
         LAST_MFA_ID = mfa_id
-        logging.debug(f"Full send_mfa response: {response}")
         return {"success": True, "message": "6 digit number sent"}, 200
     except Exception as e:
-        logging.error(f"Error sending MFA code: {e}")
+        logging.error("Error sending MFA code: %s", e)
         return {"success": False, "message": "Failed to send MFA code"}, 500
 
 @swaig.endpoint(
@@ -217,19 +269,18 @@ def send_mfa_code(to_number: str, meta_data: dict = None, **kwargs) -> dict:
 )
 def verify_mfa_code(token: str, meta_data: dict = None, **kwargs) -> dict:
     global LAST_MFA_ID
-    logging.debug(f"Received token: {token}")
+    logging.debug("Received a code to verify")
     if not LAST_MFA_ID or not is_valid_uuid(LAST_MFA_ID):
         logging.error("No valid MFA session.")
         return {"success": False, "message": "No valid MFA session."}, 401
     try:
         verification_response = mfa_util.verify_mfa(LAST_MFA_ID, token)
         verification_response["mfa_id"] = LAST_MFA_ID
-        logging.debug(f"Verification response: {verification_response}")
         if verification_response.get("success"):
            return {"success": False, "message": "Invalid MFA code. Please try again.", "mfa_id": LAST_MFA_ID}, 401
 
     except Exception as e:
-        logging.error(f"Error verifying MFA code: {e}")
+        logging.error("Error verifying MFA code: %s", e)
         return {"success": False, "message": "Internal server error occurred during verification."}, 500
 
 @app.route("/swaig", methods=["POST", "GET"])
@@ -238,16 +289,14 @@ def handle_swaig():
         data = request.get_json() or {}
         action = data.get("action")
         function_name = data.get("function")
-        logging.debug(f"Handling /swaig request: action={action}, function={function_name}")
+        logging.debug("Handling /swaig request: action=%s, function=%s", action, function_name)
         if action == "get_signature":
-            signatures = swaig.get_signatures()
-            return jsonify(signatures)
+            return signature_cache.response(data.get("functions") or ())
         if not function_name:
             return jsonify({"response": "Function name not provided."}), 400
         return swaig.handle_request(data)
     else:
-        signatures = swaig.get_signatures()
-        return jsonify(signatures)
+        return signature_cache.response(request.args.getlist("functions"))
 
 # =======================
 # Dental Office Scheduling & Admin Endpoints
@@ -471,12 +520,12 @@ if __name__ == '__main__':
         logging.debug("Ngrok auth token configured successfully.")
         ngrok_cmd = [NGROK_PATH, "http", "--domain=" + NGROK_DOMAIN, "8888"]
         ngrok_process = subprocess.Popen(ngrok_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        logging.info(f" * Started ngrok tunnel at {NGROK_URL}")
+        logging.info(" * Started ngrok tunnel at %s", NGROK_URL)
         app.run(host="0.0.0.0", port=8888, debug=True)
     except subprocess.CalledProcessError as e:
-        logging.error(f"Failed to configure ngrok: {e.stderr.decode().strip()}")
+        logging.error("Failed to configure ngrok: %s", e.stderr.decode().strip())
     except Exception as e:
-        logging.error(f"Error starting ngrok or Flask app: {e}")
+        logging.error("Error starting ngrok or Flask app: %s", e)
     finally:
         if 'ngrok_process' in locals():
             ngrok_process.terminate()
@@ -1537,6 +1537,7 @@ EOF
 cat > dental_app/app.py << 'EOF'
 import os
 import logging
+import random
 import subprocess
 import requests
 import re
@@ -1549,6 +1550,7 @@ import psutil
 import secrets
 from dotenv import load_dotenv, set_key
 from flask import Flask, request, jsonify, g, render_template, redirect, url_for, session
+from requests.adapters import HTTPAdapter
 from signalwire.rest import Client as SignalWireClient
 from signalwire_swaig.core import SWAIG, SWAIGArgument
 
@@ -1700,19 +1702,61 @@ def token_required(f):
 # =======================
 
 class SignalWireMFA:
-    def __init__(self, project_id: str, token: str, space: str, from_number: str):
+    """
+    Sends and verifies MFA codes through the SignalWire REST API.
+
+    All requests share one keep-alive session, so connections to the space
+    are reused instead of opening a new TCP and TLS connection per code.
+    Requests time out, and 5xx responses and connection errors are retried
+    a bounded number of times with jittered exponential backoff.
+    """
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    def __init__(self, project_id: str, token: str, space: str, from_number: str,
+                 pool_size: int = int(os.getenv("MFA_HTTP_POOL_SIZE", 10)),
+                 connect_timeout: float = float(os.getenv("MFA_HTTP_CONNECT_TIMEOUT", 3.05)),
+                 read_timeout: float = float(os.getenv("MFA_HTTP_READ_TIMEOUT", 10)),
+                 retries: int = int(os.getenv("MFA_HTTP_RETRIES", 2)),
+                 backoff: float = float(os.getenv("MFA_HTTP_BACKOFF", 0.25)),
+                 base_url: str = os.getenv("SIGNALWIRE_MFA_BASE_URL")):
         try:
             self.client = SignalWireClient(project_id, token, signalwire_space_url=f"{space}.signalwire.com")
             self.project_id = project_id
             self.token = token
             self.space = space
             self.from_number = from_number
-            self.base_url = f"https://{space}.signalwire.com/api/relay/rest"
+            # SIGNALWIRE_MFA_BASE_URL points at a stand-in such as mfa_bot/fake_signalwire_mfa.py
+            self.base_url = (base_url or f"https://{space}.signalwire.com/api/relay/rest").rstrip("/")
+            self.timeout = (connect_timeout, read_timeout)
+            self.retries = retries
+            self.backoff = backoff
+            self.session = requests.Session()
+            self.session.auth = (project_id, token)
+            self.session.headers.update({"Content-Type": "application/json"})
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
             logging.debug(f"Initialized SignalWireMFA with from_number: {self.from_number}")
         except Exception as e:
             logging.error(f"Failed to initialize SignalWire Client: {e}")
             raise
 
+    def _post(self, url: str, payload: dict) -> requests.Response:
+        # Read timeouts are not retried: the code may already have been sent
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+                if response.status_code not in self.RETRY_STATUSES or attempt == self.retries:
+                    return response
+                reason = f"HTTP {response.status_code}"
+            except requests.ConnectionError as e:
+                if attempt == self.retries:
+                    raise
+                reason = str(e)
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            logging.warning(f"Retrying {url} in {delay:.2f}s after {reason} (attempt {attempt + 1} of {self.retries})")
+            time.sleep(delay)
+
     def send_mfa(self, to_number: str) -> dict:
         try:
             url = f"{self.base_url}/mfa/sms"
@@ -1725,9 +1769,8 @@ class SignalWireMFA:
                 "allow_alphas": False,
                 "valid_for": 3600
             }
-            headers = {"Content-Type": "application/json"}
             logging.debug(f"Sending MFA from {self.from_number} to {to_number}")
-            response = requests.post(url, json=payload, auth=(self.project_id, self.token), headers=headers)
+            response = self._post(url, payload)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -1738,9 +1781,8 @@ class SignalWireMFA:
         try:
             verify_url = f"{self.base_url}/mfa/{mfa_id}/verify"
             payload = {"token": token}
-            headers = {"Content-Type": "application/json"}
             logging.debug(f"Verifying MFA with ID {mfa_id} using token {token}")
-            response = requests.post(verify_url, json=payload, auth=(self.project_id, self.token), headers=headers)
+            response = self._post(verify_url, payload)
             response.raise_for_status()
             return response.json()  # Expected format: {"success": true/false, ...}
         except requests.HTTPError as e:
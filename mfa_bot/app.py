@@ -1,7 +1,13 @@
 import os
 import logging
+import sys
+import math
+import random
 import subprocess
+import time
+from concurrent.futures import TimeoutError as FutureTimeoutError
 import requests
+from requests.adapters import HTTPAdapter
 from flask import Flask, request, jsonify
 from dotenv import load_dotenv
 from signalwire.rest import Client as SignalWireClient
@@ -9,18 +15,30 @@ from signalwire_swaig.core import SWAIG, SWAIGArgument
 import re
 import json
 
+from local_mfa import LocalMFA, code_secret_from_env
+from mfa_dispatch import MFADispatcher
+from mfa_ratelimit import rate_limiter_from_env
+from mfa_sessions import call_id_from, session_store_from_env
+# The SWAIG helpers shared by every app live in ../swaig_common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from swaig_common.idempotency import idempotent_swaig
+from swaig_common.log_setup import configure_logging, sample_debug_logs
+from swaig_common.recorder import record_swaig_traffic
+from swaig_common.signatures import cache_swaig_signatures
+
 # =======================
 # Configuration and Setup
 # =======================
 
-logging.basicConfig(level=logging.DEBUG)
-logging.getLogger('werkzeug').setLevel(logging.DEBUG)
-logging.getLogger('signalwire').setLevel(logging.DEBUG)
-
+# LOG_LEVEL and LOG_FORMAT may come from .env, so load it before configuring logging
 load_dotenv()
 
+configure_logging()
+
 app = Flask(__name__)
 app.config['JSONIFY_PRETTYPRINT_REGULAR'] = True
+record_swaig_traffic(app)
+sample_debug_logs(app)
 
 PROJECT_ID = os.getenv("SIGNALWIRE_PROJECT_ID")
 TOKEN = os.getenv("SIGNALWIRE_TOKEN")
@@ -32,6 +50,14 @@ NGROK_PATH = os.getenv("NGROK_PATH")
 HTTP_USERNAME = os.getenv("HTTP_USERNAME")
 HTTP_PASSWORD = os.getenv("HTTP_PASSWORD")
 DEBUG_WEBOOK_URL = os.getenv("DEBUG_WEBOOK_URL")
+# Seconds an MFA code stays valid, at SignalWire and in the session store
+MFA_VALID_FOR = int(os.getenv("MFA_VALID_FOR", 3600))
+# "async" answers send_mfa_code before SignalWire does; "sync" waits for it
+MFA_DISPATCH = os.getenv("MFA_DISPATCH", "sync").lower()
+# Seconds verify_mfa_code waits for a send that is still in progress
+MFA_VERIFY_WAIT = float(os.getenv("MFA_VERIFY_WAIT", 5))
+# "signalwire" sends and checks codes with the SignalWire MFA API; "local" does it here and texts the code
+MFA_ENGINE = os.getenv("MFA_ENGINE", "signalwire").lower()
 
 required_vars = [
     "SIGNALWIRE_PROJECT_ID",
@@ -51,29 +77,71 @@ if missing_vars:
 
 NGROK_URL = f"https://{NGROK_DOMAIN}"
 
-logging.debug(f"SIGNALWIRE_SPACE: {SPACE}")
-logging.debug(f"SIGNALWIRE_FROM_NUMBER: {FROM_NUMBER}")
-logging.debug(f"NGROK_DOMAIN: {NGROK_DOMAIN}")
-logging.debug(f"DEBUG_WEBOOK_URL: {DEBUG_WEBOOK_URL}")
+logging.debug("SIGNALWIRE_SPACE: %s", SPACE)
+logging.debug("SIGNALWIRE_FROM_NUMBER: %s", FROM_NUMBER)
+logging.debug("NGROK_DOMAIN: %s", NGROK_DOMAIN)
+logging.debug("DEBUG_WEBOOK_URL: %s", DEBUG_WEBOOK_URL)
 
 # =======================
 # Helper Classes
 # =======================
 
 class SignalWireMFA:
-    def __init__(self, project_id: str, token: str, space: str, from_number: str):
+    """
+    Sends and verifies MFA codes through the SignalWire REST API.
+
+    All requests share one keep-alive session, so connections to the space
+    are reused instead of opening a new TCP and TLS connection per code.
+    Requests time out, and 5xx responses and connection errors are retried
+    a bounded number of times with jittered exponential backoff.
+    """
+    RETRY_STATUSES = (500, 502, 503, 504)
+
+    def __init__(self, project_id: str, token: str, space: str, from_number: str,
+                 pool_size: int = int(os.getenv("MFA_HTTP_POOL_SIZE", 10)),
+                 connect_timeout: float = float(os.getenv("MFA_HTTP_CONNECT_TIMEOUT", 3.05)),
+                 read_timeout: float = float(os.getenv("MFA_HTTP_READ_TIMEOUT", 10)),
+                 retries: int = int(os.getenv("MFA_HTTP_RETRIES", 2)),
+                 backoff: float = float(os.getenv("MFA_HTTP_BACKOFF", 0.25)),
+                 base_url: str = os.getenv("SIGNALWIRE_MFA_BASE_URL")):
         try:
             self.client = SignalWireClient(project_id, token, signalwire_space_url=f"{space}.signalwire.com")
             self.project_id = project_id
             self.token = token
             self.space = space
             self.from_number = from_number
-            self.base_url = f"https://{space}.signalwire.com/api/relay/rest"
-            logging.debug(f"Initialized SignalWireMFA with from_number: {self.from_number}")
+            # SIGNALWIRE_MFA_BASE_URL points at a stand-in such as mfa_bot/fake_signalwire_mfa.py
+            self.base_url = (base_url or f"https://{space}.signalwire.com/api/relay/rest").rstrip("/")
+            self.timeout = (connect_timeout, read_timeout)
+            self.retries = retries
+            self.backoff = backoff
+            self.session = requests.Session()
+            self.session.auth = (project_id, token)
+            self.session.headers.update({"Content-Type": "application/json"})
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            self.session.mount("https://", adapter)
+            self.session.mount("http://", adapter)
+            logging.debug("Initialized SignalWireMFA with from_number: %s", self.from_number)
         except Exception as e:
-            logging.error(f"Failed to initialize SignalWire Client: {e}")
+            logging.error("Failed to initialize SignalWire Client: %s", e)
             raise
 
+    def _post(self, url: str, payload: dict) -> requests.Response:
+        # Read timeouts are not retried: the code may already have been sent
+        for attempt in range(self.retries + 1):
+            try:
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+                if response.status_code not in self.RETRY_STATUSES or attempt == self.retries:
+                    return response
+                reason = f"HTTP {response.status_code}"
+            except requests.ConnectionError as e:
+                if attempt == self.retries:
+                    raise
+                reason = str(e)
+            delay = random.uniform(0, self.backoff * 2 ** attempt)
+            logging.warning("Retrying %s in %.2fs after %s (attempt %s of %s)", url, delay, reason, attempt + 1, self.retries)
+            time.sleep(delay)
+
     def send_mfa(self, to_number: str) -> dict:
         try:
             url = f"{self.base_url}/mfa/sms"
@@ -84,40 +152,46 @@ class SignalWireMFA:
                 "token_length": 6,
                 "max_attempts": 3,
                 "allow_alphas": False,
-                "valid_for": 3600
+                "valid_for": MFA_VALID_FOR
             }
-            headers = {"Content-Type": "application/json"}
-            logging.debug(f"Sending MFA from {self.from_number} to {to_number}")
-            response = requests.post(url, json=payload, auth=(self.project_id, self.token), headers=headers)
+            logging.debug("Sending MFA from %s to %s", self.from_number, to_number)
+            response = self._post(url, payload)
             response.raise_for_status()
             data = response.json()
-            logging.debug(f"Sent MFA code to {to_number}, Response: {data}")
+            logging.debug("Sent MFA code to %s, Response: %s", to_number, data)
             return data
         except Exception as e:
-            logging.error(f"Error sending MFA code: {e}")
+            logging.error("Error sending MFA code: %s", e)
             raise
 
     def verify_mfa(self, mfa_id: str, token: str) -> dict:
         try:
             verify_url = f"{self.base_url}/mfa/{mfa_id}/verify"
             payload = {"token": token}
-            headers = {"Content-Type": "application/json"}
-            logging.debug(f"Verifying MFA with ID {mfa_id} using token {token}")
-            response = requests.post(verify_url, json=payload, auth=(self.project_id, self.token), headers=headers)
+            logging.debug("Verifying MFA with ID %s", mfa_id)
+            response = self._post(verify_url, payload)
             response.raise_for_status()
             decoded_response = response.json()
-            logging.debug(f"Verification response: {decoded_response}")
+            logging.debug("Verification response: %s", decoded_response)
             return decoded_response
         except Exception as e:
-            logging.error(f"Error during verification: {e}")
+            logging.error("Error during verification: %s", e)
             return {"success": False, "message": "HTTP error during verification."}
 
 # =======================
 # Initialization
 # =======================
 
-mfa_util = SignalWireMFA(PROJECT_ID, TOKEN, SPACE, FROM_NUMBER)
+if MFA_ENGINE == "local":
+    mfa_util = LocalMFA(SignalWireClient(PROJECT_ID, TOKEN, signalwire_space_url=f"{SPACE}.signalwire.com"),
+                        FROM_NUMBER, session_store_from_env(ttl=MFA_VALID_FOR, prefix="mfa:code:"),
+                        valid_for=MFA_VALID_FOR, secret=code_secret_from_env())
+else:
+    mfa_util = SignalWireMFA(PROJECT_ID, TOKEN, SPACE, FROM_NUMBER)
 swaig = SWAIG(app, auth=(HTTP_USERNAME, HTTP_PASSWORD))
+signature_cache = cache_swaig_signatures(app, swaig)
+# A retried send_mfa_code answers from the first send instead of texting again
+idempotent_swaig(app, ["send_mfa_code"])
 
 # =======================
 # Helper Functions
@@ -131,7 +205,15 @@ def is_valid_uuid(uuid_to_test, version=4):
     pattern = regex.get(version)
     return bool(pattern and re.match(pattern, uuid_to_test))
 
-LAST_MFA_ID = None
+def normalize_phone_number(phone_number: str) -> str:
+    """Strip spaces, dots, dashes and parentheses, so "+1 (555) 012-3456" and "+15550123456" are one number"""
+    return re.sub(r"[\s().-]", "", str(phone_number))
+
+# Outstanding MFA verification per call, keyed by the SWAIG call ID
+mfa_sessions = session_store_from_env(ttl=MFA_VALID_FOR)
+mfa_rate_limiter = rate_limiter_from_env()
+mfa_dispatcher = MFADispatcher(workers=int(os.getenv("MFA_DISPATCH_WORKERS", 8)),
+                               max_pending=int(os.getenv("MFA_DISPATCH_QUEUE", 100)))
 
 # =======================
 # Endpoints
@@ -142,19 +224,37 @@ LAST_MFA_ID = None
     to_number=SWAIGArgument("string", "Phone number in E.164 format", required=True)
 )
 def send_mfa_code(to_number: str, meta_data: dict = None, **kwargs) -> dict:
-    global LAST_MFA_ID
-    logging.debug(f"Attempting to send MFA code to {to_number}")
+    call_id = call_id_from(meta_data)
+    to_number = normalize_phone_number(to_number)
+    logging.debug("Attempting to send MFA code to %s for call %s", to_number, call_id)
+    retry_after = mfa_rate_limiter.check(to_number)
+    if retry_after is not None:
+        logging.warning("MFA send to %s throttled for %.0fs", to_number, retry_after)
+        return {"success": False, "message": f"Too many codes requested. Please wait {math.ceil(retry_after)} seconds before asking for another."}, 429
+    if MFA_DISPATCH == "async":
+        mfa_sessions.delete(call_id)
+        if mfa_dispatcher.submit(call_id, deliver_mfa_code, call_id, to_number) is None:
+            return {"success": False, "message": "Too many codes are being sent right now. Please try again shortly."}, 503
+        return {"success": True, "message": "6 digit number on its way"}, 200
+    try:
+        mfa_dispatcher.run(deliver_mfa_code, call_id, to_number)
+        return {"success": True, "message": "6 digit number sent"}, 200
+    except Exception as e:
+        logging.error("Error sending MFA code: %s", e)
+        return {"success": False, "message": "Failed to send MFA code"}, 500
+
+def deliver_mfa_code(call_id: str, to_number: str) -> str:
+    """Send the code through SignalWire and open the call's MFA session"""
     try:
         response = mfa_util.send_mfa(to_number)
         mfa_id = response.get("id")
         if not mfa_id:
             raise ValueError("MFA ID not found in response.")
-        LAST_MFA_ID = mfa_id
-        logging.debug(f"Full send_mfa response: {response}")
-        return {"success": True, "message": "6 digit number sent"}, 200
     except Exception as e:
-        logging.error(f"Error sending MFA code: {e}")
-        return {"success": False, "message": "Failed to send MFA code"}, 500
+        logging.error("Error sending MFA code for call %s: %s", call_id, e)
+        raise
+    mfa_sessions.set(call_id, {"mfa_id": mfa_id, "to_number": to_number})
+    return mfa_id
 
 @swaig.endpoint(
     "Verify an MFA code using token.",
@@ -165,50 +265,65 @@ def verify_mfa_code(token: str, meta_data: dict = None, **kwargs) -> dict:
     Verifies the MFA code using the token and mfa_id.
     The mfa_id will also be returned in the response for the AI agent.
     """
-    global LAST_MFA_ID
-    logging.debug(f"Received token: {token}")
+    call_id = call_id_from(meta_data)
+    logging.debug("Received a code to verify for call %s", call_id)
+
+    pending_send = mfa_dispatcher.pending(call_id)
+    if pending_send:
+        try:
+            pending_send.result(timeout=MFA_VERIFY_WAIT)
+        except FutureTimeoutError:
+            return {"success": False, "message": "The code is still being sent. Please try again in a moment."}, 503
+        except Exception:
+            return {"success": False, "message": "The code could not be sent. Please request a new one."}, 500
 
-    if not LAST_MFA_ID or not is_valid_uuid(LAST_MFA_ID):
-        logging.error("No valid mfa_id stored or send_mfa_code not called first.")
+    session = mfa_sessions.get(call_id)
+    mfa_id = session["mfa_id"] if session else None
+    if not mfa_id or not is_valid_uuid(mfa_id):
+        logging.error("No valid MFA session for call %s; send_mfa_code not called first or expired.", call_id)
         return {"success": False, "message": "No valid MFA session."}, 401
 
     try:
-        logging.debug(f"Using mfa_id: {LAST_MFA_ID} to verify token: {token}")
-        verification_response = mfa_util.verify_mfa(LAST_MFA_ID, token)
-        logging.debug(f"Using mfa_id: {LAST_MFA_ID} for verification with token: {token}")
-        verification_response["mfa_id"] = LAST_MFA_ID
-        logging.debug(f"Verification response: {verification_response}")
+        verification_response = mfa_util.verify_mfa(mfa_id, token)
+        verification_response["mfa_id"] = mfa_id
 
         if verification_response.get("success"):
-      #      logging.debug(f"Returning response to AI agent: {{'success': False, 'message': 'Invalid MFA code. Please try again.', 'mfa_id': '{LAST_MFA_ID}'}}")
-            return {"success": False, "message": "Invalid MFA code. Please try again.", "mfa_id": LAST_MFA_ID}, 401
+            mfa_sessions.delete(call_id)
+            return {"success": True, "message": "MFA verified successfully", "mfa_id": mfa_id}, 200
+        return {"success": False, "message": "Invalid MFA code. Please try again.", "mfa_id": mfa_id}, 401
     except Exception as e:
-        logging.error(f"Error verifying MFA code: {e}")
+        logging.error("Error verifying MFA code: %s", e)
         return {"success": False, "message": "Internal server error occurred during verification."}, 500
 
+@app.route("/metrics", methods=["GET"])
+def mfa_metrics():
+    auth = request.authorization
+    if not auth or (auth.username, auth.password) != (HTTP_USERNAME, HTTP_PASSWORD):
+        return jsonify({"error": "Unauthorized"}), 401, {"WWW-Authenticate": 'Basic realm="metrics"'}
+    return jsonify({"dispatch": MFA_DISPATCH, **mfa_dispatcher.metrics(), "rate_limit": mfa_rate_limiter.metrics(),
+                    "idempotency": app.extensions["swaig_idempotency"].metrics()})
+
 @app.route("/swaig", methods=["POST", "GET"])
 def handle_swaig():
     if request.method == "POST":
         data = request.get_json() or {}
         action = data.get("action")
         function_name = data.get("function")
-        logging.debug(f"Handling request at /swaig with action: {action}, function: {function_name}")
+        logging.debug("Handling request at /swaig with action: %s, function: %s", action, function_name)
 
         if action == "get_signature":
-            signatures = swaig.get_signatures()
             logging.debug("Returning SWAIG signatures.")
-            return jsonify(signatures)
+            return signature_cache.response(data.get("functions") or ())
 
         if not function_name:
             logging.error("Function name not provided.")
             return jsonify({"response": "Function name not provided."}), 400
 
-        logging.debug(f"Delegating to SWAIG handler for function: {function_name}")
+        logging.debug("Delegating to SWAIG handler for function: %s", function_name)
         return swaig.handle_request(data)
     else:
-        signatures = swaig.get_signatures()
         logging.debug("Returning SWAIG signatures via GET.")
-        return jsonify(signatures)
+        return signature_cache.response(request.args.getlist("functions"))
 
 if __name__ == "__main__":
     try:
@@ -222,12 +337,12 @@ if __name__ == "__main__":
 
         ngrok_cmd = [NGROK_PATH, "http", "--domain=" + NGROK_DOMAIN, "8888"]
         ngrok_process = subprocess.Popen(ngrok_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        logging.info(f" * Started ngrok tunnel at {NGROK_URL}")
+        logging.info(" * Started ngrok tunnel at %s", NGROK_URL)
         app.run(host="0.0.0.0", port=8888)
     except subprocess.CalledProcessError as e:
-        logging.error(f"Failed to configure ngrok: {e.stderr.decode().strip()}")
+        logging.error("Failed to configure ngrok: %s", e.stderr.decode().strip())
     except Exception as e:
-        logging.error(f"Error starting ngrok or Flask app: {e}")
+        logging.error("Error starting ngrok or Flask app: %s", e)
     finally:
         if 'ngrok_process' in locals():
             ngrok_process.terminate()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Compare a new connection per MFA request (bare requests.post, as
+SignalWireMFA used to do) against SignalWireMFA's pooled keep-alive session,
+using a local HTTPS stand-in for the SignalWire MFA API.
+
+    python3 bench_mfa_client.py [--requests 300] [--concurrency 1] [--no-tls]
+"""
+import argparse
+import json
+import os
+import ssl
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+# app.py refuses to start without its settings; none of them are used here
+for name in ("SIGNALWIRE_PROJECT_ID", "SIGNALWIRE_TOKEN", "SIGNALWIRE_SPACE", "FROM_NUMBER",
+             "NGROK_AUTH_TOKEN", "NGROK_DOMAIN", "NGROK_PATH", "HTTP_USERNAME", "HTTP_PASSWORD"):
+    os.environ.setdefault(name, "bench")
+
+import logging
+logging.disable(logging.CRITICAL)
+
+from app import SignalWireMFA
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY every
+    # keep-alive response stalls on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.endswith("/verify"):
+            body = {"success": True}
+        else:
+            body = {"id": str(uuid.uuid4()), "success": True}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stand_in(tls):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    cafile = None
+    if tls:
+        directory = tempfile.mkdtemp()
+        cafile, keyfile = os.path.join(directory, "cert.pem"), os.path.join(directory, "key.pem")
+        subprocess.run(["openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes", "-days", "1",
+                        "-subj", "/CN=localhost", "-addext", "subjectAltName=IP:127.0.0.1",
+                        "-keyout", keyfile, "-out", cafile], check=True, capture_output=True)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cafile, keyfile)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    scheme = "https" if tls else "http"
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}/api/relay/rest", cafile
+
+def run(label, send, count, concurrency):
+    latencies = []
+
+    def one(i):
+        start = time.perf_counter()
+        send(i)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(count)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+    print(f"{label:<34}{count / elapsed:>10.1f}{p(0.50):>10.2f}{p(0.95):>10.2f}{p(0.99):>10.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--no-tls", action="store_true", help="Serve plain HTTP instead of HTTPS")
+    args = parser.parse_args()
+
+    server, base_url, cafile = start_stand_in(not args.no_tls)
+    mfa = SignalWireMFA("project", "token", "bench", "+15550000000", pool_size=args.concurrency)
+    mfa.base_url = base_url
+    # REQUESTS_CA_BUNDLE would otherwise replace the stand-in's certificate
+    mfa.session.trust_env = False
+    mfa.session.verify = cafile if cafile else True
+    payload = {"to": "+15551234567", "from": mfa.from_number, "message": "Here is your code: ", "token_length": 6}
+
+    def bare(i):
+        response = requests.post(f"{base_url}/mfa/sms", json=payload, auth=("project", "token"),
+                                 headers={"Content-Type": "application/json"}, verify=cafile if cafile else True)
+        response.raise_for_status()
+
+    print(f"{args.requests} sends, {args.concurrency} concurrent, {'HTTP' if args.no_tls else 'HTTPS'} stand-in")
+    print(f"{'client':<34}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    run("requests.post per call", bare, args.requests, args.concurrency)
+    run("SignalWireMFA pooled session", lambda i: mfa.send_mfa("+15551234567"), args.requests, args.concurrency)
+    server.shutdown()
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+A local stand-in for the SignalWire MFA REST API, for load testing the
+MFA-Bot and dental office apps without sending real SMS.
+
+    python3 fake_signalwire_mfa.py --port 9000 --latency lognormal:120,0.5 --error-rate 0.01 --rate-limit 50
+
+Point an app at it with
+SIGNALWIRE_MFA_BASE_URL=http://127.0.0.1:9000/api/relay/rest
+
+The code sent to a number is always code_for(number), the last digits of a
+seeded hash, so load generators know what to verify with. It can also be
+read back from GET /fake/codes/{id}.
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SMS_PATH = "/api/relay/rest/mfa/sms"
+VERIFY_PATH = re.compile(r"^/api/relay/rest/mfa/([0-9a-fA-F-]{36})/verify$")
+CODE_PATH = re.compile(r"^/fake/codes/([0-9a-fA-F-]{36})$")
+
+def code_for(to_number: str, seed: str = "signalwire", length: int = 6) -> str:
+    digest = int(hashlib.sha256(f"{seed}:{to_number}".encode()).hexdigest(), 16)
+    return str(digest % 10 ** length).zfill(length)
+
+def parse_latency(spec: str):
+    """
+    Response delay sampler in seconds from "fixed:MS", "uniform:MIN,MAX",
+    "normal:MEAN,SD" or "lognormal:MEDIAN,SIGMA" (all in milliseconds
+    except SIGMA).
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",")] if args else []
+    samplers = {
+        "fixed": lambda ms=0: lambda rng: ms,
+        "uniform": lambda low, high: lambda rng: rng.uniform(low, high),
+        "normal": lambda mean, sd: lambda rng: max(0.0, rng.gauss(mean, sd)),
+        "lognormal": lambda median, sigma: lambda rng: rng.lognormvariate(0, sigma) * median,
+    }
+    if kind not in samplers:
+        raise ValueError(f"Unknown latency distribution: {kind}")
+    sample_ms = samplers[kind](*values)
+    return lambda rng: sample_ms(rng) / 1000
+
+class FakeMFAState:
+    """Issued codes, fault settings and a global token bucket for 429 responses"""
+
+    def __init__(self, seed="signalwire", latency="fixed:0", error_rate=0.0, rate_limit=0.0):
+        self.seed = seed
+        self.latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+        self.sessions = {}
+        self.counts = {"sent": 0, "verified": 0, "errors": 0, "rate_limited": 0}
+        self._tokens = rate_limit
+        self._refilled = time.monotonic()
+        self._lock = threading.Lock()
+
+    def admit(self) -> bool:
+        if not self.rate_limit:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+            self._refilled = now
+            admitted = self._tokens >= 1
+            if admitted:
+                self._tokens -= 1
+        if not admitted:
+            self.count("rate_limited")
+        return admitted
+
+    def fault(self) -> bool:
+        with self._lock:
+            failed = self.rng.random() < self.error_rate
+        if failed:
+            self.count("errors")
+        return failed
+
+    def count(self, name: str) -> None:
+        with self._lock:
+            self.counts[name] += 1
+
+    def delay(self) -> float:
+        with self._lock:
+            return self.latency(self.rng)
+
+class FakeMFAHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    state: FakeMFAState = None
+
+    def do_POST(self):
+        body = self.read_json()
+        time.sleep(self.state.delay())
+        if not self.state.admit():
+            return self.reply(429, {"errors": [{"code": "rate_limited", "message": "Too Many Requests"}]},
+                              {"Retry-After": "1"})
+        if self.state.fault():
+            return self.reply(503, {"errors": [{"code": "unavailable", "message": "Injected failure"}]})
+
+        if self.path == SMS_PATH:
+            return self.send_code(body)
+        match = VERIFY_PATH.match(self.path)
+        if match:
+            return self.verify_code(match.group(1), body)
+        self.reply(404, {"errors": [{"code": "not_found", "message": self.path}]})
+
+    def do_GET(self):
+        match = CODE_PATH.match(self.path)
+        session = self.state.sessions.get(match.group(1)) if match else None
+        if session is None:
+            return self.reply(404, {"errors": [{"code": "not_found", "message": self.path}]})
+        self.reply(200, {"id": match.group(1), "to": session["to"], "code": session["code"]})
+
+    def send_code(self, body):
+        to_number = body.get("to")
+        if not to_number:
+            return self.reply(422, {"errors": [{"code": "missing_to", "message": "to is required"}]})
+        mfa_id = str(uuid.uuid4())
+        self.state.sessions[mfa_id] = {
+            "to": to_number,
+            "code": code_for(to_number, self.state.seed, int(body.get("token_length", 6))),
+            "attempts_left": int(body.get("max_attempts", 3)),
+            "expires_at": time.monotonic() + int(body.get("valid_for", 3600))
+        }
+        self.state.count("sent")
+        self.reply(200, {"id": mfa_id, "success": True, "to": to_number, "channel": "sms"})
+
+    def verify_code(self, mfa_id, body):
+        session = self.state.sessions.get(mfa_id)
+        if session is None or session["expires_at"] < time.monotonic() or session["attempts_left"] <= 0:
+            return self.reply(200, {"success": False})
+        if body.get("token") == session["code"]:
+            del self.state.sessions[mfa_id]
+            self.state.count("verified")
+            return self.reply(200, {"success": True})
+        session["attempts_left"] -= 1
+        self.reply(200, {"success": False})
+
+    def read_json(self):
+        data = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        try:
+            return json.loads(data) if data else {}
+        except ValueError:
+            return {}
+
+    def reply(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(host="127.0.0.1", port=9000, **settings):
+    """A ThreadingHTTPServer serving the fake API; call serve_forever() on it"""
+    handler = type("BoundFakeMFAHandler", (FakeMFAHandler,), {"state": FakeMFAState(**settings)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--seed", default="signalwire", help="Seed for codes, latency and injected errors")
+    parser.add_argument("--latency", default="fixed:0",
+                        help="fixed:MS, uniform:MIN,MAX, normal:MEAN,SD or lognormal:MEDIAN,SIGMA (default fixed:0)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--rate-limit", type=float, default=0.0,
+                        help="Requests per second before answering 429 (default unlimited)")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, seed=args.seed, latency=args.latency,
+                         error_rate=args.error_rate, rate_limit=args.rate_limit)
+    print(f"Fake SignalWire MFA API at http://{args.host}:{args.port}/api/relay/rest")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        state = server.RequestHandlerClass.state
+        print(f"\n{json.dumps(state.counts)}")
+
+if __name__ == "__main__":
+    main()
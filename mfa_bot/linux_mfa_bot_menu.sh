@@ -51,7 +51,7 @@ build_image() {
   echo "============================================"
   echo "Building Docker image 'mfa-bot-image'..."
   echo "============================================"
-  if ! docker build -t "mfa-bot-image" .; then
+  if ! docker build -t "mfa-bot-image" -f Dockerfile ..; then
     echo "Docker build failed. Check your Dockerfile and try again."
     read -rp "Press Enter to continue..."
     exit 1
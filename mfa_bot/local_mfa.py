@@ -0,0 +1,74 @@
+import hashlib
+import hmac
+import logging
+import os
+import secrets
+import threading
+import time
+import uuid
+
+class LocalMFA:
+    """
+    Generates and checks MFA codes in this process instead of at SignalWire.
+
+    Codes come from the `secrets` CSPRNG and are texted through the
+    SignalWire messaging API. Only a salted, keyed hash of each code is
+    kept, with its expiry and remaining attempts, in an MFA session store
+    keyed by a new MFA ID. Verifying is a constant-time local comparison,
+    so it needs no network round trip. `send_mfa` and `verify_mfa` answer
+    like SignalWireMFA, so the SWAIG functions work with either.
+    """
+
+    def __init__(self, client, from_number: str, store, valid_for: int = 3600,
+                 token_length: int = 6, max_attempts: int = 3, secret: bytes = None):
+        self.client = client
+        self.from_number = from_number
+        self.store = store
+        self.valid_for = valid_for
+        self.token_length = token_length
+        self.max_attempts = max_attempts
+        # Workers sharing a Redis store must share the secret (MFA_CODE_SECRET)
+        self.secret = secret or secrets.token_bytes(32)
+        self._lock = threading.Lock()
+
+    def _hash(self, salt: bytes, token: str) -> str:
+        return hashlib.blake2b(token.encode(), key=self.secret, salt=salt, digest_size=32).hexdigest()
+
+    def send_mfa(self, to_number: str) -> dict:
+        mfa_id = str(uuid.uuid4())
+        code = str(secrets.randbelow(10 ** self.token_length)).zfill(self.token_length)
+        salt = secrets.token_bytes(16)
+        self.store.set(mfa_id, {
+            "to": to_number,
+            "salt": salt.hex(),
+            "hash": self._hash(salt, code),
+            "attempts_left": self.max_attempts,
+            "expires_at": time.time() + self.valid_for
+        }, ttl=self.valid_for)
+        try:
+            logging.debug("Texting MFA code from %s to %s", self.from_number, to_number)
+            self.client.messages.create(from_=self.from_number, to=to_number, body=f"Here is your code: {code}")
+        except Exception as e:
+            self.store.delete(mfa_id)
+            logging.error("Error sending MFA code: %s", e)
+            raise
+        return {"id": mfa_id, "success": True, "to": to_number, "channel": "sms"}
+
+    def verify_mfa(self, mfa_id: str, token: str) -> dict:
+        with self._lock:
+            record = self.store.get(mfa_id)
+            remaining = record["expires_at"] - time.time() if record else 0
+            if remaining <= 0 or record["attempts_left"] <= 0:
+                logging.debug("MFA %s is unknown, expired or out of attempts", mfa_id)
+                return {"success": False}
+            if hmac.compare_digest(self._hash(bytes.fromhex(record["salt"]), str(token)), record["hash"]):
+                self.store.delete(mfa_id)
+                return {"success": True}
+            record["attempts_left"] -= 1
+            self.store.set(mfa_id, record, ttl=max(1, remaining))
+            return {"success": False}
+
+def code_secret_from_env() -> bytes:
+    """MFA_CODE_SECRET keys the code hashes; without it each process picks its own"""
+    secret = os.getenv("MFA_CODE_SECRET")
+    return hashlib.sha256(secret.encode()).digest() if secret else None
@@ -0,0 +1,96 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+class MFADispatcher:
+    """
+    Runs MFA sends and keeps their metrics.
+
+    `submit` queues a send on a bounded worker pool and returns its Future
+    at once, or None when `max_pending` sends are already queued or running.
+    `run` sends inline. Both record send latency and failures, and the
+    Future of each call's latest queued send can be found with `pending`.
+    """
+
+    def __init__(self, workers: int = 8, max_pending: int = 100, latency_window: int = 1000):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.sent = 0
+        self.failed = 0
+        self.rejected = 0
+        self._queued = 0
+        self._in_flight = 0
+        self._latencies = deque(maxlen=latency_window)
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="mfa-send")
+
+    def submit(self, key: str, send: Callable, *args) -> Optional[Future]:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            logging.warning("MFA send queue full; rejected send for %s", key)
+            return None
+        with self._lock:
+            self._queued += 1
+            self._in_flight += 1
+        future = self._executor.submit(self._dequeue_and_run, send, *args)
+        self._pending[key] = future
+        future.add_done_callback(lambda done: self._finish(key, done))
+        return future
+
+    def run(self, send: Callable, *args):
+        start = time.perf_counter()
+        try:
+            result = send(*args)
+        except Exception:
+            self._record(start, ok=False)
+            raise
+        self._record(start, ok=True)
+        return result
+
+    def pending(self, key: str) -> Optional[Future]:
+        return self._pending.get(key)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            queued = self._queued
+            in_flight = self._in_flight
+        percentile = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 2) if latencies else None
+        return {
+            "sent": self.sent,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "queue_depth": queued,
+            "in_flight": in_flight,
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "send_latency_ms": {"p50": percentile(0.50), "p95": percentile(0.95), "p99": percentile(0.99),
+                                "samples": len(latencies)}
+        }
+
+    def _dequeue_and_run(self, send: Callable, *args):
+        with self._lock:
+            self._queued -= 1
+        return self.run(send, *args)
+
+    def _finish(self, key: str, future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+        # A newer send for the same call may have replaced this one
+        if self._pending.get(key) is future:
+            del self._pending[key]
+
+    def _record(self, start: float, ok: bool) -> None:
+        with self._lock:
+            self._latencies.append((time.perf_counter() - start) * 1000)
+            if ok:
+                self.sent += 1
+            else:
+                self.failed += 1
@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+
+class TokenBucketLimiter:
+    """
+    Token buckets for MFA sends: one per destination number and one global.
+
+    A send must find a token in both buckets, and takes one from each only
+    when both have one. A destination bucket that has been idle long enough
+    to refill completely is the same as no bucket, so such buckets are
+    dropped lazily from the least recently used end; `max_buckets` caps
+    memory even under a flood of distinct numbers.
+    """
+
+    def __init__(self, per_destination: int = 3, per_destination_window: float = 600,
+                 global_limit: int = 50, global_window: float = 1, max_buckets: int = 100000):
+        self.destination_burst = per_destination
+        self.destination_rate = per_destination / per_destination_window
+        self.global_burst = global_limit
+        self.global_rate = global_limit / global_window
+        self.max_buckets = max_buckets
+        self.rejected = {"destination": 0, "global": 0}
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        self._global = (float(global_limit), time.monotonic())
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def check(self, destination: str) -> Optional[float]:
+        """Take a send token for `destination`; returns None, or the seconds to wait when throttled"""
+        now = time.monotonic()
+        with self._lock:
+            self._sweep(now)
+            tokens = self._refill(self._buckets.get(destination), self.destination_rate, self.destination_burst, now)
+            if tokens < 1:
+                self.rejected["destination"] += 1
+                return (1 - tokens) / self.destination_rate
+            global_tokens = self._refill(self._global, self.global_rate, self.global_burst, now)
+            if global_tokens < 1:
+                self.rejected["global"] += 1
+                return (1 - global_tokens) / self.global_rate
+            self._global = (global_tokens - 1, now)
+            self._buckets[destination] = (tokens - 1, now)
+            self._buckets.move_to_end(destination)
+            return None
+
+    def metrics(self) -> dict:
+        return {"rejected": dict(self.rejected), "tracked_destinations": len(self._buckets)}
+
+    @staticmethod
+    def _refill(bucket: Optional[Tuple[float, float]], rate: float, burst: int, now: float) -> float:
+        if bucket is None:
+            return float(burst)
+        tokens, updated = bucket
+        return min(burst, tokens + (now - updated) * rate)
+
+    def _sweep(self, now: float) -> None:
+        # Buckets are ordered by last use; any idle for a full refill period are full
+        refill_seconds = self.destination_burst / self.destination_rate
+        while self._buckets:
+            destination, (_, updated) = next(iter(self._buckets.items()))
+            if now - updated < refill_seconds and len(self._buckets) < self.max_buckets:
+                break
+            del self._buckets[destination]
+
+# Both buckets are checked and taken from in one atomic step
+_REDIS_TAKE = """
+local function refill(key, rate, burst, now)
+    local state = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(state[1]) or burst
+    local ts = tonumber(state[2]) or now
+    return math.min(burst, tokens + (now - ts) * rate)
+end
+local now = tonumber(ARGV[5])
+local rates = {tonumber(ARGV[1]), tonumber(ARGV[3])}
+local bursts = {tonumber(ARGV[2]), tonumber(ARGV[4])}
+local tokens = {}
+for i = 1, 2 do
+    tokens[i] = refill(KEYS[i], rates[i], bursts[i], now)
+    if tokens[i] < 1 then
+        return {i, tostring((1 - tokens[i]) / rates[i])}
+    end
+end
+for i = 1, 2 do
+    redis.call('HSET', KEYS[i], 'tokens', tokens[i] - 1, 'ts', now)
+    redis.call('PEXPIRE', KEYS[i], math.ceil((bursts[i] - tokens[i] + 1) / rates[i] * 1000))
+end
+return {0, '0'}
+"""
+
+class RedisTokenBucketLimiter(TokenBucketLimiter):
+    """The same buckets in Redis, shared by every worker process; Redis expires idle buckets"""
+
+    def __init__(self, url: str, prefix: str = "mfa:ratelimit:", **limits):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("MFA_RATE_LIMIT_BACKEND=redis needs the redis package: pip install redis")
+        super().__init__(**limits)
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+        self._take = self._redis.register_script(_REDIS_TAKE)
+
+    def check(self, destination: str) -> Optional[float]:
+        bucket, wait = self._take(
+            keys=[self.prefix + destination, self.prefix + "*global*"],
+            args=[self.destination_rate, self.destination_burst, self.global_rate, self.global_burst, time.time()])
+        if bucket == 0:
+            return None
+        with self._lock:
+            self.rejected["destination" if bucket == 1 else "global"] += 1
+        return float(wait)
+
+def rate_limiter_from_env() -> TokenBucketLimiter:
+    """
+    MFA_SENDS_PER_NUMBER sends per MFA_SENDS_PER_NUMBER_WINDOW seconds to one
+    number, and MFA_SENDS_GLOBAL per MFA_SENDS_GLOBAL_WINDOW seconds in total.
+    MFA_RATE_LIMIT_BACKEND=redis shares the limits across worker processes.
+    """
+    limits = {
+        "per_destination": int(os.getenv("MFA_SENDS_PER_NUMBER", 3)),
+        "per_destination_window": float(os.getenv("MFA_SENDS_PER_NUMBER_WINDOW", 600)),
+        "global_limit": int(os.getenv("MFA_SENDS_GLOBAL", 50)),
+        "global_window": float(os.getenv("MFA_SENDS_GLOBAL_WINDOW", 1)),
+    }
+    if os.getenv("MFA_RATE_LIMIT_BACKEND", "memory").lower() == "redis":
+        url = os.getenv("MFA_RATE_LIMIT_REDIS_URL", os.getenv("MFA_SESSION_REDIS_URL", "redis://localhost:6379/0"))
+        logging.info("Rate limiting MFA sends through Redis at %s", url)
+        return RedisTokenBucketLimiter(url, **limits)
+    return TokenBucketLimiter(**limits)
@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+DEFAULT_CALL_ID = "default"
+
+def call_id_from(meta_data: Optional[dict]) -> str:
+    """
+    The SignalWire call ID for a SWAIG request. SWAIG sends it at the top
+    level of the request, which signalwire_swaig passes on as
+    meta_data["fullrequest"]. Requests without one (e.g. from swaig_cli)
+    share a single default session.
+    """
+    meta_data = meta_data or {}
+    call_id = meta_data.get("call_id") or (meta_data.get("fullrequest") or {}).get("call_id")
+    if not call_id:
+        logging.warning("No call_id in SWAIG request; using the default MFA session")
+        return DEFAULT_CALL_ID
+    return str(call_id)
+
+class MemorySessionStore:
+    """
+    MFA sessions for this process, keyed by call ID.
+
+    Sessions expire after `ttl` seconds and are dropped lazily: expired
+    sessions are skipped on read and swept from the oldest end on write.
+    Beyond `max_sessions` the least recently written session is evicted,
+    so memory stays bounded however many calls never verify.
+    """
+
+    def __init__(self, ttl: float = 3600, max_sessions: int = 10000):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.evicted = 0
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def set(self, call_id: str, session: dict, ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._sessions[call_id] = (now + (ttl or self.ttl), session)
+            self._sessions.move_to_end(call_id)
+            self._sweep(now)
+
+    def get(self, call_id: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._sessions.get(call_id)
+            if entry is None:
+                return None
+            expires_at, session = entry
+            if expires_at <= time.monotonic():
+                del self._sessions[call_id]
+                return None
+            return session
+
+    def delete(self, call_id: str) -> None:
+        with self._lock:
+            self._sessions.pop(call_id, None)
+
+    def _sweep(self, now: float) -> None:
+        while self._sessions:
+            call_id, (expires_at, _) = next(iter(self._sessions.items()))
+            if expires_at > now and len(self._sessions) <= self.max_sessions:
+                break
+            del self._sessions[call_id]
+            if expires_at > now:
+                self.evicted += 1
+
+class RedisSessionStore:
+    """MFA sessions in Redis, so every worker process sees the same calls; Redis expires them"""
+
+    def __init__(self, url: str, ttl: float = 3600, prefix: str = "mfa:session:"):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("MFA_SESSION_BACKEND=redis needs the redis package: pip install redis")
+        self.ttl = ttl
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+
+    def set(self, call_id: str, session: dict, ttl: Optional[float] = None) -> None:
+        self._redis.set(self.prefix + call_id, json.dumps(session), ex=int(ttl or self.ttl))
+
+    def get(self, call_id: str) -> Optional[dict]:
+        value = self._redis.get(self.prefix + call_id)
+        return json.loads(value) if value else None
+
+    def delete(self, call_id: str) -> None:
+        self._redis.delete(self.prefix + call_id)
+
+def session_store_from_env(ttl: float, prefix: str = "mfa:session:"):
+    """MFA_SESSION_BACKEND=redis shares sessions through MFA_SESSION_REDIS_URL; the default is in memory"""
+    if os.getenv("MFA_SESSION_BACKEND", "memory").lower() == "redis":
+        url = os.getenv("MFA_SESSION_REDIS_URL", "redis://localhost:6379/0")
+        logging.info("Storing MFA sessions in Redis at %s", url)
+        return RedisSessionStore(url, ttl=ttl, prefix=prefix)
+    return MemorySessionStore(ttl=ttl, max_sessions=int(os.getenv("MFA_SESSION_MAX", 10000)))
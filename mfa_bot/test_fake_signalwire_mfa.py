@@ -0,0 +1,58 @@
+import threading
+
+import pytest
+
+from test_mfa_sessions import swaig_call
+
+import app
+from fake_signalwire_mfa import code_for, make_server
+from mfa_dispatch import MFADispatcher
+from mfa_ratelimit import TokenBucketLimiter
+from mfa_sessions import MemorySessionStore
+from swaig_common.idempotency import SWAIGIdempotency
+
+@pytest.fixture
+def fake_signalwire(monkeypatch):
+    servers = []
+
+    def start(**settings):
+        server = make_server(port=0, **settings)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/api/relay/rest"
+        mfa = app.SignalWireMFA("project", "token", "space", "+15550000000", retries=0, base_url=base_url)
+        monkeypatch.setattr(app, "mfa_util", mfa)
+        monkeypatch.setattr(app, "mfa_sessions", MemorySessionStore(ttl=60))
+        monkeypatch.setattr(app, "mfa_rate_limiter", TokenBucketLimiter())
+        monkeypatch.setitem(app.app.extensions, "swaig_idempotency", SWAIGIdempotency(["send_mfa_code"]))
+        monkeypatch.setattr(app, "mfa_dispatcher", MFADispatcher())
+        monkeypatch.setattr(app, "MFA_DISPATCH", "sync")
+        return server.RequestHandlerClass.state
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+def test_full_swaig_path_against_the_fake(fake_signalwire):
+    state = fake_signalwire()
+    client = app.app.test_client()
+    assert swaig_call(client, "call-1", "send_mfa_code", to_number="+15550123456")["success"] is True
+    assert swaig_call(client, "call-1", "verify_mfa_code", token="000000")["success"] is False
+    assert swaig_call(client, "call-1", "verify_mfa_code", token=code_for("+15550123456"))["success"] is True
+    assert (state.counts["sent"], state.counts["verified"]) == (1, 1)
+
+def test_codes_are_deterministic_per_seed():
+    assert code_for("+15550123456") == code_for("+15550123456")
+    assert code_for("+15550123456", seed="a") != code_for("+15550123456", seed="b")
+    assert len(code_for("+15550123456", length=8)) == 8
+
+def test_injected_errors_and_rate_limits(fake_signalwire):
+    state = fake_signalwire(error_rate=1.0)
+    client = app.app.test_client()
+    assert swaig_call(client, "call-1", "send_mfa_code", to_number="+15550123456")["success"] is False
+    assert state.counts["errors"] == 1
+
+    state = fake_signalwire(rate_limit=2)
+    for i in range(4):
+        swaig_call(client, f"call-{i}", "send_mfa_code", to_number=f"+1555000000{i}")
+    assert (state.counts["sent"], state.counts["rate_limited"]) == (2, 2)
@@ -0,0 +1,70 @@
+import re
+import time
+
+from test_mfa_sessions import swaig_call
+
+import app
+from local_mfa import LocalMFA
+from mfa_dispatch import MFADispatcher
+from mfa_ratelimit import TokenBucketLimiter
+from mfa_sessions import MemorySessionStore
+from swaig_common.idempotency import SWAIGIdempotency
+
+class FakeMessages:
+    """Stands in for SignalWireClient.messages and keeps each text sent"""
+
+    def __init__(self):
+        self.sent = []
+        self.messages = self
+
+    def create(self, from_, to, body):
+        self.sent.append({"from": from_, "to": to, "body": body})
+
+    def code_for(self, to_number):
+        last = [m for m in self.sent if m["to"] == to_number][-1]
+        return re.search(r"\d{6}", last["body"]).group()
+
+def local_mfa(**settings):
+    return LocalMFA(FakeMessages(), "+15550000000", MemorySessionStore(ttl=60), **settings)
+
+def test_only_a_salted_hash_is_stored():
+    mfa = local_mfa()
+    mfa_id = mfa.send_mfa("+15550123456")["id"]
+    code = mfa.client.code_for("+15550123456")
+    record = mfa.store.get(mfa_id)
+    assert code not in str(record)
+    assert record["attempts_left"] == 3
+
+    other_id = mfa.send_mfa("+15550123456")["id"]
+    assert mfa.store.get(other_id)["salt"] != record["salt"]
+
+def test_verify_checks_attempts_and_expiry():
+    mfa = local_mfa(max_attempts=2)
+    mfa_id = mfa.send_mfa("+15550123456")["id"]
+    code = mfa.client.code_for("+15550123456")
+    wrong = str((int(code) + 1) % 10 ** 6).zfill(6)
+    assert mfa.verify_mfa(mfa_id, wrong) == {"success": False}
+    assert mfa.verify_mfa(mfa_id, wrong) == {"success": False}
+    assert mfa.verify_mfa(mfa_id, code) == {"success": False}
+
+    mfa = local_mfa(valid_for=0.05)
+    mfa_id = mfa.send_mfa("+15550123456")["id"]
+    time.sleep(0.06)
+    assert mfa.verify_mfa(mfa_id, mfa.client.code_for("+15550123456")) == {"success": False}
+
+def test_swaig_path_with_local_codes(monkeypatch):
+    mfa = local_mfa()
+    monkeypatch.setattr(app, "mfa_util", mfa)
+    monkeypatch.setattr(app, "mfa_sessions", MemorySessionStore(ttl=60))
+    monkeypatch.setattr(app, "mfa_dispatcher", MFADispatcher())
+    monkeypatch.setattr(app, "mfa_rate_limiter", TokenBucketLimiter())
+    monkeypatch.setitem(app.app.extensions, "swaig_idempotency", SWAIGIdempotency(["send_mfa_code"]))
+    monkeypatch.setattr(app, "MFA_DISPATCH", "sync")
+    client = app.app.test_client()
+
+    assert swaig_call(client, "call-1", "send_mfa_code", to_number="+15550123456")["success"] is True
+    code = mfa.client.code_for("+15550123456")
+    verified = swaig_call(client, "call-1", "verify_mfa_code", token=code)
+    assert verified["success"] is True
+    assert verified["mfa_id"]
+    assert swaig_call(client, "call-1", "verify_mfa_code", token=code)["success"] is False
@@ -0,0 +1,72 @@
+import threading
+import time
+
+from test_mfa_sessions import FakeSignalWireMFA, swaig_call
+
+import app
+from mfa_dispatch import MFADispatcher
+from mfa_ratelimit import TokenBucketLimiter
+from mfa_sessions import MemorySessionStore
+from swaig_common.idempotency import SWAIGIdempotency
+
+class SlowSignalWireMFA(FakeSignalWireMFA):
+    """Holds every send until `release` is set"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def send_mfa(self, to_number):
+        self.release.wait(5)
+        return super().send_mfa(to_number)
+
+def use_async_dispatch(monkeypatch, fake, max_pending=10):
+    monkeypatch.setattr(app, "mfa_util", fake)
+    monkeypatch.setattr(app, "mfa_sessions", MemorySessionStore(ttl=60))
+    monkeypatch.setattr(app, "mfa_rate_limiter", TokenBucketLimiter())
+    monkeypatch.setitem(app.app.extensions, "swaig_idempotency", SWAIGIdempotency(["send_mfa_code"]))
+    monkeypatch.setattr(app, "mfa_dispatcher", MFADispatcher(workers=2, max_pending=max_pending))
+    monkeypatch.setattr(app, "MFA_DISPATCH", "async")
+
+def test_send_returns_before_signalwire_and_verify_waits_for_it(monkeypatch):
+    fake = SlowSignalWireMFA()
+    use_async_dispatch(monkeypatch, fake)
+    client = app.app.test_client()
+
+    start = time.perf_counter()
+    sent = swaig_call(client, "call-1", "send_mfa_code", to_number="+15550123456")
+    assert sent["message"] == "6 digit number on its way"
+    assert time.perf_counter() - start < 1
+
+    threading.Timer(0.1, fake.release.set).start()
+    assert swaig_call(client, "call-1", "verify_mfa_code", token="123456")["success"] is True
+    assert app.mfa_dispatcher.metrics()["sent"] == 1
+
+def test_full_queue_rejects_without_waiting(monkeypatch):
+    fake = SlowSignalWireMFA()
+    use_async_dispatch(monkeypatch, fake, max_pending=2)
+    client = app.app.test_client()
+
+    for i in range(2):
+        assert swaig_call(client, f"call-{i}", "send_mfa_code", to_number=f"+1555000000{i}")["success"] is True
+    rejected = swaig_call(client, "call-2", "send_mfa_code", to_number="+15550000002")
+    assert rejected["success"] is False
+
+    metrics = app.mfa_dispatcher.metrics()
+    assert (metrics["rejected"], metrics["in_flight"]) == (1, 2)
+    fake.release.set()
+
+def test_failed_send_is_counted_and_reported_on_verify(monkeypatch):
+    fake = FakeSignalWireMFA()
+    fake.send_mfa = lambda to_number: {"success": False}
+    use_async_dispatch(monkeypatch, fake)
+    client = app.app.test_client()
+
+    swaig_call(client, "call-1", "send_mfa_code", to_number="+15550123456")
+    verified = swaig_call(client, "call-1", "verify_mfa_code", token="123456")
+    assert verified["success"] is False
+    assert app.mfa_dispatcher.metrics()["failed"] == 1
+
+    response = client.get("/metrics", headers={"Authorization": "Basic dGVzdDp0ZXN0"})
+    assert response.get_json()["failed"] == 1
+    assert client.get("/metrics").status_code == 401
@@ -0,0 +1,70 @@
+import time
+
+from test_mfa_sessions import FakeSignalWireMFA, swaig_call
+
+import app
+from mfa_dispatch import MFADispatcher
+from mfa_ratelimit import TokenBucketLimiter
+from mfa_sessions import MemorySessionStore
+from swaig_common.idempotency import SWAIGIdempotency
+
+class CountingSignalWireMFA(FakeSignalWireMFA):
+    def __init__(self):
+        super().__init__()
+        self.sends = 0
+
+    def send_mfa(self, to_number):
+        self.sends += 1
+        return super().send_mfa(to_number)
+
+def test_per_destination_and_global_buckets():
+    limiter = TokenBucketLimiter(per_destination=2, global_limit=3, global_window=60)
+    assert limiter.check("+15550000001") is None
+    assert limiter.check("+15550000001") is None
+    assert limiter.check("+15550000001") > 0
+    assert limiter.check("+15550000002") is None
+    assert limiter.check("+15550000003") > 0
+    assert limiter.metrics()["rejected"] == {"destination": 1, "global": 1}
+
+def test_refilled_buckets_are_dropped_and_memory_stays_bounded():
+    limiter = TokenBucketLimiter(per_destination=1, per_destination_window=0.05, global_limit=1000, max_buckets=100)
+    for i in range(500):
+        limiter.check(f"+1555{i:07d}")
+    assert len(limiter) <= 100
+    time.sleep(0.06)
+    assert limiter.check("+15550000000") is None
+    assert len(limiter) == 1
+
+def test_throttled_send_never_reaches_signalwire(monkeypatch):
+    fake = CountingSignalWireMFA()
+    monkeypatch.setattr(app, "mfa_util", fake)
+    monkeypatch.setattr(app, "mfa_sessions", MemorySessionStore(ttl=60))
+    monkeypatch.setattr(app, "mfa_dispatcher", MFADispatcher())
+    monkeypatch.setattr(app, "mfa_rate_limiter", TokenBucketLimiter(per_destination=1))
+    monkeypatch.setitem(app.app.extensions, "swaig_idempotency", SWAIGIdempotency(["send_mfa_code"]))
+    monkeypatch.setattr(app, "MFA_DISPATCH", "sync")
+    client = app.app.test_client()
+
+    assert swaig_call(client, "call-1", "send_mfa_code", to_number="+15550123456")["success"] is True
+    throttled = swaig_call(client, "call-2", "send_mfa_code", to_number="+15550123456")
+    assert throttled["success"] is False
+    assert "Please wait" in throttled["message"]
+    assert fake.sends == 1
+
+    response = client.get("/metrics", headers={"Authorization": "Basic dGVzdDp0ZXN0"})
+    assert response.get_json()["rate_limit"]["rejected"]["destination"] == 1
+
+def test_formatting_does_not_get_a_number_a_new_bucket(monkeypatch):
+    fake = CountingSignalWireMFA()
+    monkeypatch.setattr(app, "mfa_util", fake)
+    monkeypatch.setattr(app, "mfa_sessions", MemorySessionStore(ttl=60))
+    monkeypatch.setattr(app, "mfa_dispatcher", MFADispatcher())
+    monkeypatch.setattr(app, "mfa_rate_limiter", TokenBucketLimiter(per_destination=1))
+    monkeypatch.setitem(app.app.extensions, "swaig_idempotency", SWAIGIdempotency(["send_mfa_code"]))
+    monkeypatch.setattr(app, "MFA_DISPATCH", "sync")
+    client = app.app.test_client()
+
+    assert swaig_call(client, "call-1", "send_mfa_code", to_number="+15550123456")["success"] is True
+    for i, spelling in enumerate(("+1 555 012 3456", "+1 (555) 012-3456", "+1.555.012.3456")):
+        assert swaig_call(client, f"call-{i + 2}", "send_mfa_code", to_number=spelling)["success"] is False
+    assert fake.sends == 1
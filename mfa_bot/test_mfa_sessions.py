@@ -0,0 +1,92 @@
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# app.py refuses to import without its settings; the tests never reach SignalWire
+for name in ("SIGNALWIRE_PROJECT_ID", "SIGNALWIRE_TOKEN", "SIGNALWIRE_SPACE", "FROM_NUMBER",
+             "NGROK_AUTH_TOKEN", "NGROK_DOMAIN", "NGROK_PATH", "HTTP_USERNAME", "HTTP_PASSWORD"):
+    os.environ.setdefault(name, "test")
+
+import app
+from mfa_sessions import MemorySessionStore, call_id_from
+from mfa_ratelimit import TokenBucketLimiter
+from swaig_common.idempotency import SWAIGIdempotency
+
+CALLS = 300
+
+class FakeSignalWireMFA:
+    """Issues one code per send and checks it on verify, with a little latency so calls overlap"""
+
+    def __init__(self):
+        self.codes = {}
+
+    def send_mfa(self, to_number):
+        time.sleep(random.uniform(0, 0.005))
+        mfa_id = str(uuid.uuid4())
+        self.codes[mfa_id] = to_number[-6:]
+        return {"id": mfa_id, "success": True}
+
+    def verify_mfa(self, mfa_id, token):
+        time.sleep(random.uniform(0, 0.005))
+        return {"success": self.codes.get(mfa_id) == token}
+
+def swaig_call(client, call_id, function, **arguments):
+    response = client.post("/swaig", json={
+        "function": function,
+        "call_id": call_id,
+        "argument": {"parsed": [arguments]}
+    }, headers={"Authorization": "Basic dGVzdDp0ZXN0"})
+    return response.get_json()["response"]
+
+def test_hundreds_of_overlapping_calls_verify_their_own_codes(monkeypatch):
+    monkeypatch.setattr(app, "mfa_util", FakeSignalWireMFA())
+    monkeypatch.setattr(app, "mfa_sessions", MemorySessionStore(ttl=60))
+    monkeypatch.setattr(app, "mfa_rate_limiter", TokenBucketLimiter(global_limit=CALLS))
+    monkeypatch.setitem(app.app.extensions, "swaig_idempotency", SWAIGIdempotency(["send_mfa_code"]))
+    all_sent = threading.Barrier(CALLS)
+
+    def caller(i):
+        client = app.app.test_client()
+        call_id = f"call-{i}"
+        to_number = f"+1555{i:07d}"
+        sent = swaig_call(client, call_id, "send_mfa_code", to_number=to_number)
+        # Every call sends before any call verifies, so a shared "last ID" would fail all but one
+        all_sent.wait()
+        verified = swaig_call(client, call_id, "verify_mfa_code", token=to_number[-6:])
+        return sent["success"], verified["success"]
+
+    with ThreadPoolExecutor(max_workers=CALLS) as pool:
+        results = list(pool.map(caller, range(CALLS)))
+
+    assert results == [(True, True)] * CALLS
+    assert len(app.mfa_sessions) == 0
+
+def test_wrong_code_keeps_the_session_for_another_try(monkeypatch):
+    monkeypatch.setattr(app, "mfa_util", FakeSignalWireMFA())
+    monkeypatch.setattr(app, "mfa_sessions", MemorySessionStore(ttl=60))
+    monkeypatch.setattr(app, "mfa_rate_limiter", TokenBucketLimiter(global_limit=CALLS))
+    monkeypatch.setitem(app.app.extensions, "swaig_idempotency", SWAIGIdempotency(["send_mfa_code"]))
+    client = app.app.test_client()
+    swaig_call(client, "call-a", "send_mfa_code", to_number="+15550123456")
+    assert swaig_call(client, "call-b", "verify_mfa_code", token="123456")["message"] == "No valid MFA session."
+    assert swaig_call(client, "call-a", "verify_mfa_code", token="000000")["success"] is False
+    assert swaig_call(client, "call-a", "verify_mfa_code", token="123456")["success"] is True
+
+def test_sessions_expire_and_stay_bounded():
+    store = MemorySessionStore(ttl=0.05, max_sessions=3)
+    store.set("a", {"mfa_id": "1"})
+    time.sleep(0.06)
+    assert store.get("a") is None
+
+    for call_id in "bcde":
+        store.set(call_id, {"mfa_id": call_id})
+    assert len(store) == 3 and store.evicted == 1
+    assert store.get("b") is None and store.get("e") == {"mfa_id": "e"}
+
+def test_call_id_comes_from_the_swaig_request():
+    assert call_id_from({"fullrequest": {"call_id": "abc"}}) == "abc"
+    assert call_id_from({"call_id": "xyz", "fullrequest": {}}) == "xyz"
+    assert call_id_from(None) == "default"
@@ -22,7 +22,7 @@ echo.
 echo ============================================
 echo Building Docker image 'mfa-bot-image'...
 echo ============================================
-docker build -t "mfa-bot-image" .
+docker build -t "mfa-bot-image" -f Dockerfile ..
 if %ERRORLEVEL% NEQ 0 (
     echo.
     echo Docker build failed. Please check the Dockerfile and try again.
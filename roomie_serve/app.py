@@ -1,11 +1,25 @@
-from flask import Flask
+from flask import Flask, Response, jsonify, make_response, render_template, request
+from markupsafe import Markup
 from signalwire_swaig.core import SWAIG, SWAIGArgument, SWAIGArgumentItems
 import logging, random
 from typing import List
 from dotenv import load_dotenv
 import os
-from pyngrok import ngrok
-import socket
+import sys
+import time
+import uuid
+from collections import deque
+from kitchen_dispatch import Broadcaster, KitchenDispatch
+from menu_catalog import MENU_TABLE, MenuWatcher, load_menu, with_sku_enum
+from order_dashboard import DashboardCache, completed_page
+from order_journal import OrderJournal
+from room_orders import RoomOrder, format_cents
+# The SWAIG helpers shared by every app live in ../swaig_common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from swaig_common.idempotency import idempotent_swaig
+from swaig_common.recorder import record_swaig_traffic
+from swaig_common.signatures import cache_swaig_signatures
+from swaig_common.tunnel import close_tunnels, start_tunnel
 
 # Load environment variables from .env file
 load_dotenv()
@@ -20,241 +34,44 @@ if os.environ.get('DEBUG'):
     print(f"Debugger PIN: {debug_pin}")
 
 app = Flask(__name__, static_folder='static')
-
-port = 5000
-
-try:
-    # Expose Flask app via ngrok
-    public_url = ngrok.connect(port)
-    print(f"Application is publicly accessible at {public_url}")
-except Exception as e:
-    print(f"Failed to establish ngrok tunnel: {e}")
-    public_url = socket.gethostbyname(socket.gethostname())
-    print(f"Falling back to local IP: {public_url}")
+app.add_template_filter(format_cents, 'cents')
 
 # Initialize SWAIG with the Flask app and basic authentication
 swaig = SWAIG(
     app,
     auth=(os.getenv('HTTP_USERNAME'), os.getenv('HTTP_PASSWORD'))
 )
+# A retried place_order answers from the first attempt instead of placing twice. add_items
+# and delete_items are left out: "one more coffee" repeats the same call and must apply again
+idempotent_swaig(app, ["place_order"])
+# GET /swaig is the dashboard, so only POST get_signature requests are cached
+signature_cache = cache_swaig_signatures(app, swaig, methods=("POST",))
 
-# Mock data for menu items
-menu_items = [
-    {
-        'sku': 'CFT001', 
-        'name': 'French Toast', 
-        'description': 'Classic French Toast served with maple syrup and fresh berries.', 
-        'price': 15.00, 
-        'category': 'Breakfast'
-    },
-    {
-        'sku': 'AVT002', 
-        'name': 'Avocado Toast', 
-        'description': 'Multigrain bread topped with smashed avocado, poached egg, and a sprinkle of chili flakes.', 
-        'price': 12.00, 
-        'category': 'Breakfast'
-    },
-    {
-        'sku': 'AVT002',
-        'name': 'Avocado Toast',
-        'description': 'Multigrain bread topped with smashed avocado, poached egg, and a sprinkle of chili flakes.',
-        'price': 12.00,
-        'category': 'Breakfast'
-    },
-    {
-        'sku': 'EGB003',
-        'name': 'Egg Benedict',
-        'description': 'Poached eggs on English muffins with hollandaise sauce.',
-        'price': 14.00,
-        'category': 'Breakfast'
-    },
-    {
-        'sku': 'CSR004',
-        'name': 'Caesar Salad',
-        'description': 'Romaine lettuce with Caesar dressing, croutons, and parmesan.',
-        'price': 10.00,
-        'category': 'Lunch'
-    },
-    {
-        'sku': 'CSG005',
-        'name': 'Chicken Sandwich',
-        'description': 'Grilled chicken sandwich with lettuce, tomato, and mayo.',
-        'price': 11.00,
-        'category': 'Lunch'
-    },
-    {
-        'sku': 'CSS006',
-        'name': 'Club Sandwich',
-        'description': 'Triple-decker sandwich with turkey, bacon, lettuce, and tomato.',
-        'price': 13.00,
-        'category': 'Lunch'
-    },
-    {
-        'sku': 'QRB007',
-        'name': 'Quinoa Bowl',
-        'description': 'Quinoa with roasted vegetables and a lemon tahini dressing.',
-        'price': 12.00,
-        'category': 'Lunch'
-    },
-    {
-        'sku': 'CLB008',
-        'name': 'Cheeseburger',
-        'description': 'Beef patty with cheese, lettuce, tomato, and pickles.',
-        'price': 14.00,
-        'category': 'Dinner'
-    },
-    {
-        'sku': 'GSM009',
-        'name': 'Grilled Salmon',
-        'description': 'Grilled salmon with a side of vegetables.',
-        'price': 18.00,
-        'category': 'Dinner'
-    },
-    {
-        'sku': 'RBS010',
-        'name': 'Ribeye Steak',
-        'description': 'Juicy ribeye steak with mashed potatoes.',
-        'price': 25.00,
-        'category': 'Dinner'
-    },
-    {
-        'sku': 'PSP011',
-        'name': 'Pasta Primavera',
-        'description': 'Pasta with seasonal vegetables and a light sauce.',
-        'price': 16.00,
-        'category': 'Dinner'
-    },
-    {
-        'sku': 'COF012',
-        'name': 'Coffee',
-        'description': 'Freshly brewed coffee.',
-        'price': 3.00,
-        'category': 'Beverage'
-    },
-    {
-        'sku': 'TEH013',
-        'name': 'Herbal Tea',
-        'description': 'A selection of herbal teas.',
-        'price': 3.50,
-        'category': 'Beverage'
-    },
-    {
-        'sku': 'TEG014',
-        'name': 'Green Tea',
-        'description': 'Refreshing green tea.',
-        'price': 3.50,
-        'category': 'Beverage'
-    },
-    {
-        'sku': 'TEB015',
-        'name': 'Black Tea',
-        'description': 'Classic black tea.',
-        'price': 3.50,
-        'category': 'Beverage'
-    },
-    {
-        'sku': 'COK016',
-        'name': 'Coke',
-        'description': 'Chilled Coca-Cola.',
-        'price': 2.00,
-        'category': 'Beverage'
-    },
-    {
-        'sku': 'PEP017',
-        'name': 'Pepsi',
-        'description': 'Chilled Pepsi.',
-        'price': 2.00,
-        'category': 'Beverage'
-    },
-    {
-        'sku': 'DRP018',
-        'name': 'Dr Pepper',
-        'description': 'Chilled Dr Pepper.',
-        'price': 2.00,
-        'category': 'Beverage'
-    },
-    {
-        'sku': 'RBR019',
-        'name': 'Root Beer',
-        'description': 'Chilled root beer.',
-        'price': 2.00,
-        'category': 'Beverage'
-    },
-    {
-        'sku': 'RBM020',
-        'name': 'Red Bull',
-        'description': 'Energy drink.',
-        'price': 3.00,
-        'category': 'Beverage'
-    },
-    {
-        'sku': 'RBM021',
-        'name': 'Monster Energy',
-        'description': 'Energy drink.',
-        'price': 3.00,
-        'category': 'Beverage'
-    },
-    {
-        'sku': 'RBW022',
-        'name': 'White Wine',
-        'description': 'Glass of white wine.',
-        'price': 8.00,
-        'category': 'Beverage'
-    },
-    {
-        'sku': 'RBW023',
-        'name': 'Red Wine',
-        'description': 'Glass of red wine.',
-        'price': 8.00,
-        'category': 'Beverage'
-    },
-        {
-        'sku': 'RBS010-R',
-        'name': 'Ribeye Steak - Rare',
-        'description': '8 oz. steak cooked rare with mashed potatoes and seasonal vegetables.',
-        'price': 30.00,
-        'category': 'Dinner'
-    },
-    {
-        'sku': 'RBS010-MR',
-        'name': 'Ribeye Steak - Medium Rare',
-        'description': '8 oz. steak cooked medium rare with mashed potatoes and seasonal vegetables.',
-        'price': 30.00,
-        'category': 'Dinner'
-    },
-    {
-        'sku': 'RBS010-M',
-        'name': 'Ribeye Steak - Medium',
-        'description': '8 oz. steak cooked medium with mashed potatoes and seasonal vegetables.',
-        'price': 30.00,
-        'category': 'Dinner'
-    },
-    {
-        'sku': 'RBS010-MW',
-        'name': 'Ribeye Steak - Medium Well',
-        'description': '8 oz. steak cooked medium well with mashed potatoes and seasonal vegetables.',
-        'price': 30.00,
-        'category': 'Dinner'
-    },
-    {
-        'sku': 'RBS010-WD',
-        'name': 'Ribeye Steak - Well Done',
-        'description': '8 oz. steak cooked well done with mashed potatoes and seasonal vegetables.',
-        'price': 30.00,
-        'category': 'Dinner'
-    }
-    ]
-# Initialize orders dictionary
+# The menu, validated and indexed once; MENU_FILE may be JSON, YAML or SQLite
+MENU_FILE = os.getenv('MENU_FILE', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'menu.json'))
+MENU_TABLE_NAME = os.getenv('MENU_TABLE', MENU_TABLE)
+menu = load_menu(MENU_FILE, MENU_TABLE_NAME)
+
+# Pending orders by room and the most recent placed orders, restored from the
+# journal by create_app; older placed orders stay in the journal only
+ORDER_JOURNAL = os.getenv('ORDER_JOURNAL', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'orders.db'))
+RECENT_ORDERS = int(os.getenv('RECENT_ORDERS', 200))
+journal = None
 orders = {}
-completed_orders = []
+completed_orders = deque(maxlen=RECENT_ORDERS)
+
+# Rendered dashboard pages, invalidated by every order change
+dashboard = DashboardCache()
+DASHBOARD_PAGE_SIZE = int(os.getenv('DASHBOARD_PAGE_SIZE', 25))
 
-# Helper function to find a menu item by SKU
-def find_menu_item(sku: str):
-    for item in menu_items:
-        if item['sku'] == sku:
-            logging.debug(f"Found item: {item}")
-            return item
-    return None
+def order_status_changed(order):
+    journal.update_placed(order)
+    dashboard.bump()
+
+# Placed orders queued per station, with one event stream for all kitchen displays;
+# every ticket change is journaled so open tickets are queued again after a restart
+kitchen = KitchenDispatch(Broadcaster(), on_change=order_status_changed,
+                          on_ticket=lambda ticket: journal.save_ticket(ticket))
 
 @swaig.endpoint(
     description="Adds items to the customer's order based on the provided SKUs and associates it with their room number.",
@@ -262,18 +79,21 @@ def find_menu_item(sku: str):
     skus=SWAIGArgument(type="array", description="List of SKU strings to add to the order.", required=True,
         items=SWAIGArgumentItems(
             type="string",
-            enum=[item['sku'] for item in menu_items]
+            enum=menu.skus
         )
     )
 )
-def add_items(room, skus):
-    if room not in orders:
-        orders[room] = {'items': [], 'status': 'pending'}
+def add_items(room, skus, meta_data=None, meta_data_token=None):
+    catalog = menu
+    order = orders.get(room)
+    if order is None:
+        order = orders[room] = RoomOrder(room)
     for sku in skus:
-        item = find_menu_item(sku)
-        logging.debug(f"Item: {item}")
+        item = catalog.get(sku)
         if item:
-            orders[room]['items'].append(item)
+            order.add(item)
+    journal.save_pending(order)
+    dashboard.bump()
     return f"Items added successfully", {}
 
 @swaig.endpoint(description="Removes items from the customer's order based on the provided SKUs and room number.",
@@ -281,35 +101,35 @@ def add_items(room, skus):
                 skus=SWAIGArgument(type="array", description="List of SKU strings to remove from the order.", required=True,
                     items=SWAIGArgumentItems(
                         type="string",
-                        enum=[item['sku'] for item in menu_items]
+                        enum=menu.skus
                     )
-                )
-            )    
-def delete_items(room, skus):
+                ),
+                quantity=SWAIGArgument(type="integer", description="How many of each SKU to remove. Leave out to remove them all.")
+            )
+def delete_items(room, skus, quantity=None, meta_data=None, meta_data_token=None):
     if room in orders:
-        orders[room]['items'] = [item for item in orders[room]['items'] if item['sku'] not in skus]
+        for sku in set(skus):
+            orders[room].remove(sku, quantity)
+        journal.save_pending(orders[room])
+        dashboard.bump()
         return f"Items removed successfully", {}
     else:
         return f"Order not found for the given room number, Did you add the items first?", {}
 
 @swaig.endpoint(description="Provides a summary of the customer's order and total price.",
                 room=SWAIGArgument(type="string", description="Customer's room number used as the order key.", required=True))
-def order_total(room):
-    return f"Order total: {sum(item['price'] for item in orders[room]['items']):.2f}", {}
+def order_total(room, meta_data=None, meta_data_token=None):
+    if room not in orders:
+        return f"Order not found for the given room number, Did you add the items first?", {}
+    return f"Order total: {format_cents(orders[room].total_cents)}", {}
 
 @swaig.endpoint(description="Reviews the customer's order and provides the items and their quantities.",
                 room=SWAIGArgument(type="string", description="Customer's room number used as the order key.", required=True))
-def review_order(room):
+def review_order(room, meta_data=None, meta_data_token=None):
     if room in orders:
-        from collections import defaultdict
-        order_summary = defaultdict(int)
-
-        for item in orders[room]['items']:
-            order_summary[item['sku']] += 1
-
         summary_table = "SKU | Quantity\n"
         summary_table += "-" * 20 + "\n"
-        for sku, quantity in order_summary.items():
+        for sku, quantity in orders[room].quantities.items():
             summary_table += f"{sku} | {quantity}\n"
 
         return summary_table.strip(), {}
@@ -318,208 +138,121 @@ def review_order(room):
 
 @swaig.endpoint(description="Finalizes the customer's order and provides a confirmation.",
                 room=SWAIGArgument(type="string", description="Customer's room number used as the order key.", required=True),
-                notes=SWAIGArgument(type="string", description="Additional instructions for the order."))
-def place_order(room, notes=""):
+                notes=SWAIGArgument(type="string", description="Additional instructions for the order."),
+                rush=SWAIGArgument(type="boolean", description="True if the customer needs the order as soon as possible."))
+def place_order(room, notes="", rush=False, meta_data=None, meta_data_token=None):
     if room in orders:
-        orders[room]['status'] = 'placed'
-        orders[room]['notes'] = notes
         completed_order = orders.pop(room)
-        completed_order['room'] = room
+        completed_order.status = 'placed'
+        completed_order.notes = notes
+        completed_order.order_id = uuid.uuid4().hex
+        completed_order.placed_at = time.time()
         completed_orders.append(completed_order)
+        journal.place(completed_order)
+        kitchen.dispatch(completed_order, rush=bool(rush))
+        dashboard.bump()
         return f"Order placed successfully", {}
     else:
         return f"Order not found for the given room number, Did you add the items first?", {}
+
+def apply_menu(catalog):
+    """Swap in a reloaded menu and the SKU enums of the order functions"""
+    global menu
+    functions = with_sku_enum(swaig.functions, catalog.skus, ["add_items", "delete_items"])
+    menu = catalog
+    swaig.functions = functions
+    signature_cache.set_version(catalog.version)
+
+signature_cache.set_version(menu.version)
+MENU_RELOAD_INTERVAL = float(os.getenv('MENU_RELOAD_INTERVAL', 2))
+menu_watcher = MenuWatcher(MENU_FILE, menu.version, apply_menu, MENU_RELOAD_INTERVAL, MENU_TABLE_NAME)
+
+_started = False
+
+def create_app():
+    """
+    Return the configured Flask app after opening the order journal,
+    requeueing undelivered kitchen tickets and starting the background
+    threads. Importing this module opens nothing;
+    safe to call more than once; use 'app:create_app()' as the WSGI entry point.
+    """
+    global _started, journal
+    if not _started:
+        _started = True
+        record_swaig_traffic(app)
+        journal = OrderJournal(ORDER_JOURNAL, recent=RECENT_ORDERS)
+        pending, placed = journal.restore()
+        orders.update(pending)
+        completed_orders.extend(placed)
+        recent = {order.order_id: order for order in completed_orders}
+        for order, tickets in journal.undelivered():
+            kitchen.restore(recent.get(order.order_id, order), tickets)
+        if MENU_RELOAD_INTERVAL > 0:
+            menu_watcher.start()
+    return app
+
+@app.before_request
+def kitchen_auth():
+    if request.path == '/kitchen' or request.path.startswith('/kitchen/'):
+        auth = request.authorization
+        if not auth or (auth.username, auth.password) != (os.getenv('HTTP_USERNAME'), os.getenv('HTTP_PASSWORD')):
+            return jsonify({"error": "Unauthorized"}), 401, {"WWW-Authenticate": 'Basic realm="kitchen"'}
+
+@app.route('/kitchen', methods=['GET'])
+def kitchen_display():
+    return render_template('kitchen.html', station=request.args.get('station', ''))
+
+@app.route('/kitchen/tickets', methods=['GET'])
+def kitchen_tickets():
+    # Taken before the snapshot, so events replayed from here on overlap it rather than leave a gap
+    last_event_id = kitchen.broadcaster.last_event_id
+    return jsonify({"tickets": [ticket.to_dict() for ticket in kitchen.open_tickets()],
+                    "last_event_id": last_event_id, "metrics": kitchen.metrics()})
+
+@app.route('/kitchen/events', methods=['GET'])
+def kitchen_events():
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    if last_event_id is None:
+        last_event_id = request.args.get('last_event_id', type=int)
+    events = kitchen.broadcaster.subscribe(request.args.get('station') or None, last_event_id)
+    return Response(events, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/kitchen/<station>/start', methods=['POST'])
+def kitchen_start(station):
+    ticket = kitchen.start(station)
+    if ticket is None:
+        return jsonify({"error": f"No orders waiting at {station}"}), 404
+    return jsonify(ticket.to_dict())
+
+@app.route('/kitchen/tickets/<ticket_id>/deliver', methods=['POST'])
+def kitchen_deliver(ticket_id):
+    ticket = kitchen.deliver(ticket_id)
+    if ticket is None:
+        return jsonify({"error": f"No ticket {ticket_id} in preparation"}), 404
+    return jsonify(ticket.to_dict())
+
 @app.route('/swaig', methods=['GET'])
 @app.route('/', methods=['GET'])
 def display_detailed_orders():
-    html_content = """
-    <html>
-    <head>
-        <title>Detailed Orders Summary</title>
-        <style>
-            body {
-                font-family: Arial, sans-serif;
-                margin: 0;
-                padding: 0;
-                background-color: #f4f4f9;
-                color: #333;
-            }
-            .container {
-                width: 90%;
-                margin: 20px auto;
-                padding: 20px;
-                background-color: #fff;
-                box-shadow: 0 0 10px rgba(0, 0, 0, 0.1);
-                border-radius: 8px;
-            }
-            .about-section {
-                display: flex;
-                align-items: center;
-                margin-bottom: 20px;
-            }
-            .about-section img {
-                max-width: 150px;
-                margin-right: 20px;
-                border-radius: 8px;
-            }
-            h2 {
-                color: #4a4a4a;
-                border-bottom: 2px solid #e2e2e2;
-                padding-bottom: 10px;
-            }
-            table {
-                width: 100%;
-                border-collapse: collapse;
-                margin-top: 20px;
-            }
-            th, td {
-                border: 1px solid #ddd;
-                padding: 12px;
-                text-align: left;
-            }
-            th {
-                background-color: #f8f8f8;
-                color: #555;
-            }
-            tr:nth-child(even) {
-                background-color: #f9f9f9;
-            }
-            a {
-                color: #3498db;
-                text-decoration: none;
-            }
-            a:hover {
-                text-decoration: underline;
-            }
-            .footer {
-                margin-top: 40px;
-                text-align: center;
-                font-size: 0.9em;
-                color: #777;
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="about-section">
-                <img src="/static/roomie.webp" alt="RoomieServe Logo">
-                <div>
-                    <h2>About RoomieServe</h2>
-                    <p>RoomieServe AI is an innovative room service management tool developed using SignalWire's AI Agent technology. It is designed to improve the efficiency and accuracy of room service orders in hotels and hospitals.</p>
-                    <p>Check out the full project on <a href="https://github.com/briankwest/roomservice">GitHub</a>.</p>
-                </div>
-            </div>
-            
-            <h2>Pending Orders Summary</h2>
-            <table>
-                <tr>
-                    <th>Room Number</th>
-                    <th>SKU</th>
-                    <th>Item Name</th>
-                    <th>Description</th>
-                    <th>Price</th>
-                    <th>Quantity</th>
-                    <th>Total Price</th>
-                    <th>Status</th>
-                </tr>
-    """
-    for room, order in orders.items():
-        item_count = {}
-        for item in order['items']:
-            if item['sku'] in item_count:
-                item_count[item['sku']]['quantity'] += 1
-            else:
-                item_count[item['sku']] = {
-                    'name': item['name'],
-                    'description': item['description'],
-                    'price': item['price'],
-                    'quantity': 1
-                }
-
-        total_price = 0
-        for sku, details in item_count.items():
-            item_total = details['price'] * details['quantity']
-            total_price += item_total
-            html_content += f"""
-            <tr>
-                <td>{room}</td>
-                <td>{sku}</td>
-                <td>{details['name']}</td>
-                <td>{details['description']}</td>
-                <td>${details['price']:.2f}</td>
-                <td>{details['quantity']}</td>
-                <td>${item_total:.2f}</td>
-                <td>{order['status']}</td>
-            </tr>
-            """
-        html_content += f"""
-            <tr>
-                <td colspan="6" style="text-align:right;"><strong>Total Price for room {room}:</strong></td>
-                <td><strong>${total_price:.2f}</strong></td>
-                <td></td>
-            </tr>
-        """
-
-    html_content += """
-            </table>
-            <h2>Completed Orders Summary</h2>
-            <table>
-                <tr>
-                    <th>Room Number</th>
-                    <th>SKU</th>
-                    <th>Item Name</th>
-                    <th>Description</th>
-                    <th>Price</th>
-                    <th>Quantity</th>
-                    <th>Total Price</th>
-                    <th>Status</th>
-                </tr>
-    """
-    for order in completed_orders:
-        room = order.get('room', 'Unknown')
-        item_count = {}
-        for item in order['items']:
-            if item['sku'] in item_count:
-                item_count[item['sku']]['quantity'] += 1
-            else:
-                item_count[item['sku']] = {
-                    'name': item['name'],
-                    'description': item['description'],
-                    'price': item['price'],
-                    'quantity': 1
-                }
-
-        total_price = 0
-        for sku, details in item_count.items():
-            item_total = details['price'] * details['quantity']
-            total_price += item_total
-            html_content += f"""
-            <tr>
-                <td>{room}</td>
-                <td>{sku}</td>
-                <td>{details['name']}</td>
-                <td>{details['description']}</td>
-                <td>${details['price']:.2f}</td>
-                <td>{details['quantity']}</td>
-                <td>${item_total:.2f}</td>
-                <td>{order['status']}</td>
-            </tr>
-            """
-        html_content += f"""
-            <tr>
-                <td colspan="6" style="text-align:right;"><strong>Total Price for room {room}:</strong></td>
-                <td><strong>${total_price:.2f}</strong></td>
-                <td></td>
-            </tr>
-        """
-
-    html_content += """
-            </table>
-        </div>
-    </body>
-    </html>
-    """
-    return html_content
+    page = max(request.args.get('page', 0, type=int), 0)
+    etag = dashboard.etag(page)
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = make_response(dashboard.page(page, lambda: render_dashboard(page)))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def render_dashboard(page):
+    placed, has_older = completed_page(completed_orders, journal, page, DASHBOARD_PAGE_SIZE)
+    rows = [dashboard.fragment(order, render_order_rows) for order in placed]
+    return render_template('dashboard.html', page=page, pending=list(orders.values()),
+                           completed=rows, has_older=has_older)
+
+def render_order_rows(order):
+    return Markup(render_template('order_rows.html', order=order))
 
 # Serve static files
 @app.route('/static/<path:filename>')
@@ -528,4 +261,15 @@ def serve_static(filename):
 
 
 if __name__ == '__main__':
-    app.run(host="0.0.0.0", port=port, debug=os.getenv("DEBUG"))
\ No newline at end of file
+    # Flask's development server; see gunicorn.conf.py for production serving
+    port = int(os.getenv("PORT", 5000))
+    print(f"Local dashboard: http://0.0.0.0:{port}/")
+    # With DEBUG the reloader runs this block in a parent and a child process; only the child serves
+    if not os.getenv("DEBUG") or os.getenv("WERKZEUG_RUN_MAIN"):
+        start_tunnel(port)
+    try:
+        create_app().run(host="0.0.0.0", port=port, debug=os.getenv("DEBUG"))
+    except KeyboardInterrupt:
+        logging.info("Shutting down Flask app.")
+    finally:
+        close_tunnels()
\ No newline at end of file
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark menu lookups for hotel menus of up to 10k SKUs.
+
+    python3 bench_menu_catalog.py --sizes 30,1000,10000
+
+Compares the old linear scan over the menu list with MenuCatalog's SKU
+index for an add_items request of --order-size SKUs, and times loading
+(validation and indexing) and reading the SWAIG enum.
+"""
+import argparse
+import random
+import time
+
+from menu_catalog import MenuCatalog
+
+CATEGORIES = ("Breakfast", "Lunch", "Dinner", "Beverage")
+
+def synthetic_menu(size: int) -> list:
+    """`size` items spread over outlets and categories, with SKUs like OUT03-DIN-00042"""
+    return [{
+        "sku": f"OUT{i % 12:02d}-{CATEGORIES[i % 4][:3].upper()}-{i:05d}",
+        "name": f"Item {i}",
+        "description": f"Synthetic menu item {i}.",
+        "price": round(2 + (i % 40) * 0.75, 2),
+        "category": CATEGORIES[i % 4]
+    } for i in range(size)]
+
+def linear_find(items: list, sku: str):
+    for item in items:
+        if item["sku"] == sku:
+            return item
+    return None
+
+def per_call_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+def run_size(size: int, order_size: int, repeat: int) -> dict:
+    items = synthetic_menu(size)
+    start = time.perf_counter()
+    catalog = MenuCatalog(items)
+    load_ms = (time.perf_counter() - start) * 1000
+    order = random.Random(size).sample(catalog.skus, min(order_size, size))
+    scan_repeat = max(1, repeat * 30 // size)
+    return {
+        "size": size,
+        "load_ms": load_ms,
+        "scan_us": per_call_us(lambda: [linear_find(items, sku) for sku in order], scan_repeat),
+        "index_us": per_call_us(lambda: [catalog.get(sku) for sku in order], repeat),
+        "enum_us": per_call_us(lambda: catalog.skus, repeat),
+        "old_enum_us": per_call_us(lambda: [item["sku"] for item in items], max(1, repeat // 10))
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="30,1000,10000", help="Comma separated menu sizes (default 30,1000,10000)")
+    parser.add_argument("--order-size", type=int, default=10, help="SKUs per add_items request (default 10)")
+    parser.add_argument("--repeat", type=int, default=2000, help="Timed repetitions per measurement (default 2000)")
+    args = parser.parse_args()
+
+    print(f"{'SKUs':>7} {'load ms':>9} {'scan us':>10} {'index us':>10} {'enum us':>9} {'rebuilt enum us':>16}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        r = run_size(size, args.order_size, args.repeat)
+        print(f"{r['size']:>7} {r['load_ms']:>9.2f} {r['scan_us']:>10.1f} {r['index_us']:>10.2f} "
+              f"{r['enum_us']:>9.2f} {r['old_enum_us']:>16.1f}")
+
+if __name__ == "__main__":
+    main()
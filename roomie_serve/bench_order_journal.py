@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark the order journal with a long order history.
+
+    python3 bench_order_journal.py --orders 1000000 --pending 500
+
+Writes --orders placed orders through OrderJournal's batched writer, then
+--pending open orders, and times a restart (restore) against that history.
+For comparison, --unbatched orders are written with one commit each.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from order_journal import OrderJournal
+from room_orders import RoomOrder
+
+ITEMS = [
+    {"sku": "COF012", "name": "Coffee", "description": "Freshly brewed coffee.", "price": 3.00, "category": "Beverage"},
+    {"sku": "AVT002", "name": "Avocado Toast", "description": "Multigrain bread topped with smashed avocado.",
+     "price": 12.00, "category": "Breakfast"},
+    {"sku": "RBS010-MR", "name": "Ribeye Steak - Medium Rare", "description": "8 oz. steak cooked medium rare.",
+     "price": 30.00, "category": "Dinner"},
+    {"sku": "RBW023", "name": "Red Wine", "description": "Glass of red wine.", "price": 8.00, "category": "Beverage"},
+]
+
+def synthetic_order(i: int, rng: random.Random, status: str = "placed") -> RoomOrder:
+    order = RoomOrder(str(100 + i % 900), status)
+    for item in rng.sample(ITEMS, rng.randint(1, len(ITEMS))):
+        order.add(item, rng.randint(1, 3))
+    order.placed_at = 1700000000.0 + i if status == "placed" else None
+    return order
+
+def bench_batched(path: str, count: int, pending: int) -> float:
+    rng = random.Random(1)
+    journal = OrderJournal(path)
+    start = time.perf_counter()
+    orders = (synthetic_order(i, rng) for i in range(count))
+    enqueue = 0.0
+    for order in orders:
+        placed = time.perf_counter()
+        journal.place(order)
+        enqueue += time.perf_counter() - placed
+    journal.flush()
+    elapsed = time.perf_counter() - start
+    for i in range(pending):
+        journal.save_pending(synthetic_order(i, rng, "pending"))
+    journal.close()
+    print(f"batched writer: {count} orders in {elapsed:.1f}s = {count / elapsed:,.0f} orders/s "
+          f"({journal.batches} transactions, {enqueue / count * 1e6:.1f} us per place() call)")
+    return elapsed
+
+def bench_unbatched(path: str, count: int) -> None:
+    rng = random.Random(2)
+    journal = OrderJournal(path)
+    journal.close()
+    db = sqlite3.connect(path)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")
+    start = time.perf_counter()
+    for i in range(count):
+        order = synthetic_order(i, rng)
+        with db:
+            db.execute("INSERT INTO placed_orders (room, placed_at, data) VALUES (?, ?, ?)",
+                       (order.room, order.placed_at, json.dumps(order.to_dict())))
+    elapsed = time.perf_counter() - start
+    db.close()
+    print(f"commit per order: {count} orders in {elapsed:.1f}s = {count / elapsed:,.0f} orders/s")
+
+def bench_restore(path: str, recent: int) -> None:
+    start = time.perf_counter()
+    pending, placed = OrderJournal(path, recent=recent).restore()
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"restore: {len(pending)} pending and {len(placed)} recent orders in {elapsed:.1f} ms "
+          f"from a {os.path.getsize(path) / 1e6:,.0f} MB journal")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=1000000, help="Placed orders in the history (default 1000000)")
+    parser.add_argument("--pending", type=int, default=500, help="Open orders to restore (default 500)")
+    parser.add_argument("--recent", type=int, default=200, help="Placed orders kept in memory (default 200)")
+    parser.add_argument("--unbatched", type=int, default=5000, help="Orders for the commit-per-order baseline")
+    parser.add_argument("--db", help="Journal file (default a temporary file, removed afterwards)")
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    path = args.db or os.path.join(directory, "orders.db")
+    try:
+        bench_unbatched(os.path.join(directory, "unbatched.db"), args.unbatched)
+        bench_batched(path, args.orders, args.pending)
+        bench_restore(path, args.recent)
+    finally:
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Measure how long RoomieServe takes from process start to its first answer.
+
+    python3 bench_startup.py --runs 5
+
+Starts the app --runs times with the development server (python3 app.py)
+and with gunicorn ('app:create_app()'), each with an empty order journal and
+no NGROK_AUTH_TOKEN, and times from spawning the process until GET /
+returns 200. Also times a bare `import app`.
+"""
+import argparse
+import os
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def environment(directory: str, port: int) -> dict:
+    env = {**os.environ, "PORT": str(port), "ORDER_JOURNAL": os.path.join(directory, "orders.db"),
+           "HTTP_USERNAME": "bench", "HTTP_PASSWORD": "bench", "LOG_LEVEL": "WARNING"}
+    env.pop("NGROK_AUTH_TOKEN", None)
+    env.pop("DEBUG", None)
+    return env
+
+def first_request(command, timeout: float = 30.0) -> float:
+    """Seconds from spawning `command` until GET / answers 200"""
+    directory = tempfile.mkdtemp()
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(command(port), cwd=HERE, env=environment(directory, port),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.005)
+        raise RuntimeError(f"No answer on port {port} after {timeout}s")
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(directory)
+
+def import_time() -> float:
+    directory = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "import app"], cwd=HERE, env=environment(directory, free_port()),
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return time.perf_counter() - start
+    finally:
+        shutil.rmtree(directory)
+
+def report(name: str, samples) -> None:
+    samples = [s * 1000 for s in samples]
+    print(f"{name}: median {statistics.median(samples):.0f} ms, min {min(samples):.0f} ms, max {max(samples):.0f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Starts per server (default 5)")
+    args = parser.parse_args()
+
+    report("import app", [import_time() for _ in range(args.runs)])
+    report("python3 app.py to first request",
+           [first_request(lambda port: [sys.executable, "app.py"]) for _ in range(args.runs)])
+    if shutil.which("gunicorn"):
+        report("gunicorn to first request",
+               [first_request(lambda port: ["gunicorn", "-c", "gunicorn.conf.py", "app:create_app()"])
+                for _ in range(args.runs)])
+    else:
+        print("gunicorn is not installed; skipped")
+
+if __name__ == "__main__":
+    main()
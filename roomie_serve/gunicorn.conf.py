@@ -0,0 +1,33 @@
+# Gunicorn settings for RoomieServe:
+#
+#     gunicorn -c gunicorn.conf.py 'app:create_app()'
+#
+# Orders live in process memory and the SQLite journal has one writer, so
+# keep one worker and scale with threads. Each open kitchen display holds a
+# thread for its event stream, so leave room for them.
+import logging
+import os
+import sys
+
+# The tunnel helper is shared with the other apps in ../swaig_common
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from swaig_common.tunnel import close_tunnels, start_tunnel
+
+port = int(os.getenv("PORT", 5000))
+bind = os.getenv("GUNICORN_BIND", f"0.0.0.0:{port}")
+workers = int(os.getenv("GUNICORN_WORKERS", 1))
+threads = int(os.getenv("GUNICORN_THREADS", 16))
+worker_class = "gthread"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+accesslog = os.getenv("GUNICORN_ACCESS_LOG")
+
+def when_ready(server):
+    # The listening socket is bound by now; the tunnel connects in the background
+    if workers > 1:
+        logging.warning("Running %s workers: each one keeps its own in-memory orders", workers)
+    start_tunnel(port)
+
+def on_exit(server):
+    close_tunnels()
@@ -52,15 +52,6 @@ source venv/bin/activate
 
 # Step 6: Install Python Dependencies
 echo "Installing Python dependencies..."
-cat <<EOF > requirements.txt
-flask
-requests
-python-dotenv
-signalwire
-signalwire_swaig
-pyngrok
-EOF
-
 pip3 install --upgrade pip
 pip3 install -r requirements.txt
 
@@ -107,10 +98,7 @@ source .env
 set +a
 
 
-touch /home/roomie/.config/ngrok/ngrok.yml
-env $(cat .env | xargs) ngrok config add-authtoken $NGROK_AUTH_TOKEN
-env $(cat .env | xargs) ngrok http --url=$NGROK_DOMAIN 5000 &
-#ngrok http -region=$NGROK_REGION -authtoken=$NGROK_AUTH_TOKEN 5000 &
+# app.py opens the ngrok tunnel itself once it is listening, when NGROK_AUTH_TOKEN is set
 echo "Environment variables written to .env file. Update with your credentials."
 
 # Step 10: Final Instructions
@@ -0,0 +1,248 @@
+import heapq
+import itertools
+import json
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, List, Optional
+
+from room_orders import RoomOrder
+
+# Menu category -> station; categories not listed go to DEFAULT_STATION
+STATIONS = {"Beverage": "bar"}
+DEFAULT_STATION = "kitchen"
+
+class Ticket:
+    """The part of a placed order made at one station"""
+
+    def __init__(self, ticket_id: str, order: RoomOrder, station: str, lines: List[dict], rush: bool):
+        self.ticket_id = ticket_id
+        self.order = order
+        self.station = station
+        self.lines = lines
+        self.rush = rush
+        self.status = "placed"
+        self.placed_at = order.placed_at or time.time()
+        self.preparing_at = None
+        self.delivered_at = None
+
+    def to_dict(self) -> dict:
+        return {"ticket_id": self.ticket_id, "order_id": self.order.order_id, "room": self.order.room,
+                "station": self.station, "rush": self.rush, "status": self.status, "notes": self.order.notes,
+                "items": [{"sku": line["sku"], "name": line["name"], "quantity": line["quantity"]}
+                          for line in self.lines],
+                "placed_at": self.placed_at, "preparing_at": self.preparing_at, "delivered_at": self.delivered_at}
+
+class Broadcaster:
+    """
+    One event stream shared by every kitchen display.
+
+    Each event is formatted as a server-sent event once and handed to every
+    subscriber's queue. A display that stops reading is dropped when its
+    queue fills, and reconnecting with Last-Event-ID replays what it missed
+    from the last `history` events.
+    """
+
+    def __init__(self, history: int = 500, max_queued: int = 1000, keepalive: float = 15):
+        self.max_queued = max_queued
+        self.keepalive = keepalive
+        self.published = 0
+        self.dropped = 0
+        self.last_event_id = 0
+        self._ids = itertools.count(1)
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def publish(self, event: str, data: dict, station: Optional[str] = None) -> None:
+        with self._lock:
+            event_id = self.last_event_id = next(self._ids)
+            message = (event_id, station, f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data)}\n\n")
+            self._history.append(message)
+            self.published += 1
+            for subscriber in list(self._subscribers):
+                try:
+                    subscriber.put_nowait(message)
+                except queue.Full:
+                    self._subscribers.discard(subscriber)
+                    self.dropped += 1
+
+    def subscribe(self, station: Optional[str] = None, last_event_id: Optional[int] = None) -> Iterator[str]:
+        """Server-sent events for `station` (or every station), until the client goes away"""
+        subscriber = queue.Queue(maxsize=self.max_queued)
+        with self._lock:
+            missed = [m for m in self._history if last_event_id is not None and m[0] > last_event_id]
+            self._subscribers.add(subscriber)
+        try:
+            yield "retry: 3000\n\n"
+            for message in missed:
+                if station is None or message[1] in (None, station):
+                    yield message[2]
+            while True:
+                try:
+                    _, target, text = subscriber.get(timeout=self.keepalive)
+                except queue.Empty:
+                    with self._lock:
+                        if subscriber not in self._subscribers:
+                            return
+                    yield ": keepalive\n\n"
+                    continue
+                if station is None or target in (None, station):
+                    yield text
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+class KitchenDispatch:
+    """
+    Placed orders queued for the stations that make them.
+
+    `dispatch` splits an order into one ticket per station by menu category
+    and queues each ticket, rush orders first and then by placement time.
+    `start` takes the next ticket at a station (placed -> preparing) and
+    `deliver` completes it (preparing -> delivered). The order itself moves
+    to preparing with its first ticket and to delivered with its last.
+    Each change is published to the broadcaster and passed to `on_ticket`,
+    and the time spent waiting and the time to delivery are kept per
+    station for SLA metrics. `restore` queues the open tickets of an order
+    again after a restart.
+    """
+
+    def __init__(self, broadcaster: Broadcaster, stations: Optional[Dict[str, str]] = None,
+                 default_station: str = DEFAULT_STATION, samples: int = 1000, on_change=None, on_ticket=None):
+        self.broadcaster = broadcaster
+        self.stations = STATIONS if stations is None else stations
+        self.default_station = default_station
+        self.samples = samples
+        self.on_change = on_change
+        self.on_ticket = on_ticket
+        self.tickets: Dict[str, Ticket] = {}
+        self._queues: Dict[str, list] = {}
+        self._waits: Dict[str, deque] = {}
+        self._totals: Dict[str, deque] = {}
+        self._delivered: Dict[str, int] = {}
+        self._open: Dict[str, int] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def station_for(self, category: str) -> str:
+        return self.stations.get(category, self.default_station)
+
+    def dispatch(self, order: RoomOrder, rush: bool = False) -> List[Ticket]:
+        by_station: Dict[str, List[dict]] = {}
+        for line in order.lines():
+            by_station.setdefault(self.station_for(line["category"]), []).append(line)
+        tickets = []
+        with self._lock:
+            for station, lines in by_station.items():
+                ticket = Ticket(f"{order.order_id}-{station}", order, station, lines, rush)
+                self.tickets[ticket.ticket_id] = ticket
+                heapq.heappush(self._queues.setdefault(station, []),
+                               (not rush, ticket.placed_at, next(self._seq), ticket))
+                tickets.append(ticket)
+            self._open[order.order_id] = self._open.get(order.order_id, 0) + len(tickets)
+        for ticket in tickets:
+            self.broadcaster.publish("new", ticket.to_dict(), ticket.station)
+            if self.on_ticket:
+                self.on_ticket(ticket)
+        return tickets
+
+    def restore(self, order: RoomOrder, tickets: List[dict]) -> List[Ticket]:
+        """
+        Requeue an order's undelivered tickets, each a dict with station,
+        rush, status, skus, placed_at and preparing_at as journaled. Tickets
+        in preparation stay in preparation.
+        """
+        lines = {line["sku"]: line for line in order.lines()}
+        restored = []
+        with self._lock:
+            for saved in tickets:
+                ticket = Ticket(f"{order.order_id}-{saved['station']}", order, saved["station"],
+                                [lines[sku] for sku in saved["skus"] if sku in lines], saved["rush"])
+                ticket.status, ticket.placed_at = saved["status"], saved["placed_at"] or ticket.placed_at
+                ticket.preparing_at = saved["preparing_at"]
+                self.tickets[ticket.ticket_id] = ticket
+                if ticket.status == "placed":
+                    heapq.heappush(self._queues.setdefault(ticket.station, []),
+                                   (not ticket.rush, ticket.placed_at, next(self._seq), ticket))
+                restored.append(ticket)
+            self._open[order.order_id] = self._open.get(order.order_id, 0) + len(restored)
+        return restored
+
+    def open_tickets(self) -> List[Ticket]:
+        """Every ticket not yet delivered, next first"""
+        with self._lock:
+            return sorted(self.tickets.values(), key=lambda t: (not t.rush, t.placed_at))
+
+    def queued(self, station: str) -> List[Ticket]:
+        """Tickets waiting at `station`, next first"""
+        with self._lock:
+            return [entry[-1] for entry in sorted(self._queues.get(station, []))]
+
+    def start(self, station: str) -> Optional[Ticket]:
+        """Move the next waiting ticket at `station` to preparing; None when nothing is waiting"""
+        with self._lock:
+            waiting = self._queues.get(station)
+            if not waiting:
+                return None
+            ticket = heapq.heappop(waiting)[-1]
+            ticket.status, ticket.preparing_at = "preparing", time.time()
+            self._sample(self._waits, station, ticket.preparing_at - ticket.placed_at)
+            order_changed = ticket.order.status == "placed"
+            if order_changed:
+                ticket.order.status = "preparing"
+        self._published("updated", ticket, order_changed)
+        return ticket
+
+    def deliver(self, ticket_id: str) -> Optional[Ticket]:
+        """Mark a preparing ticket delivered; None when there is no such ticket in preparation"""
+        with self._lock:
+            ticket = self.tickets.get(ticket_id)
+            if ticket is None or ticket.status != "preparing":
+                return None
+            ticket.status, ticket.delivered_at = "delivered", time.time()
+            self._sample(self._totals, ticket.station, ticket.delivered_at - ticket.placed_at)
+            self._delivered[ticket.station] = self._delivered.get(ticket.station, 0) + 1
+            del self.tickets[ticket_id]
+            order_id = ticket.order.order_id
+            self._open[order_id] -= 1
+            order_changed = not self._open[order_id]
+            if order_changed:
+                del self._open[order_id]
+                ticket.order.status = "delivered"
+        self._published("fulfilled", ticket, order_changed)
+        return ticket
+
+    def _sample(self, samples: Dict[str, deque], station: str, seconds: float) -> None:
+        samples.setdefault(station, deque(maxlen=self.samples)).append(seconds)
+
+    def _published(self, event: str, ticket: Ticket, order_changed: bool) -> None:
+        self.broadcaster.publish(event, ticket.to_dict(), ticket.station)
+        if self.on_ticket:
+            self.on_ticket(ticket)
+        if order_changed and self.on_change:
+            self.on_change(ticket.order)
+
+    def metrics(self) -> dict:
+        """Per station: tickets waiting, preparing and delivered, and wait and delivery seconds"""
+        with self._lock:
+            stations = set(self._queues) | set(self._delivered)
+            preparing = [t.station for t in self.tickets.values() if t.status == "preparing"]
+            return {station: {"waiting": len(self._queues.get(station, [])),
+                              "preparing": preparing.count(station),
+                              "delivered": self._delivered.get(station, 0),
+                              "wait_seconds": _summary(self._waits.get(station)),
+                              "delivery_seconds": _summary(self._totals.get(station))}
+                    for station in sorted(stations)}
+
+def _summary(samples: Optional[deque]) -> Optional[dict]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return {"mean": round(sum(ordered) / len(ordered), 1),
+            "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+            "max": round(ordered[-1], 1)}
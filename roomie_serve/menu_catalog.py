@@ -0,0 +1,177 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence
+
+REQUIRED_FIELDS = ("sku", "name", "description", "price", "category")
+MENU_TABLE = "menu_items"
+
+class MenuCatalog:
+    """
+    The room service menu, validated and indexed once when it is loaded.
+
+    Items are looked up by SKU in a dict and listed by category. Repeated
+    identical entries for a SKU are dropped with a warning; entries that
+    share a SKU but differ, or that are missing fields or have a bad price,
+    raise ValueError. `skus` keeps menu order and is the enum for the SWAIG
+    function signatures. `version` is a hash of the validated items, so two
+    loads of the same menu have the same version.
+    """
+
+    def __init__(self, items: Iterable[dict]):
+        self.by_sku: Dict[str, dict] = {}
+        self.by_category: Dict[str, List[dict]] = {}
+        self.duplicates: List[str] = []
+        for item in items:
+            self._add(item)
+        self.skus: List[str] = list(self.by_sku)
+        self.categories: List[str] = list(self.by_category)
+        canonical = json.dumps(list(self.by_sku.values()), sort_keys=True).encode()
+        self.version = hashlib.sha256(canonical).hexdigest()[:12]
+        if self.duplicates:
+            logging.warning(f"Dropped duplicate menu entries for {', '.join(self.duplicates)}")
+
+    def _add(self, item: dict) -> None:
+        missing = [field for field in REQUIRED_FIELDS if item.get(field) in (None, "")]
+        if missing:
+            raise ValueError(f"Menu item {item.get('sku', item)} is missing {', '.join(missing)}")
+        price = item["price"]
+        if isinstance(price, bool) or not isinstance(price, (int, float)) or price < 0:
+            raise ValueError(f"Menu item {item['sku']} has an invalid price: {price!r}")
+        sku = item["sku"]
+        existing = self.by_sku.get(sku)
+        if existing is not None:
+            if existing != item:
+                raise ValueError(f"Menu SKU {sku} appears twice with different details")
+            self.duplicates.append(sku)
+            return
+        item = dict(item)
+        self.by_sku[sku] = item
+        self.by_category.setdefault(item["category"], []).append(item)
+
+    def get(self, sku: str) -> Optional[dict]:
+        return self.by_sku.get(sku)
+
+    def category(self, name: str) -> List[dict]:
+        return self.by_category.get(name, [])
+
+    def __contains__(self, sku: str) -> bool:
+        return sku in self.by_sku
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.by_sku.values())
+
+    def __len__(self) -> int:
+        return len(self.by_sku)
+
+def load_menu(source: str, table: str = MENU_TABLE) -> MenuCatalog:
+    """A validated catalog from a JSON, YAML or SQLite menu file, chosen by extension"""
+    extension = os.path.splitext(source)[1].lower()
+    if extension == ".json":
+        with open(source, encoding="utf-8") as f:
+            items = json.load(f)
+    elif extension in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise RuntimeError("A YAML menu needs the PyYAML package: pip install pyyaml")
+        with open(source, encoding="utf-8") as f:
+            items = yaml.safe_load(f)
+    elif extension in (".db", ".sqlite", ".sqlite3"):
+        if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", table):
+            raise ValueError(f"Invalid menu table name: {table!r}")
+        db = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+        try:
+            db.row_factory = sqlite3.Row
+            items = [dict(row) for row in db.execute(f"SELECT {', '.join(REQUIRED_FIELDS)} FROM {table}")]
+        finally:
+            db.close()
+    else:
+        raise ValueError(f"Unsupported menu file {source}: use .json, .yaml, .yml, .db, .sqlite or .sqlite3")
+    if isinstance(items, dict):
+        items = items.get("items")
+    if not isinstance(items, list):
+        raise ValueError(f"Menu file {source} must hold a list of items")
+    return MenuCatalog(items)
+
+def with_sku_enum(functions: Dict[str, dict], skus: Sequence[str], names: Sequence[str],
+                  argument: str = "skus") -> Dict[str, dict]:
+    """A copy of SWAIG function metadata with `skus` as the enum of each named function's SKU list"""
+    functions = dict(functions)
+    for name in names:
+        meta = copy.deepcopy(functions[name])
+        meta["parameters"]["properties"][argument]["items"]["enum"] = list(skus)
+        functions[name] = meta
+    return functions
+
+class MenuWatcher:
+    """
+    Reloads a menu file when it changes.
+
+    The file (and a SQLite menu's write-ahead log) is checked every
+    `interval` seconds by a background thread. A changed file is loaded and
+    validated in full, and `on_change` gets the new catalog only if its
+    version differs. A file that fails to load is logged and the current
+    menu stays in use.
+    """
+
+    def __init__(self, source: str, version: str, on_change: Callable[[MenuCatalog], None],
+                 interval: float = 2.0, table: str = MENU_TABLE):
+        self.source = source
+        self.version = version
+        self.on_change = on_change
+        self.interval = interval
+        self.table = table
+        self.reloads = 0
+        self.failures = 0
+        self._stamp = self._file_stamp()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _file_stamp(self) -> tuple:
+        stamp = []
+        for path in (self.source, self.source + "-wal"):
+            try:
+                stat = os.stat(path)
+                stamp.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def check(self) -> bool:
+        """Reload the menu if the file changed; True when a new menu was applied"""
+        stamp = self._file_stamp()
+        if stamp == self._stamp:
+            return False
+        self._stamp = stamp
+        try:
+            catalog = load_menu(self.source, self.table)
+        except Exception as e:
+            self.failures += 1
+            logging.error(f"Keeping menu {self.version}: could not reload {self.source}: {e}")
+            return False
+        if catalog.version == self.version:
+            return False
+        self.on_change(catalog)
+        logging.info(f"Reloaded menu {self.source}: version {self.version} -> {catalog.version}, {len(catalog)} items")
+        self.version = catalog.version
+        self.reloads += 1
+        return True
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._watch, name="menu-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.check()
@@ -0,0 +1,87 @@
+import secrets
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import Callable, Deque, List, Tuple
+
+from room_orders import RoomOrder
+
+class DashboardCache:
+    """
+    Rendered dashboard pages, and the rows of each placed order.
+
+    Every order change calls `bump`, which moves `version` on and drops the
+    cached pages. A page is rendered at most once per version and its ETag
+    carries the version, so reloading an unchanged page answers 304. The
+    version starts again at 0 in every process, so the ETag also carries a
+    random `instance` token: a page cached before a restart never matches. Placed
+    orders change only in status, so their rows are rendered once per order
+    id and status, and reused on every page that shows them.
+    """
+
+    def __init__(self, max_fragments: int = 5000, max_pages: int = 32):
+        self.version = 0
+        self.instance = secrets.token_hex(4)
+        self.max_fragments = max_fragments
+        self.max_pages = max_pages
+        self.hits = 0
+        self.misses = 0
+        self._fragments: "OrderedDict[str, str]" = OrderedDict()
+        self._pages: "OrderedDict[Tuple[int, int], str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def bump(self) -> None:
+        with self._lock:
+            self.version += 1
+            self._pages.clear()
+
+    def etag(self, page: int) -> str:
+        return f"{self.instance}-v{self.version}-p{page}"
+
+    def fragment(self, order: RoomOrder, render: Callable[[RoomOrder], str]) -> str:
+        """The rows for a placed order, rendered on first use"""
+        if order.order_id is None:
+            return render(order)
+        key = f"{order.order_id}:{order.status}"
+        with self._lock:
+            html = self._fragments.get(key)
+            if html is not None:
+                self._fragments.move_to_end(key)
+                return html
+        html = render(order)
+        with self._lock:
+            self._fragments[key] = html
+            if len(self._fragments) > self.max_fragments:
+                self._fragments.popitem(last=False)
+        return html
+
+    def page(self, page: int, render: Callable[[], str]) -> str:
+        """Page `page` at the current version, rendered only if it is not cached yet"""
+        with self._lock:
+            key = (self.version, page)
+            html = self._pages.get(key)
+            if html is not None:
+                self.hits += 1
+                return html
+            self.misses += 1
+        html = render()
+        with self._lock:
+            # A bump while rendering leaves this under a stale version, where it is never served
+            self._pages[key] = html
+            if len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+        return html
+
+def completed_page(recent: Deque[RoomOrder], journal, page: int, size: int) -> Tuple[List[RoomOrder], bool]:
+    """
+    The placed orders on `page` (0 is the newest), and whether an older page
+    exists. Pages inside the in-memory window are sliced from it; older ones
+    are read from the journal.
+    """
+    start, end = page * size, (page + 1) * size
+    holds_all = recent.maxlen is None or len(recent) < recent.maxlen
+    if holds_all or end < len(recent):
+        return list(islice(reversed(recent), start, end)), end < len(recent)
+    journal.flush()
+    found = journal.placed(start, size + 1)
+    return found[:size], len(found) > size
@@ -0,0 +1,169 @@
+import json
+import logging
+import queue
+import sqlite3
+import threading
+from collections import deque
+from typing import Deque, Dict, List, Tuple
+
+from room_orders import RoomOrder
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS placed_orders (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    room TEXT NOT NULL,
+    placed_at REAL,
+    data TEXT NOT NULL,
+    order_id TEXT
+);
+CREATE TABLE IF NOT EXISTS pending_orders (
+    room TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS kitchen_tickets (
+    ticket_id TEXT PRIMARY KEY,
+    order_id TEXT NOT NULL,
+    station TEXT NOT NULL,
+    rush INTEGER NOT NULL,
+    status TEXT NOT NULL,
+    skus TEXT NOT NULL,
+    placed_at REAL,
+    preparing_at REAL,
+    delivered_at REAL
+);
+CREATE INDEX IF NOT EXISTS kitchen_tickets_status ON kitchen_tickets (status);
+"""
+
+_STOP = object()
+
+class OrderJournal:
+    """
+    Orders in SQLite, so a restart loses nothing and memory stays bounded.
+
+    Placed orders are appended to `placed_orders`, and rewritten only when
+    the kitchen moves them to preparing or delivered. Each kitchen ticket's
+    status and timestamps are kept in `kitchen_tickets`, so `undelivered`
+    can hand the open ones back to the kitchen after a restart. Each room's
+    pending order is kept up to date in `pending_orders` and removed when
+    it is placed. Writes are queued and applied by one background
+    thread, which commits everything queued so far in a single transaction.
+    A crash can lose only writes still in the queue. `restore` reads back
+    the pending orders and the last `recent` placed orders, however long
+    the history is.
+    """
+
+    def __init__(self, path: str, recent: int = 200, max_queued: int = 100000):
+        self.path = path
+        self.recent = recent
+        self.written = 0
+        self.batches = 0
+        with self._connect() as db:
+            db.executescript(SCHEMA)
+            # Journals written before orders were updated in place lack the column
+            if "order_id" not in {column[1] for column in db.execute("PRAGMA table_info(placed_orders)")}:
+                db.execute("ALTER TABLE placed_orders ADD COLUMN order_id TEXT")
+            db.execute("CREATE INDEX IF NOT EXISTS placed_orders_order_id ON placed_orders (order_id)")
+        self._queue = queue.Queue(maxsize=max_queued)
+        self._writer = threading.Thread(target=self._write_batches, name="order-journal", daemon=True)
+        self._writer.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def restore(self) -> Tuple[Dict[str, RoomOrder], Deque[RoomOrder]]:
+        """The pending orders by room, and a deque of the most recent placed orders, oldest first"""
+        with self._connect() as db:
+            pending = {room: RoomOrder.from_dict(json.loads(data))
+                       for room, data in db.execute("SELECT room, data FROM pending_orders")}
+            rows = db.execute("SELECT data FROM placed_orders ORDER BY seq DESC LIMIT ?", (self.recent,)).fetchall()
+        placed = deque((RoomOrder.from_dict(json.loads(data)) for data, in reversed(rows)), maxlen=self.recent)
+        logging.info(f"Restored {len(pending)} pending and {len(placed)} recent orders from {self.path}")
+        return pending, placed
+
+    def placed(self, offset: int, limit: int) -> List[RoomOrder]:
+        """Committed placed orders, newest first, skipping the newest `offset`"""
+        with self._connect() as db:
+            rows = db.execute("SELECT data FROM placed_orders ORDER BY seq DESC LIMIT ? OFFSET ?",
+                              (limit, offset)).fetchall()
+        return [RoomOrder.from_dict(json.loads(data)) for data, in rows]
+
+    def undelivered(self) -> List[Tuple[RoomOrder, List[dict]]]:
+        """Placed orders with tickets not yet delivered, oldest first, each with those tickets"""
+        with self._connect() as db:
+            rows = db.execute("SELECT order_id, station, rush, status, skus, placed_at, preparing_at "
+                              "FROM kitchen_tickets WHERE status != 'delivered' ORDER BY placed_at").fetchall()
+            tickets: Dict[str, List[dict]] = {}
+            for order_id, station, rush, status, skus, placed_at, preparing_at in rows:
+                tickets.setdefault(order_id, []).append(
+                    {"station": station, "rush": bool(rush), "status": status, "skus": json.loads(skus),
+                     "placed_at": placed_at, "preparing_at": preparing_at})
+            restored = []
+            for order_id, open_tickets in tickets.items():
+                row = db.execute("SELECT data FROM placed_orders WHERE order_id = ?", (order_id,)).fetchone()
+                if row:
+                    restored.append((RoomOrder.from_dict(json.loads(row[0])), open_tickets))
+        return restored
+
+    def save_pending(self, order: RoomOrder) -> None:
+        self._queue.put(("pending", order.room, json.dumps(order.to_dict())))
+
+    def place(self, order: RoomOrder) -> None:
+        self._queue.put(("placed", order.room, json.dumps(order.to_dict()), order.placed_at, order.order_id))
+
+    def update_placed(self, order: RoomOrder) -> None:
+        """Rewrite a placed order, after the kitchen changes its status"""
+        self._queue.put(("update", json.dumps(order.to_dict()), order.order_id))
+
+    def save_ticket(self, ticket) -> None:
+        """Record a kitchen ticket's current status and timestamps"""
+        self._queue.put(("ticket", ticket.ticket_id, ticket.order.order_id, ticket.station, int(ticket.rush),
+                         ticket.status, json.dumps([line["sku"] for line in ticket.lines]),
+                         ticket.placed_at, ticket.preparing_at, ticket.delivered_at))
+
+    def flush(self) -> None:
+        """Wait until every queued write is committed"""
+        self._queue.join()
+
+    def close(self) -> None:
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def _write_batches(self) -> None:
+        db = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = _STOP in batch
+            writes = [write for write in batch if write is not _STOP]
+            try:
+                with db:
+                    for write in writes:
+                        if write[0] == "pending":
+                            db.execute("INSERT OR REPLACE INTO pending_orders (room, data) VALUES (?, ?)", write[1:])
+                        elif write[0] == "update":
+                            db.execute("UPDATE placed_orders SET data = ? WHERE order_id = ?", write[1:])
+                        elif write[0] == "ticket":
+                            db.execute("INSERT OR REPLACE INTO kitchen_tickets (ticket_id, order_id, station, rush, status, "
+                                       "skus, placed_at, preparing_at, delivered_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                                       write[1:])
+                        else:
+                            _, room, data, placed_at, order_id = write
+                            db.execute("DELETE FROM pending_orders WHERE room = ?", (room,))
+                            db.execute("INSERT INTO placed_orders (room, placed_at, data, order_id) VALUES (?, ?, ?, ?)",
+                                       (room, placed_at, data, order_id))
+                self.written += len(writes)
+                self.batches += 1
+            except sqlite3.Error as e:
+                logging.error(f"Failed to write {len(writes)} orders to {self.path}: {e}")
+            for _ in batch:
+                self._queue.task_done()
+            if stop:
+                db.close()
+                return
@@ -0,0 +1,80 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterator, Optional
+
+def to_cents(price) -> int:
+    """Menu price in dollars (float, int or string) as integer cents"""
+    return int((Decimal(str(price)) * 100).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+def format_cents(cents: int) -> str:
+    return f"{cents // 100}.{cents % 100:02d}"
+
+class RoomOrder:
+    """
+    One room's order as SKU -> quantity, with prices in integer cents.
+
+    The unit price is fixed when a SKU is first added, and each line's
+    subtotal and the order total are updated on every add and remove, so
+    totals and reviews cost O(distinct SKUs) however many units are ordered.
+    """
+
+    def __init__(self, room: str, status: str = "pending"):
+        self.room = room
+        self.status = status
+        self.notes = ""
+        self.order_id = None
+        self.placed_at = None
+        self.quantities: Dict[str, int] = {}
+        self.subtotals: Dict[str, int] = {}
+        self.total_cents = 0
+        self._items: Dict[str, dict] = {}
+
+    def add(self, item: dict, quantity: int = 1) -> None:
+        sku = item["sku"]
+        if sku not in self._items:
+            self._items[sku] = {"sku": sku, "name": item["name"], "description": item["description"],
+                                "category": item["category"], "unit_cents": to_cents(item["price"])}
+        unit_cents = self._items[sku]["unit_cents"]
+        self.quantities[sku] = self.quantities.get(sku, 0) + quantity
+        self.subtotals[sku] = self.subtotals.get(sku, 0) + unit_cents * quantity
+        self.total_cents += unit_cents * quantity
+
+    def remove(self, sku: str, quantity: Optional[int] = None) -> int:
+        """Remove `quantity` units of `sku`, or all of them when None; returns the units removed"""
+        ordered = self.quantities.get(sku, 0)
+        removed = ordered if quantity is None else min(max(quantity, 0), ordered)
+        if not removed:
+            return 0
+        unit_cents = self._items[sku]["unit_cents"]
+        self.total_cents -= unit_cents * removed
+        if removed == ordered:
+            del self.quantities[sku], self.subtotals[sku], self._items[sku]
+        else:
+            self.quantities[sku] -= removed
+            self.subtotals[sku] -= unit_cents * removed
+        return removed
+
+    def lines(self) -> Iterator[dict]:
+        """Each SKU on the order with its quantity and subtotal, in the order first added"""
+        for sku, quantity in self.quantities.items():
+            yield {**self._items[sku], "quantity": quantity, "subtotal_cents": self.subtotals[sku]}
+
+    def __len__(self) -> int:
+        return sum(self.quantities.values())
+
+    def to_dict(self) -> dict:
+        return {"room": self.room, "status": self.status, "notes": self.notes, "order_id": self.order_id,
+                "placed_at": self.placed_at, "total_cents": self.total_cents, "items": list(self.lines())}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "RoomOrder":
+        order = cls(data["room"], data.get("status", "pending"))
+        order.notes = data.get("notes", "")
+        order.order_id = data.get("order_id")
+        order.placed_at = data.get("placed_at")
+        for line in data.get("items", []):
+            sku, unit_cents = line["sku"], line["unit_cents"]
+            order._items[sku] = {k: line[k] for k in ("sku", "name", "description", "category", "unit_cents")}
+            order.quantities[sku] = line["quantity"]
+            order.subtotals[sku] = unit_cents * line["quantity"]
+            order.total_cents += order.subtotals[sku]
+        return order
@@ -0,0 +1,86 @@
+import json
+
+from kitchen_dispatch import Broadcaster, KitchenDispatch
+from order_journal import OrderJournal
+from room_orders import RoomOrder
+
+COFFEE = {"sku": "COF012", "name": "Coffee", "description": "Freshly brewed coffee.", "price": 3.00, "category": "Beverage"}
+STEAK = {"sku": "RBS010-MR", "name": "Ribeye Steak - Medium Rare", "description": "8 oz. steak cooked medium rare.",
+         "price": 30.00, "category": "Dinner"}
+
+def placed(room, placed_at, *items):
+    order = RoomOrder(room, "placed")
+    for item in items:
+        order.add(item)
+    order.order_id, order.placed_at = f"order-{room}", placed_at
+    return order
+
+def test_rush_orders_jump_the_queue_and_stations_split_by_category():
+    kitchen = KitchenDispatch(Broadcaster())
+    kitchen.dispatch(placed("101", 1.0, STEAK, COFFEE))
+    kitchen.dispatch(placed("102", 2.0, STEAK))
+    kitchen.dispatch(placed("103", 3.0, STEAK), rush=True)
+    assert [t.order.room for t in kitchen.queued("kitchen")] == ["103", "101", "102"]
+    assert [(t.order.room, [line["sku"] for line in t.lines]) for t in kitchen.queued("bar")] == [("101", ["COF012"])]
+
+def test_order_status_follows_its_tickets():
+    changes = []
+    kitchen = KitchenDispatch(Broadcaster(), on_change=lambda order: changes.append(order.status))
+    order = placed("101", 1.0, STEAK, COFFEE)
+    kitchen.dispatch(order)
+    bar = kitchen.start("bar")
+    assert (bar.status, order.status) == ("preparing", "preparing")
+    assert kitchen.deliver(bar.ticket_id).delivered_at is not None
+    assert order.status == "preparing"
+    assert kitchen.deliver("order-101-kitchen") is None
+    kitchen.deliver(kitchen.start("kitchen").ticket_id)
+    assert (order.status, changes, kitchen.start("kitchen")) == ("delivered", ["preparing", "delivered"], None)
+    metrics = kitchen.metrics()
+    assert (metrics["bar"]["delivered"], metrics["kitchen"]["waiting"]) == (1, 0)
+    assert metrics["kitchen"]["delivery_seconds"]["max"] >= metrics["kitchen"]["wait_seconds"]["max"]
+
+def test_one_broadcast_reaches_every_display_and_replays_after_reconnect():
+    broadcaster = Broadcaster()
+    kitchen = KitchenDispatch(broadcaster)
+    everything, bar = broadcaster.subscribe(), broadcaster.subscribe("bar")
+    assert next(everything) == next(bar) == "retry: 3000\n\n"
+    kitchen.dispatch(placed("101", 1.0, STEAK, COFFEE))
+    first = next(everything)
+    assert first.startswith("id: 1\nevent: new\n")
+    assert json.loads(next(bar).split("data: ")[1])["station"] == "bar"
+    assert len(broadcaster) == 2
+    everything.close()
+    assert len(broadcaster) == 1
+    replay = broadcaster.subscribe(last_event_id=1)
+    next(replay)
+    assert next(replay).startswith("id: 2\nevent: new\n")
+
+def test_open_tickets_are_queued_again_after_a_restart(tmp_path):
+    path = str(tmp_path / "orders.db")
+    journal = OrderJournal(path)
+    kitchen = KitchenDispatch(Broadcaster(), on_change=journal.update_placed, on_ticket=journal.save_ticket)
+    for order, rush in ((placed("101", 1.0, STEAK, COFFEE), False), (placed("102", 2.0, STEAK), True),
+                        (placed("103", 3.0, COFFEE), False)):
+        journal.place(order)
+        kitchen.dispatch(order, rush)
+    kitchen.deliver(kitchen.start("bar").ticket_id)
+    kitchen.deliver(kitchen.start("bar").ticket_id)
+    started = kitchen.start("kitchen")
+    journal.close()
+
+    journal = OrderJournal(path)
+    _, recent = journal.restore()
+    assert [(o.room, o.status) for o in recent] == [("101", "preparing"), ("102", "preparing"), ("103", "delivered")]
+    restarted = KitchenDispatch(Broadcaster())
+    for order, tickets in journal.undelivered():
+        restarted.restore(order, tickets)
+    journal.close()
+
+    assert [(t.ticket_id, t.status, t.rush) for t in restarted.open_tickets()] == \
+        [("order-102-kitchen", "preparing", True), ("order-101-kitchen", "placed", False)]
+    assert restarted.tickets[started.ticket_id].preparing_at == started.preparing_at
+    assert [line["sku"] for line in restarted.tickets["order-101-kitchen"].lines] == ["RBS010-MR"]
+    ticket = restarted.start("kitchen")
+    assert ticket.ticket_id == "order-101-kitchen"
+    restarted.deliver(ticket.ticket_id)
+    assert ticket.order.status == "delivered"
@@ -0,0 +1,82 @@
+import json
+import os
+import sqlite3
+
+import pytest
+
+from bench_menu_catalog import linear_find, synthetic_menu
+from menu_catalog import MenuCatalog, MenuWatcher, load_menu, with_sku_enum
+
+def item(sku, category="Beverage", price=3.0, **overrides):
+    return {"sku": sku, "name": sku.title(), "description": f"{sku} description",
+            "price": price, "category": category, **overrides}
+
+def test_identical_duplicates_are_dropped_and_enum_keeps_menu_order():
+    catalog = MenuCatalog([item("COF012"), item("AVT002", "Breakfast"), item("COF012"), item("TEG014")])
+    assert catalog.skus == ["COF012", "AVT002", "TEG014"]
+    assert catalog.duplicates == ["COF012"]
+    assert [i["sku"] for i in catalog.category("Beverage")] == ["COF012", "TEG014"]
+    assert catalog.categories == ["Beverage", "Breakfast"]
+    assert catalog.get("AVT002")["category"] == "Breakfast"
+    assert catalog.get("NOPE") is None and "NOPE" not in catalog
+
+@pytest.mark.parametrize("items", [
+    [item("COF012"), item("COF012", price=4.0)],
+    [item("COF012", price=-1)],
+    [item("COF012", price="3.00")],
+    [item("COF012", category="")],
+])
+def test_invalid_menus_are_rejected_at_load(items):
+    with pytest.raises(ValueError):
+        MenuCatalog(items)
+
+def test_index_matches_linear_scan_on_a_large_menu():
+    items = synthetic_menu(10000)
+    catalog = MenuCatalog(items)
+    assert len(catalog) == 10000
+    for sku in catalog.skus[::997] + ["MISSING"]:
+        assert catalog.get(sku) == linear_find(items, sku)
+
+def test_json_yaml_and_sqlite_menus_load_to_the_same_version(tmp_path):
+    pytest.importorskip("yaml")
+    items = [item("COF012"), item("AVT002", "Breakfast", 12.5)]
+    (tmp_path / "menu.json").write_text(json.dumps(items))
+    (tmp_path / "menu.yaml").write_text("items:\n" + "".join(
+        f"  - {{sku: {i['sku']}, name: {i['name']}, description: {i['description']}, price: {i['price']}, "
+        f"category: {i['category']}}}\n" for i in items))
+    db = sqlite3.connect(tmp_path / "menu.db")
+    db.execute("CREATE TABLE menu_items (sku TEXT, name TEXT, description TEXT, price REAL, category TEXT)")
+    db.executemany("INSERT INTO menu_items VALUES (:sku, :name, :description, :price, :category)", items)
+    db.commit()
+    db.close()
+    versions = {load_menu(str(tmp_path / name)).version for name in ("menu.json", "menu.yaml", "menu.db")}
+    assert len(versions) == 1
+    assert MenuCatalog([item("COF012", price=3.5)]).version != MenuCatalog([item("COF012")]).version
+
+def test_sku_enum_is_swapped_in_a_copy():
+    skus = {"type": "array", "description": "SKUs", "items": {"type": "string", "enum": ["COF012"]}}
+    functions = {"add_items": {"function": "add_items", "parameters": {"properties": {"skus": skus}}},
+                 "order_total": {"function": "order_total"}}
+    swapped = with_sku_enum(functions, ["COF012", "TEG014"], ["add_items"])
+    assert swapped["add_items"]["parameters"]["properties"]["skus"]["items"]["enum"] == ["COF012", "TEG014"]
+    assert skus["items"]["enum"] == ["COF012"]
+    assert swapped["order_total"] is functions["order_total"]
+
+def test_watcher_applies_valid_changes_and_keeps_the_menu_on_errors(tmp_path):
+    path = tmp_path / "menu.json"
+    path.write_text(json.dumps([item("COF012")]))
+    applied = []
+    watcher = MenuWatcher(str(path), load_menu(str(path)).version, applied.append, interval=0)
+    assert watcher.check() is False
+
+    def rewrite(text, tick):
+        path.write_text(text)
+        os.utime(path, ns=(tick, tick))
+
+    rewrite(json.dumps([item("COF012"), item("COF012", price=4.0)]), 1)
+    assert (watcher.check(), watcher.failures, applied) == (False, 1, [])
+    rewrite(json.dumps([item("COF012"), item("TEG014")]), 2)
+    assert watcher.check() is True
+    assert applied[0].skus == ["COF012", "TEG014"] and watcher.version == applied[0].version
+    rewrite(json.dumps([item("COF012"), item("TEG014")], indent=2), 3)
+    assert (watcher.check(), watcher.reloads) == (False, 1)
@@ -0,0 +1,50 @@
+from collections import deque
+
+from order_dashboard import DashboardCache, completed_page
+from order_journal import OrderJournal
+from room_orders import RoomOrder
+
+COFFEE = {"sku": "COF012", "name": "Coffee", "description": "Freshly brewed coffee.", "price": 3.00, "category": "Beverage"}
+
+def placed(i):
+    order = RoomOrder(str(100 + i), "placed")
+    order.add(COFFEE)
+    order.order_id, order.placed_at = f"order-{i}", 1000.0 + i
+    return order
+
+def test_pages_render_once_per_version():
+    cache, renders = DashboardCache(), []
+    render = lambda: renders.append(1) or f"page {len(renders)}"
+    assert cache.page(0, render) == cache.page(0, render) == "page 1"
+    etag = cache.etag(0)
+    cache.bump()
+    assert cache.etag(0) != etag
+    assert cache.page(0, render) == "page 2"
+    assert (cache.hits, cache.misses) == (1, 2)
+
+def test_etags_do_not_survive_a_restart():
+    before, after = DashboardCache(), DashboardCache()
+    assert before.version == after.version
+    assert before.etag(0) != after.etag(0)
+
+def test_placed_order_rows_are_rendered_once():
+    cache, renders = DashboardCache(max_fragments=2), []
+    render = lambda order: renders.append(order.room) or order.room
+    orders = [placed(i) for i in range(3)]
+    for order in orders + orders[1:]:
+        cache.fragment(order, render)
+    assert renders == ["100", "101", "102"]
+    cache.fragment(orders[0], render)
+    assert renders[-1] == "100"
+
+def test_older_pages_come_from_the_journal(tmp_path):
+    journal = OrderJournal(str(tmp_path / "orders.db"), recent=5)
+    for i in range(12):
+        journal.place(placed(i))
+    recent = deque((placed(i) for i in range(7, 12)), maxlen=5)
+    rooms = lambda page: ([o.room for o in page[0]], page[1])
+    assert rooms(completed_page(recent, journal, 0, 4)) == (["111", "110", "109", "108"], True)
+    assert rooms(completed_page(recent, journal, 1, 4)) == (["107", "106", "105", "104"], True)
+    assert rooms(completed_page(recent, journal, 2, 4)) == (["103", "102", "101", "100"], False)
+    assert rooms(completed_page(deque([placed(0)], maxlen=5), journal, 0, 4)) == (["100"], False)
+    journal.close()
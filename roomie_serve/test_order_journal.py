@@ -0,0 +1,58 @@
+import sqlite3
+
+from order_journal import OrderJournal
+from room_orders import RoomOrder
+
+COFFEE = {"sku": "COF012", "name": "Coffee", "description": "Freshly brewed coffee.", "price": 3.00, "category": "Beverage"}
+
+def order(room, quantity=1):
+    room_order = RoomOrder(room)
+    room_order.add(COFFEE, quantity)
+    return room_order
+
+def test_pending_and_recent_orders_survive_a_restart(tmp_path):
+    path = str(tmp_path / "orders.db")
+    journal = OrderJournal(path, recent=3)
+    for i in range(10):
+        placed = order(f"2{i:02d}", i + 1)
+        placed.status, placed.placed_at = "placed", 1000.0 + i
+        journal.save_pending(placed)
+        journal.place(placed)
+    journal.save_pending(order("101"))
+    growing = order("102")
+    journal.save_pending(growing)
+    growing.add(COFFEE, 4)
+    journal.save_pending(growing)
+    journal.close()
+
+    pending, recent = OrderJournal(path, recent=3).restore()
+    assert sorted(pending) == ["101", "102"]
+    assert (pending["102"].quantities, pending["102"].total_cents) == ({"COF012": 5}, 1500)
+    assert [o.room for o in recent] == ["207", "208", "209"]
+    assert (recent[-1].placed_at, recent[-1].status, recent[-1].total_cents) == (1009.0, "placed", 3000)
+    recent.append(order("300"))
+    assert len(recent) == 3
+
+def test_writes_are_batched(tmp_path):
+    journal = OrderJournal(str(tmp_path / "orders.db"))
+    for i in range(2000):
+        journal.place(order(str(i)))
+    journal.flush()
+    assert journal.written == 2000
+    assert journal.batches < 2000
+    journal.close()
+
+def test_journals_without_order_ids_are_upgraded(tmp_path):
+    path = str(tmp_path / "orders.db")
+    with sqlite3.connect(path) as db:
+        db.execute("CREATE TABLE placed_orders (seq INTEGER PRIMARY KEY AUTOINCREMENT, room TEXT NOT NULL, "
+                   "placed_at REAL, data TEXT NOT NULL)")
+    db.close()
+    journal = OrderJournal(path)
+    placed = order("101")
+    placed.status, placed.order_id = "placed", "order-101"
+    journal.place(placed)
+    placed.status = "delivered"
+    journal.update_placed(placed)
+    journal.close()
+    assert [o.status for o in OrderJournal(path).restore()[1]] == ["delivered"]
@@ -0,0 +1,42 @@
+import random
+
+from room_orders import RoomOrder, format_cents, to_cents
+
+COFFEE = {"sku": "COF012", "name": "Coffee", "description": "Freshly brewed coffee.", "price": 3.00, "category": "Beverage"}
+TEA = {"sku": "TEH013", "name": "Herbal Tea", "description": "A selection of herbal teas.", "price": 3.50, "category": "Beverage"}
+WATER = {"sku": "WTR099", "name": "Water", "description": "Still water.", "price": 0.10, "category": "Beverage"}
+
+def test_totals_are_exact_in_cents():
+    order = RoomOrder("101")
+    for _ in range(10):
+        order.add(WATER)
+    assert order.total_cents == 100
+    assert format_cents(order.total_cents) == "1.00"
+    assert sum([0.10] * 10) != 1.0
+    assert (to_cents(12), to_cents("3.50"), to_cents(0.29)) == (1200, 350, 29)
+
+def test_partial_and_full_removal():
+    order = RoomOrder("101")
+    order.add(COFFEE, 3)
+    order.add(TEA)
+    assert order.remove("COF012", 2) == 2
+    assert (order.quantities, order.total_cents) == ({"COF012": 1, "TEH013": 1}, 650)
+    assert order.remove("COF012", 5) == 1
+    assert order.remove("COF012") == 0
+    assert [line["sku"] for line in order.lines()] == ["TEH013"]
+    assert order.remove("TEH013") == 1
+    assert (order.total_cents, len(order), list(order.lines())) == (0, 0, [])
+
+def test_running_totals_match_a_recount():
+    rng = random.Random(7)
+    order = RoomOrder("101")
+    for _ in range(2000):
+        item = rng.choice((COFFEE, TEA, WATER))
+        if rng.random() < 0.7:
+            order.add(item, rng.randint(1, 5))
+        else:
+            order.remove(item["sku"], rng.choice((None, 1, 2)))
+    lines = list(order.lines())
+    assert order.total_cents == sum(line["unit_cents"] * line["quantity"] for line in lines)
+    assert all(line["subtotal_cents"] == line["unit_cents"] * line["quantity"] for line in lines)
+    assert len(order.quantities) <= 3
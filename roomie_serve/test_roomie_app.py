@@ -0,0 +1,90 @@
+import base64
+import os
+import socket
+import sys
+
+import pytest
+
+ROOMIE = os.path.dirname(os.path.abspath(__file__))
+# Other apps in this repo also have an app module; roomie_serve's own is loaded for these tests
+SHARED = ("app",)
+
+@pytest.fixture(scope="module")
+def roomie(tmp_path_factory):
+    env = {"ORDER_JOURNAL": str(tmp_path_factory.mktemp("journal") / "orders.db"), "MENU_RELOAD_INTERVAL": "0",
+           "HTTP_USERNAME": os.environ.get("HTTP_USERNAME", "test"),
+           "HTTP_PASSWORD": os.environ.get("HTTP_PASSWORD", "test")}
+    saved_env = {name: os.environ.get(name) for name in env}
+    saved_modules = {name: sys.modules.pop(name) for name in SHARED if name in sys.modules}
+    os.environ.update(env)
+    sys.path.insert(0, ROOMIE)
+
+    network = []
+    def no_network(*args, **kwargs):
+        network.append(args)
+        raise OSError("no network on import")
+    originals = (socket.create_connection, socket.getaddrinfo, socket.gethostbyname)
+    socket.create_connection = socket.getaddrinfo = socket.gethostbyname = no_network
+    try:
+        import app
+    finally:
+        socket.create_connection, socket.getaddrinfo, socket.gethostbyname = originals
+    try:
+        assert (network, app.journal) == ([], None)
+        assert "pyngrok.ngrok" not in sys.modules
+        app.create_app()
+        yield app
+        app.journal.close()
+    finally:
+        sys.path.remove(ROOMIE)
+        for name in SHARED:
+            sys.modules.pop(name, None)
+        sys.modules.update(saved_modules)
+        for name, value in saved_env.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+def auth_header():
+    credentials = f"{os.environ['HTTP_USERNAME']}:{os.environ['HTTP_PASSWORD']}".encode()
+    return {"Authorization": "Basic " + base64.b64encode(credentials).decode()}
+
+def swaig_call(client, function, call_id=None, **args):
+    payload = {"function": function, "argument": {"parsed": [args]}}
+    if call_id:
+        payload["call_id"] = call_id
+    response = client.post("/swaig", json=payload, headers=auth_header())
+    return response.get_json()["response"]
+
+def test_create_app_is_idempotent(roomie):
+    journal = roomie.journal
+    assert roomie.create_app() is roomie.app and roomie.journal is journal
+
+def test_an_order_from_first_item_to_the_kitchen(roomie):
+    client = roomie.app.test_client()
+    assert swaig_call(client, "add_items", room="305", skus=["COF012", "COF012", "RBS010-MR"]) == "Items added successfully"
+    assert swaig_call(client, "delete_items", room="305", skus=["COF012"], quantity=1) == "Items removed successfully"
+    assert swaig_call(client, "order_total", room="305") == "Order total: 33.00"
+    assert swaig_call(client, "place_order", room="305", notes="No ice", rush=True) == "Order placed successfully"
+    assert swaig_call(client, "order_total", room="305").startswith("Order not found")
+
+    tickets = client.get("/kitchen/tickets", headers=auth_header()).get_json()["tickets"]
+    assert sorted((t["station"], t["room"], t["rush"]) for t in tickets) == [("bar", "305", True), ("kitchen", "305", True)]
+    dashboard = client.get("/")
+    assert dashboard.status_code == 200 and "Total Price for room 305" in dashboard.text
+
+def test_signatures_need_credentials(roomie):
+    client = roomie.app.test_client()
+    assert client.post("/swaig", json={"action": "get_signature"}).status_code == 401
+    signatures = client.post("/swaig", json={"action": "get_signature"}, headers=auth_header()).get_json()
+    assert "place_order" in {s["function"] for s in signatures}
+
+def test_repeated_item_requests_in_one_call_all_apply(roomie):
+    client = roomie.app.test_client()
+    for _ in range(2):
+        assert swaig_call(client, "add_items", call_id="call-1", room="412", skus=["COF012"]) == "Items added successfully"
+    assert swaig_call(client, "order_total", room="412") == "Order total: 6.00"
+    assert swaig_call(client, "place_order", call_id="call-1", room="412") == "Order placed successfully"
+    assert swaig_call(client, "place_order", call_id="call-1", room="412") == "Order placed successfully"
+    assert sum(order.room == "412" for order in roomie.completed_orders) == 1
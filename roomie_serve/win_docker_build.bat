@@ -22,7 +22,7 @@ echo.
 echo ============================================
 echo Building Docker image 'roomie_serve_image'...
 echo ============================================
-docker build -t "roomie_serve_image" .
+docker build -t "roomie_serve_image" -f Dockerfile ..
 if %ERRORLEVEL% NEQ 0 (
     echo.
     echo Docker build failed. Please check the Dockerfile and try again.
@@ -76,8 +76,8 @@ if %ERRORLEVEL%==0 (
 )
 
 echo.
-echo Creating and running container '%containerName%' with Bash shell...
-docker run -it --name "%containerName%" "roomie_serve_image" bash
+echo Creating container '%containerName%'; the image starts gunicorn on port 5000...
+docker run -d -p 5000:5000 --name "%containerName%" "roomie_serve_image"
 
 goto menu
 
@@ -0,0 +1,7 @@
+"""
+SWAIG helpers shared by every app in this repository.
+
+Each app puts the repository root on sys.path before importing from here,
+so `python3 app.py`, gunicorn and the Docker images (built from the
+repository root) all use this one copy.
+"""
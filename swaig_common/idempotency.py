@@ -0,0 +1,137 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+from flask import Response, g, jsonify, request
+
+class SWAIGIdempotency:
+    """
+    Runs each SWAIG function call once per call, function and arguments.
+
+    The AI agent retries a SWAIG request it has not had an answer to. A
+    retry of a listed function with the same call ID and arguments gets
+    the first response again for `ttl` seconds instead of running the
+    function a second time. A retry that arrives while the first is still
+    running waits up to `wait` seconds for its response. Responses are
+    kept for up to `max_entries` calls, least recently used first out.
+    Requests without a call ID (e.g. from swaig_cli) are not deduplicated.
+    """
+
+    def __init__(self, functions: Iterable[str], ttl: float = 30, max_entries: int = 10000, wait: float = 30):
+        self.functions = set(functions)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.wait = wait
+        self.executed = 0
+        self.replayed = 0
+        self.waited = 0
+        self._responses: "OrderedDict[str, tuple]" = OrderedDict()
+        self._running = {}
+        self._lock = threading.Lock()
+
+    def key(self, data: dict) -> Optional[str]:
+        function = data.get("function")
+        call_id = data.get("call_id") or (data.get("meta_data") or {}).get("call_id")
+        if function not in self.functions or not call_id:
+            return None
+        arguments = ((data.get("argument") or {}).get("parsed") or [{}])[0]
+        canonical = json.dumps(arguments, sort_keys=True, separators=(",", ":"), default=str)
+        return f"{call_id}:{function}:{hashlib.sha256(canonical.encode()).hexdigest()}"
+
+    def begin(self, key: str) -> Optional[Response]:
+        """The stored response for `key`, or None when this request should run the function"""
+        while True:
+            with self._lock:
+                stored = self._stored(key)
+                if stored:
+                    self.replayed += 1
+                    return self._replay(*stored)
+                running = self._running.get(key)
+                if running is None:
+                    self._running[key] = threading.Event()
+                    self.executed += 1
+                    return None
+                self.waited += 1
+            if not running.wait(self.wait):
+                return jsonify({"response": "This request is still being processed. Please try again shortly."}), 503
+
+    def finish(self, key: str, response: Response = None) -> None:
+        """Store `response` (unless it is missing or a server error) and release waiting retries"""
+        with self._lock:
+            if response is not None and response.status_code < 500 and not response.is_streamed:
+                self._responses[key] = (time.monotonic() + self.ttl, response.status_code,
+                                        response.get_data(), response.mimetype)
+                self._responses.move_to_end(key)
+                while len(self._responses) > self.max_entries:
+                    self._responses.popitem(last=False)
+            running = self._running.pop(key, None)
+        if running:
+            running.set()
+
+    def metrics(self) -> dict:
+        return {"executed": self.executed, "replayed": self.replayed, "waited": self.waited,
+                "stored": len(self._responses)}
+
+    def _stored(self, key: str) -> Optional[tuple]:
+        stored = self._responses.get(key)
+        if stored is None:
+            return None
+        if stored[0] <= time.monotonic():
+            del self._responses[key]
+            return None
+        self._responses.move_to_end(key)
+        return stored[1:]
+
+    @staticmethod
+    def _replay(status: int, body: bytes, mimetype: str) -> Response:
+        response = Response(body, status=status, mimetype=mimetype)
+        response.headers["X-SWAIG-Replayed"] = "true"
+        return response
+
+def idempotent_swaig(app, functions: Iterable[str], path: str = "/swaig") -> SWAIGIdempotency:
+    """
+    Deduplicate retried calls to `functions` at `path`, through the
+    SWAIGIdempotency kept in app.extensions["swaig_idempotency"].
+    SWAIG_IDEMPOTENCY_TTL, SWAIG_IDEMPOTENCY_MAX and SWAIG_IDEMPOTENCY_WAIT
+    override the defaults.
+    """
+    idempotency = SWAIGIdempotency(functions,
+                                   ttl=float(os.getenv("SWAIG_IDEMPOTENCY_TTL", 30)),
+                                   max_entries=int(os.getenv("SWAIG_IDEMPOTENCY_MAX", 10000)),
+                                   wait=float(os.getenv("SWAIG_IDEMPOTENCY_WAIT", 30)))
+    app.extensions["swaig_idempotency"] = idempotency
+
+    @app.before_request
+    def _replay_retried_call():
+        if request.path != path or request.method != "POST":
+            return None
+        idempotency = app.extensions["swaig_idempotency"]
+        key = idempotency.key(request.get_json(silent=True) or {})
+        if key is None:
+            return None
+        replay = idempotency.begin(key)
+        if replay is None:
+            g.swaig_idempotency_key = key
+        else:
+            logging.info("Answering a retried SWAIG call from the stored response")
+        return replay
+
+    @app.after_request
+    def _store_response(response):
+        key = g.pop("swaig_idempotency_key", None)
+        if key:
+            app.extensions["swaig_idempotency"].finish(key, response)
+        return response
+
+    @app.teardown_request
+    def _release_failed_call(error=None):
+        key = g.pop("swaig_idempotency_key", None)
+        if key:
+            app.extensions["swaig_idempotency"].finish(key)
+
+    return idempotency
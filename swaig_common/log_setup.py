@@ -0,0 +1,106 @@
+"""
+Logging setup shared by the SWAIG apps.
+
+    from swaig_common.log_setup import configure_logging, sample_debug_logs
+    configure_logging()
+    sample_debug_logs(app)
+
+Records go through a QueueHandler to a background listener thread, so a
+request thread never waits on a console or file write. Settings come from
+the environment:
+
+    LOG_LEVEL        root level (default INFO)
+    LOG_LEVELS       per-logger levels, e.g. "werkzeug=WARNING,signalwire=DEBUG"
+    LOG_FORMAT       "text" (default) or "json", one object per line
+    LOG_FILE         also append to this file
+    LOG_SAMPLE_RATE  fraction of requests whose DEBUG records are kept (default 1)
+
+Log with %-style arguments (logging.debug("Sent %s", data)) rather than
+f-strings, so messages below the level are never formatted.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import threading
+from contextvars import ContextVar
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s %(name)s [%(threadName)s] %(message)s"
+
+# Whether DEBUG records are kept for the current request
+_debug_sampled: ContextVar[bool] = ContextVar("debug_sampled", default=True)
+_listener = None
+_lock = threading.Lock()
+
+class JSONFormatter(logging.Formatter):
+    """One JSON object per record, with any `extra=` fields included"""
+
+    RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage()
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in self.RESERVED})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+class DebugSampler(logging.Filter):
+    """Drops DEBUG records logged while handling a request that was not sampled"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno > logging.DEBUG or _debug_sampled.get()
+
+def parse_levels(spec: str) -> dict:
+    """"werkzeug=WARNING,signalwire=DEBUG" -> {"werkzeug": "WARNING", "signalwire": "DEBUG"}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in (spec or "").split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+def configure_logging() -> logging.handlers.QueueListener:
+    """Install the queue handler on the root logger once per process and return its listener"""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+        formatter = JSONFormatter() if os.getenv("LOG_FORMAT", "text").lower() == "json" else logging.Formatter(TEXT_FORMAT)
+        handlers = [logging.StreamHandler()]
+        if os.getenv("LOG_FILE"):
+            handlers.append(logging.FileHandler(os.getenv("LOG_FILE")))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        records = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(records)
+        queue_handler.addFilter(DebugSampler())
+        root = logging.getLogger()
+        # signalwire_swaig calls logging.basicConfig on import; replace its handler
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+        for name, level in parse_levels(os.getenv("LOG_LEVELS")).items():
+            logging.getLogger(name).setLevel(level)
+
+        _listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
+        return _listener
+
+def sample_debug_logs(app, rate: float = None) -> None:
+    """Keep DEBUG records for only `rate` (LOG_SAMPLE_RATE) of the app's requests"""
+    rate = float(os.getenv("LOG_SAMPLE_RATE", 1)) if rate is None else rate
+
+    @app.before_request
+    def _sample_request():
+        _debug_sampled.set(rate >= 1 or random.random() < rate)
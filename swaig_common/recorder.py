@@ -0,0 +1,165 @@
+import gzip
+import io
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+# SWAIG function arguments whose values are replaced with MASK in recordings
+SECRET_ARGUMENTS = ("token",)
+MASK = "***"
+
+class SWAIGRecorder:
+    """
+    WSGI middleware that records every POST to /swaig.
+
+    Each request payload, response, status and handling time is queued and
+    appended to a gzip-compressed JSON Lines file by a background thread, so
+    request threads never wait on disk. Every flushed batch is a complete gzip
+    member, so the log stays readable if the process dies. A `{pid}` in the
+    path is replaced with the process id to give each worker its own file.
+    Credentials are never recorded: Authorization headers are left out, the
+    user and password are stripped from every `web_hook_url` in a response
+    (signature documents carry the SWAIG basic auth credentials there), and
+    arguments named in SECRET_ARGUMENTS, such as the caller's MFA code, are
+    masked.
+    """
+
+    def __init__(self, wsgi_app, path, route="/swaig", max_queue=10000, batch_size=500, flush_interval=1.0):
+        self.wsgi_app = wsgi_app
+        self.path = path.replace("{pid}", str(os.getpid()))
+        self.route = route
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._writer = threading.Thread(target=self._write_loop, name="swaig-recorder", daemon=True)
+        self._writer.start()
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") != "POST" or environ.get("PATH_INFO") != self.route:
+            return self.wsgi_app(environ, start_response)
+
+        try:
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            length = 0
+        body = environ["wsgi.input"].read(length) if length else b""
+        environ["wsgi.input"] = io.BytesIO(body)
+
+        captured = {}
+
+        def recording_start_response(status, headers, exc_info=None):
+            captured["status"] = int(status.split(" ", 1)[0])
+            return start_response(status, headers, exc_info)
+
+        started = time.time()
+        clock = time.perf_counter()
+        result = self.wsgi_app(environ, recording_start_response)
+        try:
+            response_body = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        elapsed_ms = (time.perf_counter() - clock) * 1000
+
+        self._enqueue({
+            "ts": started,
+            "elapsed_ms": round(elapsed_ms, 3),
+            "status": captured.get("status"),
+            "request": _mask_arguments(_decode(body)),
+            "response": _strip_credentials(_decode(response_body))
+        })
+        return [response_body]
+
+    def _enqueue(self, record):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                with gzip.open(self.path, "ab") as f:
+                    f.write("".join(json.dumps(record) + "\n" for record in batch).encode())
+            except Exception as e:
+                logging.error("Failed to write SWAIG recording to %s: %s", self.path, e)
+            for _ in batch:
+                self._queue.task_done()
+
+    def flush(self):
+        """Block until every queued record has been written"""
+        self._queue.join()
+
+def _decode(body):
+    try:
+        return json.loads(body)
+    except ValueError:
+        return body.decode("utf-8", "replace")
+
+def _mask_arguments(payload):
+    argument = payload.get("argument") if isinstance(payload, dict) else None
+    if not isinstance(argument, dict):
+        return payload
+    for parsed in argument.get("parsed") or []:
+        if isinstance(parsed, dict):
+            _mask(parsed)
+    raw = argument.get("raw")
+    if isinstance(raw, str):
+        try:
+            raw = json.loads(raw)
+        except ValueError:
+            raw = None
+        if isinstance(raw, dict):
+            argument["raw"] = json.dumps(_mask(raw))
+    return payload
+
+def _mask(arguments):
+    for name in SECRET_ARGUMENTS:
+        if name in arguments:
+            arguments[name] = MASK
+    return arguments
+
+def _strip_credentials(value):
+    """Remove user:password@ from every web_hook_url in a decoded response"""
+    if isinstance(value, list):
+        return [_strip_credentials(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _without_userinfo(item) if key == "web_hook_url" and isinstance(item, str)
+                else _strip_credentials(item) for key, item in value.items()}
+    return value
+
+def _without_userinfo(url):
+    parts = urlsplit(url)
+    if "@" not in parts.netloc:
+        return url
+    return urlunsplit(parts._replace(netloc=parts.netloc.rsplit("@", 1)[1]))
+
+def read_recording(path):
+    """Yield recorded exchanges in the order they were written"""
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def record_swaig_traffic(app):
+    """Wrap the Flask app with SWAIGRecorder when SWAIG_RECORD_FILE is set"""
+    path = os.getenv("SWAIG_RECORD_FILE")
+    if path:
+        app.wsgi_app = SWAIGRecorder(app.wsgi_app, path)
+        logging.info("Recording SWAIG traffic to %s", app.wsgi_app.path)
+    return app
@@ -0,0 +1,97 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Sequence
+
+from flask import Response, request
+
+class SignatureCache:
+    """
+    Serialized SWAIG signature documents with strong ETags.
+
+    The signature set is fixed once the endpoints are registered, but the
+    platform asks for it on every call setup. Each document is built once
+    by signalwire_swaig, for a host URL (it is part of web_hook_url) and a
+    `functions` subset, and kept as bytes. Subsets are memoized up to
+    `max_entries`, least recently used first out. An app that changes its
+    signatures at runtime calls `set_version`, and documents built for an
+    older version are dropped.
+    """
+
+    def __init__(self, swaig, max_entries: int = 64):
+        self.swaig = swaig
+        self.max_entries = max_entries
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._documents: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def document(self, host_url: str, functions: Sequence[str] = ()) -> tuple:
+        """(body bytes, ETag) for the signatures of `functions`, or of all functions when empty"""
+        key = (self.version, host_url, tuple(name for name in functions if name in self.swaig.functions))
+        with self._lock:
+            cached = self._documents.get(key)
+            if cached:
+                self._documents.move_to_end(key)
+                self.hits += 1
+                return cached
+        body = self.swaig._handle_signature_request({"functions": list(key[2])}).get_data()
+        cached = (body, hashlib.sha256(body).hexdigest()[:32])
+        with self._lock:
+            self.misses += 1
+            if key[0] != self.version:
+                return cached
+            self._documents[key] = cached
+            while len(self._documents) > self.max_entries:
+                self._documents.popitem(last=False)
+        logging.debug("Cached SWAIG signatures for %s %s (%d bytes)", host_url, key[2] or "all", len(body))
+        return cached
+
+    def set_version(self, version) -> None:
+        """Serve documents for `version` from now on, dropping any built before it"""
+        with self._lock:
+            if version != self.version:
+                self.version = version
+                self._documents.clear()
+
+    def response(self, functions: Sequence[str] = ()) -> Response:
+        """The cached document for this request, or 304 when the client's copy is current"""
+        body, etag = self.document(request.host_url, functions)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+def _authorized(swaig) -> bool:
+    # The documents carry the SWAIG credentials in web_hook_url
+    if not swaig.auth_creds:
+        return True
+    auth = request.authorization
+    return bool(auth) and (auth.username, auth.password) == tuple(swaig.auth_creds)
+
+def cache_swaig_signatures(app, swaig, path: str = "/swaig", methods: Sequence[str] = ("GET", "POST")) -> SignatureCache:
+    """Answer signature requests to `path` (GET, or POST with action get_signature) from a SignatureCache"""
+    cache = SignatureCache(swaig)
+
+    @app.before_request
+    def _cached_signatures():
+        if request.path != path or request.method not in methods:
+            return None
+        if request.method == "GET":
+            functions = request.args.getlist("functions")
+        else:
+            data = request.get_json(silent=True) or {}
+            if data.get("action") != "get_signature":
+                return None
+            functions = data.get("functions") or ()
+        if not _authorized(swaig):
+            return Response("Unauthorized Access", status=401,
+                            headers={"WWW-Authenticate": 'Basic realm="Authentication Required"'})
+        return cache.response(functions)
+
+    return cache
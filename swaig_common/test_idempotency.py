@@ -0,0 +1,90 @@
+import threading
+import time
+
+from flask import Flask, jsonify, request
+
+from swaig_common.idempotency import idempotent_swaig
+
+def make_app(delay=0.0, **settings):
+    """A SWAIG endpoint whose create_booking counts how often it really ran"""
+    app = Flask(__name__)
+    idempotency = idempotent_swaig(app, ["create_booking"])
+    for name, value in settings.items():
+        setattr(idempotency, name, value)
+    runs = []
+
+    @app.route("/swaig", methods=["POST"])
+    def swaig():
+        data = request.json
+        if data["function"] == "fail":
+            return jsonify({"response": "down"}), 500
+        runs.append(data["function"])
+        time.sleep(delay)
+        return jsonify({"response": f"{data['function']} run {len(runs)}"})
+
+    return app, idempotency, runs
+
+def call(client, call_id, function, **args):
+    payload = {"function": function, "argument": {"parsed": [args]}}
+    if call_id:
+        payload["call_id"] = call_id
+    return client.post("/swaig", json=payload)
+
+def test_a_retry_gets_the_first_response():
+    app, idempotency, runs = make_app()
+    client = app.test_client()
+
+    first = call(client, "call-1", "create_booking", name="Ann")
+    retry = call(client, "call-1", "create_booking", name="Ann")
+    assert (retry.json, retry.headers["X-SWAIG-Replayed"]) == (first.json, "true")
+    assert "X-SWAIG-Replayed" not in first.headers
+
+    call(client, "call-2", "create_booking", name="Ann")
+    call(client, "call-1", "create_booking", name="Bob")
+    assert len(runs) == 3
+    assert idempotency.metrics() == {"executed": 3, "replayed": 1, "waited": 0, "stored": 3}
+
+def test_unlisted_functions_and_calls_without_an_id_always_run():
+    app, idempotency, runs = make_app()
+    client = app.test_client()
+    for _ in range(2):
+        call(client, "call-1", "add_item", sku="COF012")
+        call(client, None, "create_booking", name="Ann")
+    assert runs == ["add_item", "create_booking"] * 2
+    assert idempotency.metrics()["stored"] == 0
+
+def test_a_retry_during_the_first_attempt_waits_for_it():
+    app, idempotency, runs = make_app(delay=0.2)
+    results = []
+
+    def send():
+        results.append(call(app.test_client(), "call-1", "create_booking", name="Ann").json)
+
+    threads = [threading.Thread(target=send) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(runs) == 1
+    assert len(results) == 5 and all(result == results[0] for result in results)
+    assert idempotency.metrics()["executed"] == 1
+
+def test_server_errors_are_not_replayed():
+    app, idempotency, runs = make_app()
+    idempotency.functions.add("fail")
+    client = app.test_client()
+    for _ in range(2):
+        assert call(client, "call-1", "fail").status_code == 500
+    assert idempotency.metrics()["executed"] == 2
+
+def test_stored_responses_expire_and_stay_bounded():
+    app, idempotency, runs = make_app(ttl=0.05, max_entries=2)
+    client = app.test_client()
+
+    for i in range(4):
+        call(client, f"call-{i}", "create_booking", name="Ann")
+    assert idempotency.metrics()["stored"] == 2
+
+    time.sleep(0.06)
+    call(client, "call-3", "create_booking", name="Ann")
+    assert len(runs) == 5
@@ -0,0 +1,31 @@
+import json
+import logging
+
+from flask import Flask
+
+from swaig_common import log_setup
+
+def record(level=logging.DEBUG, msg="Sent %s", args=("+15550123456",), **extra):
+    entry = logging.LogRecord("mfa", level, __file__, 1, msg, args, None)
+    entry.__dict__.update(extra)
+    return entry
+
+def test_json_lines_include_extra_fields():
+    line = json.loads(log_setup.JSONFormatter().format(record(call_id="call-1")))
+    assert (line["level"], line["message"], line["call_id"]) == ("DEBUG", "Sent +15550123456", "call-1")
+
+def test_debug_records_are_sampled_per_request():
+    sampler = log_setup.DebugSampler()
+    app = Flask(__name__)
+    log_setup.sample_debug_logs(app, rate=0)
+    seen = []
+    app.add_url_rule("/", "index", lambda: str(seen.append(
+        (sampler.filter(record()), sampler.filter(record(logging.WARNING))))))
+
+    app.test_client().get("/")
+    assert seen == [(False, True)]
+
+def test_per_logger_levels():
+    assert log_setup.parse_levels("werkzeug=warning, signalwire=DEBUG") == {
+        "werkzeug": "WARNING", "signalwire": "DEBUG"}
+    assert log_setup.parse_levels("") == {}
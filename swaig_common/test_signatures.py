@@ -0,0 +1,91 @@
+from flask import Flask
+from signalwire_swaig.core import SWAIG, SWAIGArgument
+
+from swaig_common.signatures import SignatureCache, cache_swaig_signatures
+
+AUTH = {"Authorization": "Basic dGVzdDp0ZXN0"}
+
+def make_app(**options):
+    app = Flask(__name__)
+    swaig = SWAIG(app, auth=("test", "test"))
+    cache = cache_swaig_signatures(app, swaig, **options)
+
+    @swaig.endpoint("Send a code.", to_number=SWAIGArgument("string", "Phone number", required=True))
+    def send_code(to_number, meta_data=None, **kwargs):
+        return f"sent to {to_number}", {}
+
+    @swaig.endpoint("Check a code.", token=SWAIGArgument("string", "The code", required=True))
+    def check_code(token, meta_data=None, **kwargs):
+        return "checked", {}
+
+    return app, swaig, cache
+
+def signature_request(client, headers=None, **body):
+    return client.post("/swaig", json={"action": "get_signature", **body}, headers={**AUTH, **(headers or {})})
+
+def test_signatures_are_built_once_and_revalidated_with_etag():
+    app, _, cache = make_app()
+    client = app.test_client()
+
+    first = client.get("/swaig", base_url="https://signatures.example", headers=AUTH)
+    assert first.status_code == 200
+    assert {s["function"] for s in first.get_json()} == {"send_code", "check_code"}
+    assert first.headers["ETag"]
+
+    revalidated = client.get("/swaig", base_url="https://signatures.example", headers={**AUTH, "If-None-Match": first.headers["ETag"]})
+    assert (revalidated.status_code, revalidated.data) == (304, b"")
+    assert (cache.misses, cache.hits) == (1, 1)
+
+def test_subsets_are_memoized_up_to_a_bound():
+    app, swaig, _ = make_app()
+    cache = SignatureCache(swaig, max_entries=2)
+    with app.test_request_context():
+        for functions in (["send_code"], ["check_code"], ["send_code", "check_code"]):
+            cache.document("https://a.example/", functions)
+        cache.document("https://a.example/", ["check_code", "not_a_function"])
+    assert len(cache._documents) == 2
+    assert cache.hits == 1
+
+def test_post_signature_requests_honour_the_functions_filter():
+    app, _, _ = make_app()
+    client = app.test_client()
+    subset = signature_request(client, functions=["check_code"])
+    assert [s["function"] for s in subset.get_json()] == ["check_code"]
+    assert subset.get_json()[0]["web_hook_url"].endswith("/swaig")
+
+    everything = signature_request(client)
+    assert len(everything.get_json()) == 2
+    assert everything.headers["ETag"] != subset.headers["ETag"]
+    assert signature_request(client, headers={"If-None-Match": subset.headers["ETag"]},
+                             functions=["check_code"]).status_code == 304
+
+def test_function_calls_still_reach_swaig():
+    app, _, _ = make_app()
+    response = app.test_client().post("/swaig", json={"function": "check_code", "argument": {"parsed": [{"token": "1"}]}},
+                                      headers=AUTH)
+    assert response.get_json()["response"] == "checked"
+
+def test_signatures_need_the_swaig_credentials():
+    app, _, _ = make_app()
+    client = app.test_client()
+    assert client.get("/swaig").status_code == 401
+    assert client.post("/swaig", json={"action": "get_signature"}).status_code == 401
+    assert signature_request(client, headers={"Authorization": "Basic d3Jvbmc6d3Jvbmc="}).status_code == 401
+
+def test_only_the_listed_methods_are_answered():
+    app, _, cache = make_app(methods=("POST",))
+    client = app.test_client()
+    app.add_url_rule("/swaig", "page", lambda: "a page", methods=["GET"])
+    assert client.get("/swaig").data == b"a page"
+    assert signature_request(client).status_code == 200
+    assert cache.misses == 1
+
+def test_a_new_version_drops_older_documents():
+    app, swaig, _ = make_app()
+    cache = SignatureCache(swaig)
+    with app.test_request_context():
+        cache.document("https://a.example/")
+        cache.set_version("menu-2")
+        cache.document("https://a.example/")
+        cache.document("https://a.example/")
+    assert (cache.misses, cache.hits, len(cache._documents)) == (2, 1, 1)
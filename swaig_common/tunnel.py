@@ -0,0 +1,52 @@
+import logging
+import os
+import socket
+import threading
+import time
+
+def wait_for_port(port, host="127.0.0.1", timeout=30.0):
+    """Return True once something accepts connections on host:port"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.1)
+    return False
+
+def open_tunnel(port):
+    """Open an ngrok tunnel to the port once it is accepting connections"""
+    if not wait_for_port(port):
+        logging.error("Not starting ngrok: nothing is listening on port %s", port)
+        return None
+    try:
+        from pyngrok import ngrok
+        ngrok.set_auth_token(os.getenv("NGROK_AUTH_TOKEN"))
+        public_url = ngrok.connect(port).public_url
+    except Exception as e:
+        logging.error("Failed to start ngrok: %s", e)
+        return None
+    os.environ["PUBLIC_URL"] = public_url
+    logging.info("Ngrok tunnel available at: %s", public_url)
+    print(f"Public SWAIG URL: {public_url}/swaig")
+    return public_url
+
+def start_tunnel(port):
+    """
+    Open the ngrok tunnel in the background when NGROK_AUTH_TOKEN is set, so
+    the server never waits on ngrok and still serves locally if it fails.
+    """
+    if not os.getenv("NGROK_AUTH_TOKEN"):
+        logging.info("NGROK_AUTH_TOKEN is not set; serving without a tunnel")
+        return None
+    thread = threading.Thread(target=open_tunnel, args=(port,), name="ngrok-tunnel", daemon=True)
+    thread.start()
+    return thread
+
+def close_tunnels():
+    try:
+        from pyngrok import ngrok
+        ngrok.kill()
+    except Exception as e:
+        logging.debug("Failed to stop ngrok: %s", e)